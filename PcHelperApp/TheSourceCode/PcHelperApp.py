@@ -1,17 +1,15 @@
+import os
 import tkinter as tk
 from tkinter import messagebox, filedialog
-import os
-import shutil
-import socket
-import tempfile
-import ctypes
-import webbrowser
-import threading
-import pyperclip
-import sqlite3
-import queue
-import time
-import colorsys
+
+# Only what the first frame needs is imported here. The clipboard store, disk index, cleaner,
+# trash and network code (sqlite3, asyncio, ssl, ctypes, webbrowser, pyperclip) are imported
+# where they are first used, after the window is up; benchmarks/bench_startup.py keeps count.
+from pchelper.metrics import METRICS, instrument, timed
+from pchelper.tasks import TaskScheduler
+from pchelper.themes import adjust_color, load_themes
+from ui_bindings import WidgetBindings
+from ui_dispatcher import UiDispatcher
 
 # Install customtkinter if not already installed: pip install customtkinter
 try:
@@ -20,6 +18,9 @@ try:
 except ImportError:
     USE_CUSTOM_TKINTER = False
 
+# Delay between the last keystroke and the live history filter running
+SEARCH_DEBOUNCE_MS = 150
+
 # Language translations
 TRANSLATIONS = {
     'english': {
@@ -53,7 +54,19 @@ TRANSLATIONS = {
         },
         'email_reminder': "📧 Don't forget to check your email!",
         'settings': "⚙️ Settings",
-        'app_theme': "Toggle App Theme"
+        'app_theme': "Toggle App Theme",
+        'theme': "Theme",
+        'preview_cleanup': "Preview Temp Cleanup",
+        'empty_old_trash': "Empty Trash Older Than 30 Days",
+        'running_tasks': "Running Tasks",
+        'network_monitor': "Network Monitor",
+        'diagnostics': "Diagnostics",
+        'record_timings': "Record Timings",
+        'show_timings': "Show Timings",
+        'export_timings': "Export Timings...",
+        'watch_stalls': "Watch for Stalls",
+        'show_responsiveness': "Show Responsiveness",
+        'profile_threads': "Profile Threads"
     },
     'arabic': {
         'app_title': "مساعد الكمبيوتر",
@@ -86,7 +99,19 @@ TRANSLATIONS = {
         },
         'email_reminder': "📧 لا تنس التحقق من بريدك الإلكتروني!",
         'settings': "⚙️ الإعدادات",
-        'app_theme': "تبديل مظهر التطبيق"
+        'app_theme': "تبديل مظهر التطبيق",
+        'theme': "المظهر",
+        'preview_cleanup': "معاينة تنظيف الملفات المؤقتة",
+        'empty_old_trash': "إفراغ المحذوفات الأقدم من 30 يومًا",
+        'running_tasks': "المهام الجارية",
+        'network_monitor': "مراقبة الشبكة",
+        'diagnostics': "التشخيص",
+        'record_timings': "تسجيل التوقيتات",
+        'show_timings': "عرض التوقيتات",
+        'export_timings': "تصدير التوقيتات...",
+        'watch_stalls': "مراقبة التجمد",
+        'show_responsiveness': "عرض سرعة الاستجابة",
+        'profile_threads': "تحليل أداء الخيوط"
     }
 }
 
@@ -124,86 +149,18 @@ COLORS = {
     }
 }
 
-class ClipboardHistoryManager:
-    def __init__(self, max_entries=50):
-        self.db_path = 'clipboard_history.db'
-        self.max_entries = max_entries
-        self.action_queue = queue.Queue()
-        self.result_queue = queue.Queue()
-        self.last_content = ""
-        self.start_db_thread()
-
-    def start_db_thread(self):
-        def db_worker():
-            conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    content TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
-            
-            while True:
-                action, args = self.action_queue.get()
-                if action == 'stop':
-                    conn.close()
-                    break
-                
-                try:
-                    if action == 'add':
-                        content = args[0]
-                        cursor = conn.cursor()
-                        cursor.execute('INSERT INTO history (content) VALUES (?)', (content,))
-                        
-                        # Trim history
-                        cursor.execute(f'''
-                            DELETE FROM history WHERE id NOT IN (
-                                SELECT id FROM history ORDER BY timestamp DESC LIMIT {self.max_entries}
-                            )
-                        ''')
-                        conn.commit()
-                        self.result_queue.put(True)
-                    
-                    elif action == 'get':
-                        cursor = conn.cursor()
-                        cursor.execute('SELECT content FROM history ORDER BY timestamp DESC')
-                        results = [item[0] for item in cursor.fetchall()]
-                        self.result_queue.put(results)
-                    
-                    elif action == 'clear':
-                        cursor = conn.cursor()
-                        cursor.execute('DELETE FROM history')
-                        conn.commit()
-                        self.result_queue.put("Clipboard history cleared!")
-                
-                except sqlite3.Error as e:
-                    self.result_queue.put(f"Database error: {str(e)}")
-                
-                self.action_queue.task_done()
-        
-        self.db_thread = threading.Thread(target=db_worker, daemon=True)
-        self.db_thread.start()
-
-    def add_to_history(self, content):
-        if content and content != self.last_content:
-            self.last_content = content
-            self.action_queue.put(('add', (content,)))
-            return self.result_queue.get()
-        return False
+# Which disk index location each cleaning button reports on
+RECLAIMABLE_LOCATIONS = {
+    'clean_files': 'temp',
+    'empty_trash': 'trash'
+}
 
-    def get_history(self):
-        self.action_queue.put(('get', ()))
-        return self.result_queue.get()
 
-    def clear_history(self):
-        self.action_queue.put(('clear', ()))
-        return self.result_queue.get()
+def translated(key, field=None):
+    if field is None:
+        return lambda texts, colors: texts[key]
+    return lambda texts, colors: texts[key][field]
 
-    def __del__(self):
-        self.action_queue.put(('stop', ()))
-        self.db_thread.join()
 
 class PCHelperApp:
     def __init__(self, root):
@@ -211,19 +168,70 @@ class PCHelperApp:
         self.current_language = 'english'
         self.dark_mode = False
         self.current_theme = 'light'
-        self.color_scheme = COLORS[self.current_theme]
+        # COLORS plus any themes.json defines, expanded once into palettes with every hover,
+        # pressed and zebra shade the widgets use
+        self.palettes = load_themes('themes.json', COLORS)
+        self.color_scheme = self.palettes[self.current_theme]
+        self.theme_choice = tk.StringVar(master=root, value=self.current_theme)
         
         if USE_CUSTOM_TKINTER:
             ctk.set_appearance_mode("light")
             ctk.set_default_color_theme("blue")
         
+        self.dispatcher = UiDispatcher(root).start()
+        self.scheduler = TaskScheduler(max_workers=4, post=self.dispatcher.post)
+        self.reclaimable = {}
+        self.bindings = WidgetBindings(TRANSLATIONS[self.current_language], self.color_scheme)
+        self.network_monitor = None
+        self.network_monitor_enabled = tk.BooleanVar(master=root, value=False)
+        self.metrics_enabled = tk.BooleanVar(master=root, value=METRICS.enabled)
+        self.diagnostics_window = None
+        self.profiler = None
+        self.profiling = tk.BooleanVar(master=root, value=False)
+        self.watchdog = None
+        # Off by default like the other diagnostics: it wakes ten times a second and writes a log.
+        # PCHELPER_WATCHDOG=1 turns it on from the start.
+        self.watchdog_enabled = tk.BooleanVar(master=root, value=os.environ.get('PCHELPER_WATCHDOG') == '1')
+        self.network_sparkline = None
+        self._sparkline_job = None
+        self._clipboard_manager = None
+        self._disk_index = None
+        self.started = False
         self.setup_ui()
-        self.clipboard_manager = ClipboardHistoryManager()
+        # Idle callbacks run in order, so this one comes after the first frame has been drawn
+        self.root.after_idle(self.root.after, 0, self.start_services)
+
+    def start_services(self):
         self.start_clipboard_monitoring()
+        self.refresh_reclaimable_space()
+        self.toggle_watchdog()
+        self.started = True
         self.show_email_reminder()
 
+    @property
+    def clipboard_manager(self):
+        # Opened by start_services, or earlier if something needs it first; main thread only
+        if self._clipboard_manager is None:
+            from pchelper.clipboard_history import ClipboardHistoryManager
+            from pchelper.retention import RetentionPolicy
+
+            self._clipboard_manager = ClipboardHistoryManager(
+                retention=RetentionPolicy.load('clipboard_retention.json')
+            )
+        return self._clipboard_manager
+
+    @property
+    def disk_index(self):
+        if self._disk_index is None:
+            from pchelper.disk_index import DiskUsageIndex
+
+            self._disk_index = DiskUsageIndex('disk_index.db')
+        return self._disk_index
+
+    @instrument('ui.build')
     def setup_ui(self):
-        self.root.title(TRANSLATIONS[self.current_language]['app_title'])
+        # Builds the window once; language and theme switches only reconfigure it through self.bindings
+        self.bindings.bind(self.root, lambda title: self.root.title(title), title=translated('app_title'))
         self.root.geometry("1000x800")
         self.root.minsize(800, 600)
         
@@ -233,49 +241,63 @@ class PCHelperApp:
         self.create_menu()
 
         if USE_CUSTOM_TKINTER:
-            self.main_frame = ctk.CTkFrame(self.root, fg_color=self.color_scheme['background'])
+            self.main_frame = ctk.CTkFrame(self.root)
+            self.bindings.bind(self.main_frame, fg_color=self.themed('background'))
         else:
-            self.main_frame = tk.Frame(self.root, bg=self.color_scheme['background'])
+            self.main_frame = tk.Frame(self.root)
+            self.bindings.bind(self.main_frame, bg=self.themed('background'))
         self.main_frame.grid(row=0, column=0, sticky="nsew")
         self.main_frame.grid_columnconfigure(0, weight=1)
         self.main_frame.grid_rowconfigure(1, weight=1)
 
         if USE_CUSTOM_TKINTER:
-            self.header_frame = ctk.CTkFrame(self.main_frame, fg_color=self.color_scheme['primary'], height=80, corner_radius=0)
+            self.header_frame = ctk.CTkFrame(self.main_frame, height=80, corner_radius=0)
+            self.bindings.bind(self.header_frame, fg_color=self.themed('primary'))
         else:
-            self.header_frame = tk.Frame(self.main_frame, bg=self.color_scheme['primary'], height=80)
+            self.header_frame = tk.Frame(self.main_frame, height=80)
+            self.bindings.bind(self.header_frame, bg=self.themed('primary'))
         self.header_frame.grid(row=0, column=0, sticky="ew", padx=0, pady=(0, 10))
         
         if USE_CUSTOM_TKINTER:
             self.main_title_label = ctk.CTkLabel(
                 self.header_frame,
-                text=TRANSLATIONS[self.current_language]['main_title'],
                 font=ctk.CTkFont(family="Arial", size=24, weight="bold"),
-                text_color=self.color_scheme['button_text'],
                 pady=20
             )
+            self.bindings.bind(
+                self.main_title_label,
+                text=translated('main_title'),
+                text_color=self.themed('button_text')
+            )
         else:
             self.main_title_label = tk.Label(
                 self.header_frame,
-                text=TRANSLATIONS[self.current_language]['main_title'],
                 font=("Arial", 24, "bold"),
-                fg=self.color_scheme['button_text'],
-                bg=self.color_scheme['primary'],
                 pady=20
             )
+            self.bindings.bind(
+                self.main_title_label,
+                text=translated('main_title'),
+                fg=self.themed('button_text'),
+                bg=self.themed('primary')
+            )
         self.main_title_label.pack(pady=15)
 
+        self.network_sparkline = None
+        if self.network_monitor is not None:
+            self.create_network_sparkline()
+
         if USE_CUSTOM_TKINTER:
-            self.content_frame = ctk.CTkScrollableFrame(
-                self.main_frame,
-                fg_color=self.color_scheme['background']
-            )
+            self.content_frame = ctk.CTkScrollableFrame(self.main_frame)
+            self.bindings.bind(self.content_frame, fg_color=self.themed('background'))
             self.content_frame.grid(row=1, column=0, sticky="nsew", padx=15, pady=15)
             self.content_frame.grid_columnconfigure(0, weight=1)
         else:
-            canvas = tk.Canvas(self.main_frame, bg=self.color_scheme['background'], highlightthickness=0)
+            canvas = tk.Canvas(self.main_frame, highlightthickness=0)
             scrollbar = tk.Scrollbar(self.main_frame, orient="vertical", command=canvas.yview)
-            self.content_frame = tk.Frame(canvas, bg=self.color_scheme['background'])
+            self.content_frame = tk.Frame(canvas)
+            self.bindings.bind(canvas, bg=self.themed('background'))
+            self.bindings.bind(self.content_frame, bg=self.themed('background'))
             
             self.content_frame.bind(
                 "<Configure>",
@@ -288,7 +310,10 @@ class PCHelperApp:
             canvas.grid(row=1, column=0, sticky="nsew", padx=15, pady=15)
             scrollbar.grid(row=1, column=1, sticky="ns")
 
-        self.update_ui()
+        self.create_sections()
+
+    def themed(self, name):
+        return lambda texts, colors: colors[name]
 
     def create_menu(self):
         menu_bar = tk.Menu(self.root)
@@ -300,26 +325,139 @@ class PCHelperApp:
         language_menu.add_command(label="العربية", command=lambda: self.change_language('arabic'))
 
         settings_menu = tk.Menu(menu_bar, tearoff=0)
-        menu_bar.add_cascade(label=TRANSLATIONS[self.current_language]['settings'], menu=settings_menu)
-        settings_menu.add_command(
-            label=TRANSLATIONS[self.current_language]['app_theme'],
-            command=self.toggle_app_theme
+        self.add_menu_entry(menu_bar, 'cascade', 'settings', menu=settings_menu)
+        self.add_menu_entry(settings_menu, 'command', 'app_theme', command=self.toggle_app_theme)
+        theme_menu = tk.Menu(settings_menu, tearoff=0)
+        self.add_menu_entry(settings_menu, 'cascade', 'theme', menu=theme_menu)
+        for name in self.palettes:
+            theme_menu.add_radiobutton(
+                label=name.title(),
+                variable=self.theme_choice,
+                value=name,
+                command=lambda name=name: self.set_theme(name)
+            )
+        self.add_menu_entry(
+            settings_menu, 'command', 'preview_cleanup',
+            command=lambda: self.clean_temp_files(dry_run=True)
+        )
+        # The Windows Recycle Bin can only be emptied as a whole
+        if os.name != 'nt':
+            self.add_menu_entry(
+                settings_menu, 'command', 'empty_old_trash',
+                command=lambda: self.empty_trash(older_than_days=30)
+            )
+        self.add_menu_entry(settings_menu, 'command', 'running_tasks', command=self.show_running_tasks)
+        self.add_menu_entry(
+            settings_menu, 'checkbutton', 'network_monitor',
+            variable=self.network_monitor_enabled,
+            command=self.toggle_network_monitor
         )
 
+        diagnostics_menu = tk.Menu(menu_bar, tearoff=0)
+        self.add_menu_entry(menu_bar, 'cascade', 'diagnostics', menu=diagnostics_menu)
+        self.add_menu_entry(
+            diagnostics_menu, 'checkbutton', 'record_timings',
+            variable=self.metrics_enabled,
+            command=self.toggle_metrics
+        )
+        self.add_menu_entry(diagnostics_menu, 'command', 'show_timings', command=self.show_diagnostics)
+        self.add_menu_entry(diagnostics_menu, 'command', 'export_timings', command=self.export_metrics)
+        diagnostics_menu.add_separator()
+        self.add_menu_entry(
+            diagnostics_menu, 'checkbutton', 'watch_stalls',
+            variable=self.watchdog_enabled,
+            command=self.toggle_watchdog
+        )
+        self.add_menu_entry(diagnostics_menu, 'command', 'show_responsiveness', command=self.show_responsiveness)
+        self.add_menu_entry(
+            diagnostics_menu, 'checkbutton', 'profile_threads',
+            variable=self.profiling,
+            command=self.toggle_profiler
+        )
+
+    def add_menu_entry(self, menu, kind, key, **options):
+        # Menu entries are not widgets, so their label is bound through entryconfigure on the entry's index
+        menu.add(kind, **options)
+        index = menu.index('end')
+        self.bindings.bind(
+            menu,
+            lambda **changed: menu.entryconfigure(index, **changed),
+            label=translated(key)
+        )
+
+    def toggle_network_monitor(self):
+        if self.network_monitor_enabled.get():
+            from pchelper.connectivity import ConnectivityChecker
+            from pchelper.network_monitor import NetworkMonitor
+
+            try:
+                self.network_monitor = NetworkMonitor(ConnectivityChecker.load('connectivity.json')).start()
+                self.scheduler.add_service("network-monitor", self.network_monitor.stop,
+                                           lambda: self.network_monitor is not None and self.network_monitor.running)
+            except Exception as e:
+                print(f"Network monitor error: {str(e)}")
+                self.network_monitor_enabled.set(False)
+                return
+            self.create_network_sparkline()
+        else:
+            if self._sparkline_job is not None:
+                self.root.after_cancel(self._sparkline_job)
+                self._sparkline_job = None
+            if self.network_sparkline is not None:
+                self.network_sparkline.destroy()
+                self.network_sparkline = None
+            if self.network_monitor is not None:
+                self.scheduler.remove_service("network-monitor")
+                self.network_monitor.close()
+                self.network_monitor = None
+
+    def create_network_sparkline(self):
+        from sparkline import Sparkline
+
+        self.network_sparkline = Sparkline(self.header_frame)
+        self.bindings.bind(
+            self.network_sparkline,
+            self.network_sparkline.set_colors,
+            bg=self.themed('primary'),
+            line_color=self.themed('button_text')
+        )
+        self.network_sparkline.place(relx=1.0, rely=0.5, anchor='e', x=-15)
+        if self._sparkline_job is None:
+            self.update_network_sparkline()
+
+    def update_network_sparkline(self):
+        self._sparkline_job = None
+        if self.network_monitor is None:
+            return
+        if self.network_sparkline is not None and self.network_sparkline.winfo_exists():
+            snapshot = self.network_monitor.snapshot()
+            if snapshot.online is None:
+                caption = "Checking..."
+            elif not snapshot.online:
+                caption = "Offline"
+            else:
+                caption = f"{snapshot.last_latency * 1000:.0f} ms (p90 {snapshot.p90 * 1000:.0f} ms)"
+            self.network_sparkline.show(snapshot.recent, caption)
+        self._sparkline_job = self.root.after(2000, self.update_network_sparkline)
+
     def toggle_app_theme(self):
-        self.dark_mode = not self.dark_mode
-        self.current_theme = 'dark' if self.dark_mode else 'light'
-        self.color_scheme = COLORS[self.current_theme]
+        self.set_theme('light' if self.dark_mode else 'dark')
+
+    def set_theme(self, name):
+        self.current_theme = name
+        self.color_scheme = self.palettes[name]
+        self.dark_mode = self.color_scheme['mode'] == 'dark'
+        self.theme_choice.set(name)
         
         if USE_CUSTOM_TKINTER:
-            ctk.set_appearance_mode("dark" if self.dark_mode else "light")
-        
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
+            ctk.set_appearance_mode(self.color_scheme['mode'])
         
-        self.setup_ui()
+        with timed('ui.theme_switch'):
+            self.bindings.apply(colors=self.color_scheme)
 
     def toggle_system_theme(self):
+        import ctypes
+
         try:
             current_theme = ctypes.windll.dwmapi.DwmGetWindowAttribute(0, 20)
             ctypes.windll.dwmapi.DwmSetWindowAttribute(0, 20, not current_theme)
@@ -343,7 +481,8 @@ class PCHelperApp:
             y = (notification.winfo_screenheight() // 2) - (height // 2)
             notification.geometry(f'{width}x{height}+{x}+{y}')
             
-            color = self.color_scheme['danger'] if error else self.color_scheme['success']
+            tone = 'danger' if error else 'success'
+            color = self.color_scheme[tone]
             notification.configure(fg_color=color)
             
             frame = ctk.CTkFrame(notification, fg_color=color, corner_radius=10, border_width=0)
@@ -369,8 +508,8 @@ class PCHelperApp:
                 frame,
                 text="Got it",
                 command=notification.destroy,
-                fg_color=self._adjust_color(color, -15),
-                hover_color=self._adjust_color(color, -30),
+                fg_color=self.color_scheme[f'{tone}_hover'],
+                hover_color=self.color_scheme[f'{tone}_pressed'],
                 text_color=self.color_scheme['button_text'],
                 height=30,
                 width=100,
@@ -420,8 +559,8 @@ class PCHelperApp:
                 frame,
                 text="Got it!",
                 command=reminder_window.destroy,
-                fg_color=self._adjust_color(self.color_scheme['primary'], -15),
-                hover_color=self._adjust_color(self.color_scheme['primary'], -30),
+                fg_color=self.color_scheme['primary_hover'],
+                hover_color=self.color_scheme['primary_pressed'],
                 text_color=self.color_scheme['button_text'],
                 height=40,
                 width=120,
@@ -444,107 +583,88 @@ class PCHelperApp:
 
     def change_language(self, language):
         self.current_language = language
-        self.update_ui()
-
-    def update_ui(self):
-        if self.main_title_label:
-            if USE_CUSTOM_TKINTER:
-                self.main_title_label.configure(text=TRANSLATIONS[self.current_language]['main_title'])
-            else:
-                self.main_title_label.config(text=TRANSLATIONS[self.current_language]['main_title'])
-        
-        self.root.title(TRANSLATIONS[self.current_language]['app_title'])
-
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
+        with timed('ui.language_switch'):
+            self.bindings.apply(texts=TRANSLATIONS[language])
 
+    def create_sections(self):
         self.create_section(
-            TRANSLATIONS[self.current_language]['pc_tools'],
+            'pc_tools',
             [
-                (TRANSLATIONS[self.current_language]['change_background']['title'],
-                 TRANSLATIONS[self.current_language]['change_background']['desc'],
-                 self.color_scheme['primary'], self.change_background),
-                (TRANSLATIONS[self.current_language]['empty_trash']['title'],
-                 TRANSLATIONS[self.current_language]['empty_trash']['desc'],
-                 self.color_scheme['success'], self.empty_trash),
-                (TRANSLATIONS[self.current_language]['check_internet']['title'],
-                 TRANSLATIONS[self.current_language]['check_internet']['desc'],
-                 self.color_scheme['info'], self.check_internet),
-                (TRANSLATIONS[self.current_language]['clean_files']['title'],
-                 TRANSLATIONS[self.current_language]['clean_files']['desc'],
-                 self.color_scheme['warning'], self.clean_temp_files),
-                (TRANSLATIONS[self.current_language]['toggle_system_theme']['title'],
-                 TRANSLATIONS[self.current_language]['toggle_system_theme']['desc'],
-                 self.color_scheme['secondary'], self.toggle_system_theme),
-                (TRANSLATIONS[self.current_language]['clipboard_history']['title'],
-                 TRANSLATIONS[self.current_language]['clipboard_history']['desc'],
-                 self.color_scheme['info'], self.show_clipboard_history)
+                ('change_background', 'primary', self.change_background),
+                ('empty_trash', 'success', self.empty_trash),
+                ('check_internet', 'info', self.check_internet),
+                ('clean_files', 'warning', self.clean_temp_files),
+                ('toggle_system_theme', 'secondary', self.toggle_system_theme),
+                ('clipboard_history', 'info', self.show_clipboard_history)
             ]
         )
 
         self.create_section(
-            TRANSLATIONS[self.current_language]['important_links'],
+            'important_links',
             [
-                ("▶️ YouTube", "", "#FF0000", lambda: self.open_website("https://www.youtube.com")),
-                ("📘 Facebook", "", "#4267B2", lambda: self.open_website("https://www.facebook.com")),
-                ("🐦 Twitter", "", "#1DA1F2", lambda: self.open_website("https://www.twitter.com")),
+                ("▶️ YouTube", "#FF0000", lambda: self.open_website("https://www.youtube.com")),
+                ("📘 Facebook", "#4267B2", lambda: self.open_website("https://www.facebook.com")),
+                ("🐦 Twitter", "#1DA1F2", lambda: self.open_website("https://www.twitter.com")),
             ],
             link_buttons=True
         )
 
-    def create_section(self, title, items, link_buttons=False):
+    def create_section(self, title_key, items, link_buttons=False):
         if USE_CUSTOM_TKINTER:
             section_frame = ctk.CTkFrame(
                 self.content_frame,
-                fg_color=self.color_scheme['card_bg'],
                 corner_radius=15,
                 border_width=0
             )
+            self.bindings.bind(section_frame, fg_color=self.themed('card_bg'))
         else:
             section_frame = tk.Frame(
                 self.content_frame,
-                bg=self.color_scheme['card_bg'],
                 bd=0,
                 highlightthickness=0
             )
+            self.bindings.bind(section_frame, bg=self.themed('card_bg'))
         section_frame.pack(fill='x', padx=10, pady=15, ipady=10)
         
         if USE_CUSTOM_TKINTER:
             title_frame = ctk.CTkFrame(
                 section_frame,
-                fg_color=self.color_scheme['primary'], 
                 height=40,
                 corner_radius=10
             )
+            self.bindings.bind(title_frame, fg_color=self.themed('primary'))
         else:
             title_frame = tk.Frame(
                 section_frame,
-                bg=self.color_scheme['primary'],
                 height=40
             )
+            self.bindings.bind(title_frame, bg=self.themed('primary'))
         title_frame.pack(fill='x', padx=10, pady=(10, 15))
         
         if USE_CUSTOM_TKINTER:
             title_label = ctk.CTkLabel(
                 title_frame,
-                text=title,
-                font=ctk.CTkFont(family="Arial", size=18, weight="bold"),
-                text_color=self.color_scheme['button_text']
+                font=ctk.CTkFont(family="Arial", size=18, weight="bold")
             )
+            self.bindings.bind(title_label, text=translated(title_key), text_color=self.themed('button_text'))
         else:
             title_label = tk.Label(
                 title_frame,
-                text=title,
-                font=("Arial", 18, "bold"),
-                fg=self.color_scheme['button_text'],
-                bg=self.color_scheme['primary']
+                font=("Arial", 18, "bold")
+            )
+            self.bindings.bind(
+                title_label,
+                text=translated(title_key),
+                fg=self.themed('button_text'),
+                bg=self.themed('primary')
             )
         title_label.pack(pady=8)
 
         if USE_CUSTOM_TKINTER:
             content_frame = ctk.CTkFrame(section_frame, fg_color="transparent")
         else:
-            content_frame = tk.Frame(section_frame, bg=self.color_scheme['card_bg'])
+            content_frame = tk.Frame(section_frame)
+            self.bindings.bind(content_frame, bg=self.themed('card_bg'))
         content_frame.pack(fill='x', padx=15, pady=10)
         
         rows = 3 if not link_buttons else 1
@@ -554,15 +674,15 @@ class PCHelperApp:
             content_frame.grid_columnconfigure(i, weight=1, uniform="column")
         
         if link_buttons:
-            for i, (text, _, color, command) in enumerate(items):
+            for i, (text, color, command) in enumerate(items):
                 self.create_link_button(content_frame, text, color, command, col=i, row=0)
         else:
-            for i, (text, desc, color, command) in enumerate(items):
+            for i, (key, color_name, command) in enumerate(items):
                 row = i // cols
                 col = i % cols
-                self.create_helper_button(content_frame, text, desc, color, command, col=col, row=row)
+                self.create_helper_button(content_frame, key, color_name, command, col=col, row=row)
 
-    def create_helper_button(self, parent, title, description, color, command, col, row):
+    def create_helper_button(self, parent, key, color_name, command, col, row):
         if USE_CUSTOM_TKINTER:
             button_frame = ctk.CTkFrame(parent, fg_color="transparent", corner_radius=12)
             button_frame.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
@@ -570,28 +690,29 @@ class PCHelperApp:
             button = ctk.CTkButton(
                 button_frame,
                 text="",
-                fg_color=color,
-                hover_color=self._adjust_color(color, -15),
                 corner_radius=12,
                 height=125,
-                command=lambda: self.run_in_thread(command)
+                command=command
+            )
+            self.bindings.bind(
+                button,
+                fg_color=self.themed(color_name),
+                hover_color=self.themed(f'{color_name}_hover')
             )
             button.grid(row=0, column=0, sticky="nsew")
             
             title_label = ctk.CTkLabel(
                 button,
-                text=title,
-                font=ctk.CTkFont(family="Arial", size=16, weight="bold"),
-                text_color=self.color_scheme['button_text']
+                font=ctk.CTkFont(family="Arial", size=16, weight="bold")
             )
+            self.bindings.bind(title_label, text=translated(key, 'title'), text_color=self.themed('button_text'))
             title_label.grid(row=0, column=0, pady=(20, 5), sticky="n")
             
             desc_label = ctk.CTkLabel(
                 button,
-                text=description,
-                font=ctk.CTkFont(family="Arial", size=12),
-                text_color=self.color_scheme['button_text']
+                font=ctk.CTkFont(family="Arial", size=12)
             )
+            self.bindings.bind(desc_label, text=self.describe(key), text_color=self.themed('button_text'))
             desc_label.grid(row=1, column=0, pady=(0, 15), sticky="n")
             
             button_frame.grid_rowconfigure(0, weight=1)
@@ -600,25 +721,64 @@ class PCHelperApp:
             button.grid_rowconfigure(1, weight=1)
             button.grid_columnconfigure(0, weight=1)
         else:
-            button_frame = tk.Frame(parent, bg=self.color_scheme['card_bg'])
+            button_frame = tk.Frame(parent)
+            self.bindings.bind(button_frame, bg=self.themed('card_bg'))
             button_frame.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
             
+            describe = self.describe(key)
             button = tk.Button(
                 button_frame,
-                text=f"{title}\n{description}",
-                bg=color,
-                fg=self.color_scheme['button_text'],
-                activebackground=self._adjust_color(color, -15),
-                activeforeground=self.color_scheme['button_text'],
                 relief="flat",
                 height=8,
                 width=30,
                 wraplength=180,
                 font=("Arial", 10, "bold"),
-                command=lambda: self.run_in_thread(command)
+                command=command
+            )
+            self.bindings.bind(
+                button,
+                text=lambda texts, colors: f"{texts[key]['title']}\n{describe(texts, colors)}",
+                bg=self.themed(color_name),
+                fg=self.themed('button_text'),
+                activebackground=self.themed(f'{color_name}_hover'),
+                activeforeground=self.themed('button_text')
             )
             button.pack(fill="both", expand=True)
 
+    def describe(self, key):
+        # The cleaning buttons also show how much their location currently holds
+        def description(texts, colors):
+            from pchelper.temp_cleaner import format_size
+
+            location = RECLAIMABLE_LOCATIONS.get(key)
+            if location not in self.reclaimable:
+                return texts[key]['desc']
+            files, size = self.reclaimable[location]
+            return f"{texts[key]['desc']}\n{format_size(size)} in {files} files"
+        return description
+
+    def refresh_reclaimable_space(self):
+        from pchelper.disk_index import cleanable_locations
+
+        index = self.disk_index
+
+        def store(name, usage):
+            self.reclaimable[name] = usage
+
+        def refresh():
+            for name, path in cleanable_locations().items():
+                try:
+                    self.dispatcher.post(store, name, index.refresh(path))
+                except Exception as e:
+                    print(f"Disk index error: {str(e)}")
+
+        # Not de-duplicated: a refresh asked for after a clean must see the clean's result
+        self.run_in_thread(refresh, on_done=lambda result: self.show_reclaimable_space(), name="disk-index-refresh",
+                           dedupe=False)
+
+    def show_reclaimable_space(self):
+        self.bindings.apply()
+
     def create_link_button(self, parent, title, color, command, col, row):
         if USE_CUSTOM_TKINTER:
             button = ctk.CTkButton(
@@ -626,7 +786,7 @@ class PCHelperApp:
                 text=title,
                 font=ctk.CTkFont(family="Arial", size=14, weight="bold"),
                 fg_color=color,
-                hover_color=self._adjust_color(color, -15),
+                hover_color=adjust_color(color, -15),
                 text_color="white",
                 corner_radius=20,
                 height=40,
@@ -639,7 +799,7 @@ class PCHelperApp:
                 text=title,
                 bg=color,
                 fg="white",
-                activebackground=self._adjust_color(color, -15),
+                activebackground=adjust_color(color, -15),
                 activeforeground="white",
                 relief="flat",
                 height=2,
@@ -649,19 +809,41 @@ class PCHelperApp:
             )
             button.grid(row=row, column=col, padx=10, pady=10, sticky="ew")
 
-    def _adjust_color(self, color, amount):
-        try:
-            color = color.lstrip('#')
-            rgb = tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
-            h, s, v = colorsys.rgb_to_hsv(rgb[0]/255, rgb[1]/255, rgb[2]/255)
-            v = max(0, min(1, v + amount/100))
-            r, g, b = colorsys.hsv_to_rgb(h, s, v)
-            return f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
-        except Exception:
-            return color
-
+    @instrument('ui.clipboard_history')
     def show_clipboard_history(self):
-        history = self.clipboard_manager.get_history()
+        def format_entry(i, entry):
+            if entry.kind == 'files':
+                names = [path.replace('\\', '/').rsplit('/', 1)[-1] for path in entry.content.split('\n')]
+                display_text = f"{len(names)} file(s): {', '.join(names)}"
+            else:
+                display_text = entry.content.strip()
+            if len(display_text) > 80:
+                display_text = display_text[:80] + "..."
+            if entry.seen_count > 1:
+                display_text += f"  (seen {entry.seen_count} times)"
+            if entry.kind == 'html':
+                display_text = "🌐 " + display_text
+            if entry.pinned:
+                display_text = "📌 " + display_text
+            return f"{i}. {display_text}"
+
+        from pchelper.history_search import HistorySearchSource, SearchQuery, MODE_LIVE, MODE_FUZZY, MODE_FULL_TEXT
+        from history_view import VirtualHistoryList
+
+        search_source = HistorySearchSource(self.clipboard_manager)
+
+        def toggle_pin(history_view):
+            entry = history_view.selected_entry()
+            if entry is not None and self.clipboard_manager.pin_entry(entry.id, not entry.pinned):
+                history_view.refresh()
+
+        list_colors = {
+            'bg': self.color_scheme['card_bg'],
+            'fg': self.color_scheme['text'],
+            'zebra': self.color_scheme['zebra'],
+            'select_bg': self.color_scheme['primary'],
+            'select_fg': self.color_scheme['button_text']
+        }
         
         if USE_CUSTOM_TKINTER:
             history_window = ctk.CTkToplevel(self.root)
@@ -709,27 +891,35 @@ class PCHelperApp:
             )
             search_entry.pack(side='left', padx=10, fill='x', expand=True)
 
+            fuzzy_var = tk.BooleanVar(value=False)
+            search_job = [None]
+
+            def filter_history(event=None):
+                # The full-text index ranks matches in SQLite, so only the visible pages are loaded
+                history_list.set_query(SearchQuery(search_entry.get(), MODE_FULL_TEXT))
+
+            def live_filter():
+                search_job[0] = None
+                mode = MODE_FUZZY if fuzzy_var.get() else MODE_LIVE
+                query = SearchQuery(search_entry.get(), mode)
+                if query != history_list.query:
+                    history_list.set_query(query)
 
-            def filter_history():
-                query = search_entry.get().lower()
-                history_list.delete(0, tk.END)
-                for i, item in enumerate(history, 1):
-                    if query in item.lower():
-                        display_text = item.strip()
-                        if len(display_text) > 80:
-                            display_text = display_text[:80] + "..."
-                        history_list.insert(tk.END, f"{i}. {display_text}")
-                        if i % 2 == 0:
-                            history_list.itemconfig(i-1, {'bg': self._adjust_color(self.color_scheme['card_bg'], -5)})
-                        else:
-                            history_list.itemconfig(i-1, {'bg': self.color_scheme['card_bg']})
+            def schedule_live_filter(event=None):
+                # Wait for a pause in typing before filtering
+                if search_job[0] is not None:
+                    history_window.after_cancel(search_job[0])
+                search_job[0] = history_window.after(SEARCH_DEBOUNCE_MS, live_filter)
+
+            search_entry.bind('<KeyRelease>', schedule_live_filter)
+            search_entry.bind('<Return>', filter_history)
 
             search_button = ctk.CTkButton(
                 search_frame,
                 text="Search",
                 command=filter_history,
                 fg_color=self.color_scheme['primary'],
-                hover_color=self._adjust_color(self.color_scheme['primary'], -15),
+                hover_color=self.color_scheme['primary_hover'],
                 corner_radius=8,
                 width=100,
                 height=36,
@@ -737,6 +927,17 @@ class PCHelperApp:
             )
             search_button.pack(side='right', padx=10)
 
+            fuzzy_checkbox = ctk.CTkCheckBox(
+                search_frame,
+                text="Fuzzy",
+                variable=fuzzy_var,
+                command=live_filter,
+                fg_color=self.color_scheme['primary'],
+                hover_color=self.color_scheme['primary_hover'],
+                font=ctk.CTkFont(family="Arial", size=12)
+            )
+            fuzzy_checkbox.pack(side='right', padx=5)
+
             list_frame = ctk.CTkFrame(
                 content_frame,
                 fg_color=self.color_scheme['card_bg'],
@@ -744,27 +945,15 @@ class PCHelperApp:
             )
             list_frame.pack(padx=10, pady=10, fill='both', expand=True)
 
-            if self.dark_mode:
-                list_bg = self.color_scheme['card_bg']
-                list_fg = self.color_scheme['text']
-                select_bg = self.color_scheme['primary']
-                select_fg = self.color_scheme['button_text']
-            else:
-                list_bg = self.color_scheme['card_bg']
-                list_fg = self.color_scheme['text']
-                select_bg = self.color_scheme['primary']
-                select_fg = self.color_scheme['button_text']
-
-            history_list = tk.Listbox(
+            history_list = VirtualHistoryList(
                 list_frame,
-                font=("Arial", 11),
-                bg=list_bg,
-                fg=list_fg,
-                selectbackground=select_bg,
-                selectforeground=select_fg,
-                relief="flat",
-                highlightthickness=0,
-                borderwidth=0
+                fetch=search_source.fetch,
+                count=search_source.count,
+                format_entry=format_entry,
+                colors=list_colors,
+                query=SearchQuery("", MODE_LIVE),
+                thumbnail=self.clipboard_manager.thumbnail,
+                font=("Arial", 11)
             )
             history_list.pack(side="left", padx=5, pady=5, fill='both', expand=True)
 
@@ -775,15 +964,7 @@ class PCHelperApp:
                 button_hover_color=self.color_scheme['secondary']
             )
             list_scrollbar.pack(side="right", fill="y")
-            history_list.config(yscrollcommand=list_scrollbar.set)
-
-            for i, item in enumerate(history, 1):
-                display_text = item.strip()
-                if len(display_text) > 80:
-                    display_text = display_text[:80] + "..."
-                history_list.insert(tk.END, f"{i}. {display_text}")
-                if i % 2 == 0:
-                    history_list.itemconfig(i-1, {'bg': self._adjust_color(self.color_scheme['card_bg'], -5)})
+            history_list.yscrollcommand = list_scrollbar.set
 
             preview_frame = ctk.CTkFrame(
                 content_frame,
@@ -803,14 +984,21 @@ class PCHelperApp:
 
             def on_select(event):
                 try:
-                    selection = history_list.curselection()
-                    if selection:
-                        index = selection[0]
-                        preview_label.configure(text=history[index])
+                    entry = history_list.selected_entry()
+                    if entry is not None:
+                        # Only the selected entry is rendered in full, and even then only its start
+                        preview_text = entry.content[:2000]
+                        if entry.kind != 'text':
+                            from pchelper.temp_cleaner import format_size
+
+                            preview_text += f"\n\n{entry.mime}, {format_size(entry.size)}"
+                        if entry.seen_count > 1:
+                            preview_text += f"\n\nSeen {entry.seen_count} times, last on {entry.last_seen}"
+                        preview_label.configure(text=preview_text)
                 except Exception:
                     pass
 
-            history_list.bind('<<ListboxSelect>>', on_select)
+            history_list.bind('<<HistorySelect>>', on_select)
 
             button_frame = ctk.CTkFrame(
                 content_frame,
@@ -820,10 +1008,9 @@ class PCHelperApp:
             button_frame.pack(pady=15, padx=10, fill='x')
 
             def copy_selected():
-                selection = history_list.curselection()
-                if selection:
-                    index = selection[0]
-                    pyperclip.copy(history[index])
+                entry = history_list.selected_entry()
+                if entry is not None:
+                    self.copy_entry(entry)
                     self.show_notification("Clipboard", f"Copied item to clipboard", error=False)
 
             def clear_history():
@@ -836,7 +1023,7 @@ class PCHelperApp:
                 text="Copy Selected",
                 command=copy_selected,
                 fg_color=self.color_scheme['info'],
-                hover_color=self._adjust_color(self.color_scheme['info'], -15),
+                hover_color=self.color_scheme['info_hover'],
                 corner_radius=10,
                 height=40,
                 width=150,
@@ -844,12 +1031,25 @@ class PCHelperApp:
             )
             copy_button.pack(side='left', padx=10)
 
+            pin_button = ctk.CTkButton(
+                button_frame,
+                text="Pin / Unpin",
+                command=lambda: toggle_pin(history_list),
+                fg_color=self.color_scheme['primary'],
+                hover_color=self.color_scheme['primary_hover'],
+                corner_radius=10,
+                height=40,
+                width=120,
+                font=ctk.CTkFont(family="Arial", size=13, weight="bold")
+            )
+            pin_button.pack(side='left', padx=10)
+
             clear_button = ctk.CTkButton(
                 button_frame,
                 text="Clear History",
                 command=clear_history,
                 fg_color=self.color_scheme['danger'],
-                hover_color=self._adjust_color(self.color_scheme['danger'], -15),
+                hover_color=self.color_scheme['danger_hover'],
                 corner_radius=10,
                 height=40,
                 width=150,
@@ -862,7 +1062,7 @@ class PCHelperApp:
                 text="Close",
                 command=history_window.destroy,
                 fg_color=self.color_scheme['secondary'],
-                hover_color=self._adjust_color(self.color_scheme['secondary'], -15),
+                hover_color=self.color_scheme['secondary_hover'],
                 corner_radius=10,
                 height=40,
                 width=100,
@@ -875,27 +1075,32 @@ class PCHelperApp:
             history_window.geometry("700x500")
             history_window.minsize(600, 400)
             
-            listbox = tk.Listbox(
-                history_window,
-                font=("Arial", 12),
-                selectmode=tk.SINGLE
+            list_frame = tk.Frame(history_window)
+            list_frame.pack(fill="both", expand=True, padx=10, pady=10)
+            
+            listbox = VirtualHistoryList(
+                list_frame,
+                fetch=search_source.fetch,
+                count=search_source.count,
+                format_entry=format_entry,
+                colors=list_colors,
+                query=SearchQuery("", MODE_LIVE),
+                thumbnail=self.clipboard_manager.thumbnail,
+                font=("Arial", 12)
             )
-            listbox.pack(fill="both", expand=True, padx=10, pady=10)
+            listbox.pack(side="left", fill="both", expand=True)
             
-            for i, item in enumerate(history, 1):
-                display_text = item.strip()
-                if len(display_text) > 80:
-                    display_text = display_text[:80] + "..."
-                listbox.insert(tk.END, f"{i}. {display_text}")
+            list_scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=listbox.yview)
+            list_scrollbar.pack(side="right", fill="y")
+            listbox.yscrollcommand = list_scrollbar.set
             
             button_frame = tk.Frame(history_window)
             button_frame.pack(fill="x", padx=10, pady=10)
             
             def copy_selected():
-                selection = listbox.curselection()
-                if selection:
-                    index = selection[0]
-                    pyperclip.copy(history[index])
+                entry = listbox.selected_entry()
+                if entry is not None:
+                    self.copy_entry(entry)
                     messagebox.showinfo("Clipboard", "Copied item to clipboard")
             
             copy_button = tk.Button(
@@ -908,6 +1113,16 @@ class PCHelperApp:
             )
             copy_button.pack(side="left", padx=5)
             
+            pin_button = tk.Button(
+                button_frame,
+                text="Pin / Unpin",
+                command=lambda: toggle_pin(listbox),
+                bg=self.color_scheme['primary'],
+                fg="white",
+                font=("Arial", 10, "bold")
+            )
+            pin_button.pack(side="left", padx=5)
+            
             def clear_history():
                 result = self.clipboard_manager.clear_history()
                 messagebox.showinfo("Clipboard", result)
@@ -933,21 +1148,38 @@ class PCHelperApp:
             )
             close_button.pack(side="right", padx=5)
 
+    def copy_entry(self, entry):
+        # Images, HTML and file lists go back in their own format where the platform allows it
+        import pyperclip
+        from pchelper.clipboard_formats import write_clipboard
+
+        if not write_clipboard(entry, self.clipboard_manager.blobs):
+            pyperclip.copy(entry.content)
+
     def start_clipboard_monitoring(self):
-        def monitor_clipboard():
-            while True:
-                try:
-                    clipboard_content = pyperclip.paste()
-                    if clipboard_content:
-                        self.clipboard_manager.add_to_history(clipboard_content)
-                    time.sleep(1)
-                except Exception as e:
-                    print(f"Clipboard monitoring error: {e}")
-                    break
+        # Uses native change notifications where available, otherwise an adaptive poller
+        import pyperclip
+        from pchelper.clipboard_formats import read_clipboard
+        from pchelper.clipboard_watcher import create_clipboard_watcher
+
+        self.clipboard_watcher = create_clipboard_watcher(
+            self.clipboard_manager.add_to_history,
+            paste=lambda: read_clipboard(pyperclip.paste)
+        )
+        self.clipboard_watcher.start()
+        self.scheduler.add_service(
+            f"clipboard-watcher ({self.clipboard_watcher.name})",
+            self.clipboard_watcher.stop,
+            lambda: self.clipboard_watcher.running
+        )
 
-        threading.Thread(target=monitor_clipboard, daemon=True).start()
+    def stop_clipboard_monitoring(self):
+        if hasattr(self, 'clipboard_watcher'):
+            self.clipboard_watcher.stop()
 
     def open_website(self, url):
+        import webbrowser
+
         try:
             webbrowser.open(url)
         except Exception:
@@ -959,23 +1191,50 @@ class PCHelperApp:
             filetypes=[("Image files", "*.jpg *.jpeg *.png *.bmp")]
         )
         if file_path:
-            try:
-                ctypes.windll.user32.SystemParametersInfoW(20, 0, file_path, 3)
-                self.show_notification("Success", "Your background has been changed!")
-            except Exception:
-                self.show_notification("Error", "Could not change background. Please try again.", error=True)
+            import ctypes
+
+            if self.scheduler.is_active("change-background"):
+                self.show_notification("Please wait", "This is already running.")
+                return
+
+            self.run_in_thread(
+                lambda: ctypes.windll.user32.SystemParametersInfoW(20, 0, file_path, 3),
+                on_done=lambda result: self.show_notification("Success", "Your background has been changed!"),
+                on_error=lambda error: self.show_notification(
+                    "Error", "Could not change background. Please try again.", error=True
+                ),
+                name="change-background"
+            )
 
-    def empty_trash(self):
-        try:
-            if os.name == 'nt':  # Windows
-                os.system('rd /s /q c:\\$Recycle.bin')
+    def empty_trash(self, older_than_days=None):
+        from pchelper.temp_cleaner import format_size
+        from pchelper.trash import open_trash
+
+        def empty(progress, token):
+            open_trash().empty(older_than_days=older_than_days, progress=progress, token=token)
+
+        def finished(snapshot):
+            if snapshot['files'] or snapshot['dirs']:
+                message = f"Your trash has been emptied!\n{snapshot['files']} files, {format_size(snapshot['bytes'])} freed."
             else:
-                os.system('rm -rf ~/.local/share/Trash/*')
-            self.show_notification("Success", "Your trash has been emptied!")
+                message = "Your trash is already empty."
+            if snapshot['errors']:
+                message += f"\n{snapshot['errors']} items could not be removed."
+            self.show_notification("Success", message)
+            self.refresh_reclaimable_space()
+
+        try:
+            self.run_with_progress("empty-trash", "Emptying trash...", empty, finished,
+                                   "Could not empty trash. Please try again.")
         except Exception:
             self.show_notification("Error", "Could not empty trash. Please try again.", error=True)
 
     def check_internet(self):
+        # A second click would get the running check back from the scheduler without its callbacks,
+        # leaving a "checking" popup nobody closes
+        if self.scheduler.is_active("connectivity-check"):
+            self.show_notification("Please wait", "This is already running.")
+            return
         try:
             if USE_CUSTOM_TKINTER:
                 checking_notification = ctk.CTkToplevel(self.root)
@@ -1025,100 +1284,251 @@ class PCHelperApp:
                 )
                 checking_label.pack(pady=30)
             
-            def check_connection():
-                try:
-                    socket.create_connection(("8.8.8.8", 53), timeout=3)
-                    checking_notification.destroy()
-                    self.show_notification("Success", "Your internet is working!")
-                except OSError:
-                    checking_notification.destroy()
+            from pchelper.connectivity import ConnectivityChecker
+
+            checker = ConnectivityChecker.load('connectivity.json')
+
+            def show_result(report):
+                checking_notification.destroy()
+                if report.online:
+                    latencies = [f"{result.name}: {result.latency * 1000:.0f} ms"
+                                 for result in report.results if result.latency is not None]
+                    self.show_notification("Success", "\n".join(["Your internet is working!"] + latencies[:2]))
+                else:
                     self.show_notification("No Internet", "Please check your internet connection", error=True)
-            
-            threading.Thread(target=check_connection, daemon=True).start()
+
+            def show_error(error):
+                checking_notification.destroy()
+                self.show_notification("Error", "Could not check internet connection", error=True)
+
+            self.run_in_thread(checker.check, on_done=show_result, on_error=show_error, name="connectivity-check")
             
         except Exception:
             self.show_notification("Error", "Could not check internet connection", error=True)
 
-    def clean_temp_files(self):
-        try:
-            if USE_CUSTOM_TKINTER:
-                cleaning_notification = ctk.CTkToplevel(self.root)
-                cleaning_notification.title("")
-                cleaning_notification.geometry("300x100")
-                cleaning_notification.attributes('-topmost', True)
-                cleaning_notification.overrideredirect(True)
-                
-                cleaning_notification.update_idletasks()
-                width = cleaning_notification.winfo_width()
-                height = cleaning_notification.winfo_height()
-                x = (cleaning_notification.winfo_screenwidth() // 2) - (width // 2)
-                y = (cleaning_notification.winfo_screenheight() // 2) - (height // 2)
-                cleaning_notification.geometry(f'{width}x{height}+{x}+{y}')
-                
-                cleaning_notification.configure(fg_color=self.color_scheme['warning'])
-                
-                cleaning_label = ctk.CTkLabel(
-                    cleaning_notification,
-                    text="Cleaning temporary files...",
-                    font=ctk.CTkFont(family="Arial", size=14, weight="bold"),
-                    text_color=self.color_scheme['button_text']
-                )
-                cleaning_label.pack(pady=30)
+    def clean_temp_files(self, dry_run=False):
+        from pchelper.cleaning_rules import CleaningRules
+        from pchelper.temp_cleaner import TempCleaner, format_size
+
+        status_text = "Scanning temporary files..." if dry_run else "Cleaning temporary files..."
+        index = self.disk_index
+
+        def clean_temp(progress, token):
+            TempCleaner(dry_run=dry_run, progress=progress, rules=CleaningRules.load('cleaning_rules.json'),
+                        index=index, cancel=token).run()
+
+        def finished(snapshot):
+            freed = format_size(snapshot['bytes'])
+            if dry_run:
+                message = f"{snapshot['files']} temporary files ({freed}) can be removed."
             else:
-                cleaning_notification = tk.Toplevel(self.root)
-                cleaning_notification.title("")
-                cleaning_notification.geometry("300x100")
-                cleaning_notification.attributes('-topmost', True)
-                cleaning_notification.overrideredirect(True)
-                
-                cleaning_notification.update_idletasks()
-                width = cleaning_notification.winfo_width()
-                height = cleaning_notification.winfo_height()
-                x = (cleaning_notification.winfo_screenwidth() // 2) - (width // 2)
-                y = (cleaning_notification.winfo_screenheight() // 2) - (height // 2)
-                cleaning_notification.geometry(f'{width}x{height}+{x}+{y}')
-                
-                cleaning_notification.configure(bg=self.color_scheme['warning'])
-                
-                cleaning_label = tk.Label(
-                    cleaning_notification,
-                    text="Cleaning temporary files...",
-                    font=("Arial", 12, "bold"),
-                    fg=self.color_scheme['button_text'],
-                    bg=self.color_scheme['warning']
-                )
-                cleaning_label.pack(pady=30)
+                message = f"Cleaned {snapshot['files']} temporary files, {freed} freed!"
+            if snapshot['skipped']:
+                message += f"\n{snapshot['skipped']} items kept by the cleaning rules."
+            if snapshot['errors']:
+                message += f"\n{snapshot['errors']} items could not be removed."
+            self.show_notification("Success", message)
+            self.refresh_reclaimable_space()
+
+        try:
+            self.run_with_progress("clean-temp", status_text, clean_temp, finished,
+                                   "Could not clean all files. Please try again.")
+        except Exception:
+            self.show_notification("Error", "Could not clean files. Please try again.", error=True)
+
+    def show_progress_notification(self, text):
+        if USE_CUSTOM_TKINTER:
+            notification = ctk.CTkToplevel(self.root)
+            notification.title("")
+            notification.geometry("300x100")
+            notification.attributes('-topmost', True)
+            notification.overrideredirect(True)
             
-            def clean_temp():
-                try:
-                    temp_dir = tempfile.gettempdir()
-                    files_removed = 0
-                    
-                    for item in os.listdir(temp_dir):
-                        item_path = os.path.join(temp_dir, item)
-                        try:
-                            if os.path.isfile(item_path):
-                                os.unlink(item_path)
-                                files_removed += 1
-                            elif os.path.isdir(item_path):
-                                shutil.rmtree(item_path)
-                                files_removed += 1
-                        except Exception:
-                            continue
-                    
-                    cleaning_notification.destroy()
-                    self.show_notification("Success", f"Cleaned {files_removed} temporary files!")
-                except Exception:
-                    cleaning_notification.destroy()
-                    self.show_notification("Error", "Could not clean all files. Please try again.", error=True)
+            notification.update_idletasks()
+            width = notification.winfo_width()
+            height = notification.winfo_height()
+            x = (notification.winfo_screenwidth() // 2) - (width // 2)
+            y = (notification.winfo_screenheight() // 2) - (height // 2)
+            notification.geometry(f'{width}x{height}+{x}+{y}')
             
-            threading.Thread(target=clean_temp, daemon=True).start()
+            notification.configure(fg_color=self.color_scheme['warning'])
             
-        except Exception:
-            self.show_notification("Error", "Could not clean files. Please try again.", error=True)
+            label = ctk.CTkLabel(
+                notification,
+                text=text,
+                font=ctk.CTkFont(family="Arial", size=14, weight="bold"),
+                text_color=self.color_scheme['button_text']
+            )
+            label.pack(pady=30)
+        else:
+            notification = tk.Toplevel(self.root)
+            notification.title("")
+            notification.geometry("300x100")
+            notification.attributes('-topmost', True)
+            notification.overrideredirect(True)
+            
+            notification.update_idletasks()
+            width = notification.winfo_width()
+            height = notification.winfo_height()
+            x = (notification.winfo_screenwidth() // 2) - (width // 2)
+            y = (notification.winfo_screenheight() // 2) - (height // 2)
+            notification.geometry(f'{width}x{height}+{x}+{y}')
+            
+            notification.configure(bg=self.color_scheme['warning'])
+            
+            label = tk.Label(
+                notification,
+                text=text,
+                font=("Arial", 12, "bold"),
+                fg=self.color_scheme['button_text'],
+                bg=self.color_scheme['warning']
+            )
+            label.pack(pady=30)
+        return notification, label
+
+    def run_with_progress(self, name, status_text, work, finished, error_message):
+        # work(progress, token) runs as a scheduler task and reports CleanReport snapshots; they reach
+        # the notification through the dispatcher, which keeps only the newest one between redraws
+        from pchelper.temp_cleaner import format_size
+
+        if self.scheduler.is_active(name):
+            self.show_notification("Please wait", "This is already running.")
+            return
+        notification, label = self.show_progress_notification(status_text)
+        progress_key = object()
+
+        def show_progress(snapshot):
+            if snapshot['finished'] or not notification.winfo_exists():
+                return
+            label.configure(text=f"{status_text}\n{snapshot['files']} files, {format_size(snapshot['bytes'])}")
+
+        def report_progress(snapshot):
+            self.dispatcher.post(show_progress, snapshot, key=progress_key)
+
+        def run(token):
+            report = None
+
+            def keep(snapshot):
+                nonlocal report
+                report = snapshot
+                report_progress(snapshot)
+
+            work(keep, token)
+            return report
+
+        def done(snapshot):
+            notification.destroy()
+            finished(snapshot)
+
+        def failed(error):
+            notification.destroy()
+            self.show_notification("Error", error_message, error=True)
+
+        self.run_in_thread(run, on_done=done, on_error=failed, name=name, with_token=True)
+
+    def run_in_thread(self, func, on_done=None, on_error=None, name=None, with_token=False, dedupe=True):
+        # Anything that touches widgets belongs in on_done/on_error, which run on the Tk thread
+        return self.scheduler.submit(name or func.__name__, func, on_done=on_done, on_error=on_error,
+                                     with_token=with_token, dedupe=dedupe)
+
+    def toggle_metrics(self):
+        METRICS.enabled = self.metrics_enabled.get()
+
+    def show_diagnostics(self):
+        from diagnostics_view import DiagnosticsWindow
+
+        if self.diagnostics_window is not None and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.lift()
+            return
+        self.diagnostics_window = DiagnosticsWindow(self.root, METRICS, export=self.export_metrics)
+
+    def export_metrics(self):
+        path = filedialog.asksaveasfilename(
+            title="Export timings",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom")]
+        )
+        if not path:
+            return
+        try:
+            METRICS.export(path)
+            self.show_notification("Diagnostics", "Timings exported.")
+        except OSError as e:
+            print(f"Export error: {str(e)}")
+            self.show_notification("Error", "Could not export the timings.", error=True)
+
+    def toggle_watchdog(self):
+        if self.watchdog_enabled.get():
+            from pchelper.watchdog import StallWatchdog, default_log_path
+
+            if self.watchdog is None:
+                self.watchdog = StallWatchdog(self.root.after, self.root.after_cancel, log_path=default_log_path())
+            self.watchdog.start()
+        elif self.watchdog is not None:
+            self.watchdog.stop()
+
+    def show_responsiveness(self):
+        from pchelper.watchdog import stall_location
+
+        if self.watchdog is None:
+            messagebox.showinfo("Responsiveness", "Tick Diagnostics > Watch for Stalls to measure it.")
+            return
+        summary = self.watchdog.summary()
+        if not summary['heartbeats']:
+            messagebox.showinfo("Responsiveness", "No measurements yet.")
+            return
+        lines = [
+            f"Delay over the last {summary['heartbeats']} checks:",
+            f"p50 {summary['p50'] * 1000:.0f} ms, p90 {summary['p90'] * 1000:.0f} ms, "
+            f"p99 {summary['p99'] * 1000:.0f} ms, max {summary['max'] * 1000:.0f} ms",
+            f"Stalls over {self.watchdog.threshold * 1000:.0f} ms: {summary['stalls']}",
+        ]
+        recent = self.watchdog.stalls()[-5:]
+        if recent:
+            lines.append("")
+            if self.watchdog.log_path:
+                lines.append(f"Latest stalls (full stacks in {self.watchdog.log_path}):")
+            else:
+                lines.append("Latest stalls:")
+            lines.extend(f"{stall.duration * 1000:.0f} ms: {stall_location(stall)}" for stall in reversed(recent))
+        messagebox.showinfo("Responsiveness", "\n".join(lines))
+
+    def toggle_profiler(self):
+        if self.profiling.get():
+            from pchelper.profiler import SamplingProfiler
+
+            self.profiler = SamplingProfiler().start()
+            self.show_notification("Diagnostics", "Profiling all threads. Untick Profile Threads to save.")
+            return
+        if self.profiler is None:
+            return
+        self.profiler.stop()
+        summary = self.profiler.summary()
+        path = filedialog.asksaveasfilename(
+            title="Save profile",
+            initialfile="pchelper_profile.folded",
+            defaultextension=".folded",
+            filetypes=[("Collapsed stacks", "*.folded"), ("Text", "*.txt")]
+        )
+        if not path:
+            return
+        try:
+            self.profiler.write(path)
+            self.show_notification(
+                "Diagnostics",
+                f"{summary['samples']} samples over {summary['seconds']:.0f}s saved."
+            )
+        except OSError as e:
+            print(f"Profile error: {str(e)}")
+            self.show_notification("Error", "Could not save the profile.", error=True)
 
-    def run_in_thread(self, func):
-        threading.Thread(target=func, daemon=True).start()
+    def show_running_tasks(self):
+        tasks = self.scheduler.status()
+        if not tasks:
+            messagebox.showinfo("Running Tasks", "Nothing is running in the background.")
+            return
+        lines = [f"{task.name}: {task.state}, {task.running_for:.0f}s" for task in tasks]
+        messagebox.showinfo("Running Tasks", "\n".join(lines))
 
 
 def main():
@@ -1133,8 +1543,20 @@ def main():
     
     def on_closing():
         try:
-            if hasattr(app, 'clipboard_manager'):
-                app.clipboard_manager.__del__()
+            # Lets cleaning and other tasks stop at a safe point before the stores they write to close
+            app.scheduler.shutdown(timeout=5)
+            if app.profiler is not None:
+                app.profiler.stop()
+            if app.watchdog is not None:
+                app.watchdog.stop()
+            app.stop_clipboard_monitoring()
+            # Only what was actually opened; the properties would open it just to close it
+            if app._clipboard_manager is not None:
+                app._clipboard_manager.close()
+            if app._disk_index is not None:
+                app._disk_index.close()
+            if app.network_monitor is not None:
+                app.network_monitor.close()
         except:
             pass
         root.destroy()
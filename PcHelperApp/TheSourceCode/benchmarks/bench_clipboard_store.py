@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from pchelper.clipboard_history import ClipboardHistoryManager, connect, migrate, store_content
+
+
+def prefill(db_path, rows):
+    conn = connect(db_path)
+    migrate(conn)
+    with conn:
+        for i in range(rows):
+            store_content(conn, f"prefilled clipboard entry {i} " + "x" * 40)
+    conn.close()
+
+
+def bench_size(rows, inserts, reads, searches):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'clipboard_history.db')
+        prefill(db_path, rows)
+        manager = ClipboardHistoryManager(max_entries=rows, db_path=db_path)
+
+        start = time.perf_counter()
+        for i in range(inserts):
+            manager.add_to_history(f"benchmark entry {i}")
+        manager.flush()
+        insert_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(reads):
+            history = manager.get_history()
+        read_seconds = time.perf_counter() - start
+
+        # Terms that match the prefilled rows, so every search has results to rank and return
+        start = time.perf_counter()
+        for i in range(searches):
+            manager.search_entries(f"entry {i * 7919 % max(rows, 1)}", limit=50)
+        search_seconds = time.perf_counter() - start
+
+        total = manager.count_entries()
+        start = time.perf_counter()
+        manager.clear_history()
+        clear_seconds = time.perf_counter() - start
+
+        manager.close()
+        return {
+            'rows': rows,
+            'inserts_per_second': round(inserts / insert_seconds),
+            'reads_per_second': round(reads / read_seconds, 2),
+            'rows_read_per_second': round(reads * len(history) / read_seconds),
+            'searches_per_second': round(searches / search_seconds, 2),
+            'rows_cleared_per_second': round(total / clear_seconds),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Insert, read, search and clear rates of the clipboard history store")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 10_000, 1_000_000])
+    parser.add_argument('--inserts', type=int, default=5000)
+    parser.add_argument('--reads', type=int, default=20)
+    parser.add_argument('--searches', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [bench_size(rows, args.inserts, args.reads, args.searches) for rows in args.sizes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'rows':>10}{'inserts/s':>12}{'reads/s':>10}{'rows read/s':>14}{'searches/s':>12}{'cleared/s':>12}")
+    for r in results:
+        print(f"{r['rows']:>10}{r['inserts_per_second']:>12}{r['reads_per_second']:>10}{r['rows_read_per_second']:>14}"
+              f"{r['searches_per_second']:>12}{r['rows_cleared_per_second']:>12}")
+
+
+if __name__ == "__main__":
+    main()
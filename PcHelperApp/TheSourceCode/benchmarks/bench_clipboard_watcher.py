@@ -0,0 +1,95 @@
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from pchelper.clipboard_watcher import BACKENDS, NATIVE_BACKENDS
+
+
+class MemoryClipboard:
+    def __init__(self):
+        self.content = ""
+
+    def copy(self, text):
+        self.content = text
+
+    def paste(self):
+        return self.content
+
+
+def make_driver(backend_name, on_change):
+    # Returns (watcher, copy) where copy() puts text on the clipboard the watcher observes
+    backend = BACKENDS[backend_name]
+    if backend_name == 'fake':
+        watcher = backend(on_change)
+        return watcher, watcher.copy
+    if backend_name == 'poll':
+        clipboard = MemoryClipboard()
+        watcher = backend(on_change, paste=clipboard.paste, change_counter=lambda: None)
+        return watcher, clipboard.copy
+    import pyperclip
+    return backend(on_change, paste=pyperclip.paste), pyperclip.copy
+
+
+def bench_backend(backend_name, idle_seconds, samples):
+    received = {}
+    arrived = threading.Event()
+
+    def on_change(content):
+        received[content] = time.perf_counter()
+        arrived.set()
+
+    watcher, copy = make_driver(backend_name, on_change)
+    watcher.start()
+    time.sleep(0.2)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    time.sleep(idle_seconds)
+    idle_cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start) * 100
+
+    latencies = []
+    for i in range(samples):
+        text = f"pchelper-bench-{backend_name}-{i}-{time.time()}"
+        arrived.clear()
+        sent = time.perf_counter()
+        copy(text)
+        if arrived.wait(5) and text in received:
+            latencies.append((received[text] - sent) * 1000)
+        # Alternate short and long gaps so the poller is measured both warm and backed off
+        time.sleep(0.05 if i % 2 else 1.0)
+
+    watcher.stop()
+    return {
+        'backend': backend_name,
+        'idle_cpu_percent': round(idle_cpu, 3),
+        'captured': len(latencies),
+        'samples': samples,
+        'latency_ms_median': round(statistics.median(latencies), 3) if latencies else None,
+        'latency_ms_max': round(max(latencies), 3) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Idle CPU and capture latency of clipboard watcher backends")
+    parser.add_argument('--idle', type=float, default=5.0, help="seconds to measure idle CPU")
+    parser.add_argument('--samples', type=int, default=10, help="clipboard changes per backend")
+    parser.add_argument('--backend', action='append', help="backend to run (default: all available)")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    names = args.backend or ['fake', 'poll'] + [n for n in NATIVE_BACKENDS if BACKENDS[n].is_available()]
+    results = [bench_backend(name, args.idle, args.samples) for name in names]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'backend':<10}{'idle cpu %':>12}{'captured':>10}{'median ms':>12}{'max ms':>10}")
+    for r in results:
+        print(f"{r['backend']:<10}{r['idle_cpu_percent']:>12}{r['captured']:>7}/{r['samples']:<2}"
+              f"{str(r['latency_ms_median']):>12}{str(r['latency_ms_max']):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(module, runs):
+    # Cumulative microseconds for `module` as reported by -X importtime, plus the slowest imports of the last run
+    totals = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                cwd=SOURCE_DIR, capture_output=True, text=True, check=True)
+        rows = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        totals.append(next(cumulative for name, _, cumulative in rows if name == module))
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:10]
+    return statistics.median(totals), slowest
+
+
+def first_paint(runs):
+    # Wall time from launching a fresh interpreter until the main window is drawn, and until the
+    # clipboard store, watcher and disk index have started behind it
+    paints = []
+    readies = []
+    env = dict(os.environ, PYTHONPATH=SOURCE_DIR)
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            started = time.perf_counter()
+            child = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_startup', '--child'],
+                                     cwd=tmp, env=env, stdout=subprocess.PIPE, text=True)
+            marks = {}
+            for line in child.stdout:
+                marks[line.strip()] = time.perf_counter() - started
+            child.wait(timeout=30)
+            if 'painted' not in marks or 'ready' not in marks:
+                raise RuntimeError("The app did not start; is a display available?")
+            paints.append(marks['painted'] * 1000)
+            readies.append(marks['ready'] * 1000)
+    return statistics.median(paints), statistics.median(readies)
+
+
+def child():
+    import tkinter as tk
+
+    from PcHelperApp import PCHelperApp, USE_CUSTOM_TKINTER
+
+    class BenchApp(PCHelperApp):
+        # The reminder is a modal dialog without customtkinter, which would stall the run
+        def show_email_reminder(self):
+            pass
+
+    if USE_CUSTOM_TKINTER:
+        import customtkinter as ctk
+
+        root = ctk.CTk()
+    else:
+        root = tk.Tk()
+    app = BenchApp(root)
+
+    def painted(event):
+        app.main_frame.unbind('<Expose>')
+        print('painted', flush=True)
+        root.after(10, wait_until_ready)
+
+    def wait_until_ready():
+        if not app.started:
+            root.after(10, wait_until_ready)
+            return
+        print('ready', flush=True)
+        app.scheduler.shutdown(timeout=5)
+        app.stop_clipboard_monitoring()
+        app.clipboard_manager.close()
+        app.disk_index.close()
+        root.destroy()
+
+    app.main_frame.bind('<Expose>', painted)
+    root.mainloop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Import time and time to first paint of the app. The paint part needs a display; "
+                    "run it under xvfb-run on a headless host"
+    )
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--imports-only', action='store_true', help="skip starting the app")
+    parser.add_argument('--max-import-ms', type=float, help="fail if importing the app takes longer")
+    parser.add_argument('--max-paint-ms', type=float, help="fail if the first paint takes longer")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    import_us, slowest = import_time('PcHelperApp', args.runs)
+    result = {'import_ms': round(import_us / 1000, 1), 'slowest_imports': slowest}
+    if not args.imports_only:
+        paint_ms, ready_ms = first_paint(args.runs)
+        result.update(first_paint_ms=round(paint_ms, 1), services_ready_ms=round(ready_ms, 1))
+
+    failures = []
+    if args.max_import_ms is not None and result['import_ms'] > args.max_import_ms:
+        failures.append(f"import took {result['import_ms']} ms, limit {args.max_import_ms} ms")
+    if args.max_paint_ms is not None and result.get('first_paint_ms', 0) > args.max_paint_ms:
+        failures.append(f"first paint took {result['first_paint_ms']} ms, limit {args.max_paint_ms} ms")
+
+    if args.json:
+        print(json.dumps(dict(result, failures=failures), indent=2))
+    else:
+        print(f"import PcHelperApp: {result['import_ms']} ms")
+        if 'first_paint_ms' in result:
+            print(f"first paint:        {result['first_paint_ms']} ms")
+            print(f"services ready:     {result['services_ready_ms']} ms")
+        print(f"{'slowest imports':<40}{'self ms':>9}{'total ms':>10}")
+        for name, self_us, cumulative_us in slowest:
+            print(f"{name:<40}{self_us / 1000:>9.1f}{cumulative_us / 1000:>10.1f}")
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from pchelper.cleaning_rules import CleaningRules
+from pchelper.disk_index import DiskUsageIndex
+from pchelper.temp_cleaner import TempCleaner
+
+FILES_PER_DIR = 500
+DIRS_PER_DIR = 20
+
+
+def build_tree(root, files):
+    # Two levels of folders with FILES_PER_DIR small files each, like a temp folder full of app caches
+    made = 0
+    top = 0
+    while made < files:
+        for sub in range(DIRS_PER_DIR):
+            if made >= files:
+                break
+            directory = os.path.join(root, f"app{top}", f"cache{sub}")
+            os.makedirs(directory)
+            for i in range(min(FILES_PER_DIR, files - made)):
+                with open(os.path.join(directory, f"f{i}.tmp"), 'wb') as f:
+                    f.write(b'x' * 64)
+            made += FILES_PER_DIR
+        top += 1
+
+
+def timed_run(root, dry_run, index=None, workers=4):
+    # No age or in-use checks: every file matches, so the numbers are the cleaner's own cost
+    rules = CleaningRules(min_age_hours=0, skip_in_use=False)
+    start = time.perf_counter()
+    report = TempCleaner(root=root, workers=workers, dry_run=dry_run, rules=rules, index=index).run()
+    return report, time.perf_counter() - start
+
+
+def bench_size(files, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, 'tree')
+        build_tree(root, files)
+
+        report, scan_seconds = timed_run(root, dry_run=True)
+
+        index = DiskUsageIndex(os.path.join(tmp, 'disk_index.db'), watch=False)
+        _, indexed_cold_seconds = timed_run(root, dry_run=True, index=index)
+        _, indexed_warm_seconds = timed_run(root, dry_run=True, index=index)
+        index.close()
+
+        cleaned, clean_seconds = timed_run(root, dry_run=False, workers=workers)
+
+        return {
+            'files': files,
+            'scan_files_per_second': round(report.files / scan_seconds),
+            'indexed_cold_files_per_second': round(report.files / indexed_cold_seconds),
+            'indexed_warm_files_per_second': round(report.files / indexed_warm_seconds),
+            'clean_files_per_second': round(cleaned.files / clean_seconds),
+            'errors': cleaned.errors,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan and delete rates of the temp cleaner over synthetic trees")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [bench_size(files, args.workers) for files in args.sizes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'files':>10}{'scan/s':>10}{'index cold/s':>14}{'index warm/s':>14}{'clean/s':>10}{'errors':>8}")
+    for r in results:
+        print(f"{r['files']:>10}{r['scan_files_per_second']:>10}{r['indexed_cold_files_per_second']:>14}"
+              f"{r['indexed_warm_files_per_second']:>14}{r['clean_files_per_second']:>10}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import itertools
+import json
+import random
+import time
+
+from PcHelperApp import COLORS
+from pchelper.themes import adjust_color, compile_themes
+
+
+def rate(func, seconds=0.5):
+    # Calls per second of func over about `seconds`
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return round(calls / elapsed)
+
+
+def random_themes(count, seed=7):
+    rng = random.Random(seed)
+    names = list(COLORS['light'])
+    return {
+        f"custom{i}": dict({'mode': rng.choice(('light', 'dark'))},
+                           **{name: f"#{rng.randrange(1 << 24):06x}" for name in names})
+        for i in range(count)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Colour adjustment and theme compilation rates")
+    parser.add_argument('--custom-themes', type=int, default=100, help="size of the custom theme batch")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    colors = [f"#{random.Random(i).randrange(1 << 24):06x}" for i in range(1000)]
+    uncached = adjust_color.__wrapped__
+    cycle = itertools.count()
+    custom = random_themes(args.custom_themes)
+    compiled = compile_themes(COLORS, COLORS)
+
+    results = {
+        'adjust_uncached_per_second': rate(lambda: uncached(colors[next(cycle) % 1000], -15)),
+        'adjust_cached_per_second': rate(lambda: adjust_color(colors[next(cycle) % 1000], -15)),
+        'palette_lookups_per_second': rate(lambda: compiled['dark']['primary_hover']),
+        'builtin_themes_per_second': rate(lambda: compile_themes(COLORS, COLORS)),
+        'custom_batch_per_second': rate(lambda: compile_themes(custom, COLORS)),
+        'custom_themes': args.custom_themes,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, value in results.items():
+        print(f"{name:<30}{value:>12}")
+
+
+if __name__ == "__main__":
+    main()
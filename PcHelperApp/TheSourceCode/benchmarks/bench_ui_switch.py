@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tkinter as tk
+
+from PcHelperApp import TRANSLATIONS, PCHelperApp
+from ui_bindings import WidgetBindings
+
+
+class BenchApp(PCHelperApp):
+    # The switch paths only; no reminder popup and no clipboard watcher
+    def show_email_reminder(self):
+        pass
+
+    def start_clipboard_monitoring(self):
+        pass
+
+
+def rebuild_theme(app):
+    # What a switch cost before the retained widget tree: the window destroyed and built again
+    app.dark_mode = not app.dark_mode
+    app.current_theme = 'dark' if app.dark_mode else 'light'
+    app.color_scheme = app.palettes[app.current_theme]
+    app.main_frame.destroy()
+    app.bindings = WidgetBindings(TRANSLATIONS[app.current_language], app.color_scheme)
+    app.setup_ui()
+
+
+def rebuild_language(app):
+    app.current_language = 'arabic' if app.current_language == 'english' else 'english'
+    app.main_frame.destroy()
+    app.bindings = WidgetBindings(TRANSLATIONS[app.current_language], app.color_scheme)
+    app.setup_ui()
+
+
+def retained_language(app):
+    app.change_language('arabic' if app.current_language == 'english' else 'english')
+
+
+def time_switches(root, app, switch, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        switch(app)
+        # Includes the redraw, which is where the flicker of a rebuild comes from
+        root.update()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'median_ms': round(statistics.median(timings), 2),
+        'p90_ms': round(timings[int(len(timings) * 0.9) - 1], 2),
+        'max_ms': round(timings[-1], 2),
+        'widgets': len(app.bindings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latency of theme and language switches, rebuilt versus retained. "
+                    "Needs a display; run it under xvfb-run on a headless host"
+    )
+    parser.add_argument('--switches', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    cases = [
+        ('theme', 'rebuild', rebuild_theme),
+        ('theme', 'retained', PCHelperApp.toggle_app_theme),
+        ('language', 'rebuild', rebuild_language),
+        ('language', 'retained', retained_language),
+    ]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app opens its databases in the working directory
+        os.chdir(tmp)
+        root = tk.Tk()
+        app = BenchApp(root)
+        root.update()
+        for switch, mode, action in cases:
+            result = time_switches(root, app, action, args.switches)
+            results.append(dict(switch=switch, mode=mode, **result))
+        app.scheduler.shutdown(timeout=5)
+        app.disk_index.close()
+        app.clipboard_manager.close()
+        root.destroy()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'switch':>10}{'mode':>10}{'median ms':>11}{'p90 ms':>9}{'max ms':>9}{'widgets':>9}")
+    for r in results:
+        print(f"{r['switch']:>10}{r['mode']:>10}{r['median_ms']:>11}{r['p90_ms']:>9}{r['max_ms']:>9}{r['widgets']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name, arguments for the default run, arguments added by --full, needs a display
+BENCHMARKS = [
+    ('clipboard_store', ['--sizes', '1000', '10000', '100000', '--inserts', '2000'],
+     ['--sizes', '1000', '10000', '100000', '1000000'], False),
+    ('temp_cleaner', ['--sizes', '10000', '100000'], ['--sizes', '10000', '100000', '1000000'], False),
+    ('themes', [], [], False),
+    ('clipboard_watcher', ['--backend', 'fake', '--backend', 'poll', '--idle', '2'], [], False),
+    ('startup', ['--imports-only'], [], False),
+    ('ui_switch', [], [], True),
+]
+
+# Fields that tell the cases of one benchmark apart
+LABEL_KEYS = ('rows', 'files', 'backend', 'switch', 'mode')
+
+# Changes smaller than this many ms or percentage points are noise, whatever their ratio
+ABSOLUTE_TOLERANCE = 1.0
+
+
+def direction(key):
+    # +1 when bigger is better, -1 when smaller is better, 0 for fields that describe the case
+    if 'per_second' in key:
+        return 1
+    if '_ms' in key or key.endswith(('_seconds', '_percent')):
+        return -1
+    return 0
+
+
+def flatten(result, prefix=''):
+    # Yields (path, value) for every metric; list items are named after their LABEL_KEYS
+    if isinstance(result, dict):
+        for key, value in result.items():
+            if isinstance(value, (dict, list)):
+                yield from flatten(value, f"{prefix}{key}/")
+            elif direction(key) and isinstance(value, (int, float)):
+                yield f"{prefix}{key}", value
+    elif isinstance(result, list):
+        for item in result:
+            if not isinstance(item, dict):
+                continue
+            label = ','.join(f"{key}={item[key]}" for key in LABEL_KEYS if key in item)
+            yield from flatten(item, f"{prefix}{label}/")
+
+
+def command_for(name, needs_display):
+    command = [sys.executable, '-m', f'benchmarks.bench_{name}', '--json']
+    if needs_display and not os.environ.get('DISPLAY') and os.name != 'nt':
+        if shutil.which('xvfb-run') is None:
+            return None
+        command = ['xvfb-run', '-a'] + command
+    return command
+
+
+def run_benchmark(name, args, needs_display):
+    command = command_for(name, needs_display)
+    if command is None:
+        return {'skipped': "needs a display and xvfb-run is not installed"}
+    print(f"running {name}...", file=sys.stderr, flush=True)
+    result = subprocess.run(command + args, cwd=SOURCE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'failed': result.stderr.strip().splitlines()[-1:] or [f"exit status {result.returncode}"]}
+    return {'results': json.loads(result.stdout)}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SOURCE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(only=None, full=False):
+    benchmarks = {}
+    for name, args, full_args, needs_display in BENCHMARKS:
+        if only and name not in only:
+            continue
+        # A later --sizes replaces the earlier one, so the --full arguments repeat the smaller sizes
+        benchmarks[name] = run_benchmark(name, args + (full_args if full else []), needs_display)
+    return {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'full': full,
+        },
+        'benchmarks': benchmarks,
+    }
+
+
+def compare(baseline, current, threshold):
+    # Returns rows of (metric, baseline, current, change, regressed) for metrics present in both runs
+    rows = []
+    for name, entry in current['benchmarks'].items():
+        before = dict(flatten(baseline['benchmarks'].get(name, {}).get('results', [])))
+        for path, value in flatten(entry.get('results', [])):
+            if path not in before or not before[path]:
+                continue
+            old = before[path]
+            change = (value - old) / old
+            sign = direction(path.rsplit('/', 1)[-1])
+            regressed = sign * change < -threshold
+            if sign < 0 and abs(value - old) < ABSOLUTE_TOLERANCE:
+                regressed = False
+            rows.append((f"{name}/{path}", old, value, change, regressed))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    width = max((len(row[0]) for row in rows), default=10)
+    print(f"{'metric':<{width}}{'baseline':>14}{'current':>14}{'change':>10}")
+    for metric, old, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{metric:<{width}}{old:>14}{new:>14}{change:>+10.1%}{flag}")
+    regressions = sum(1 for row in rows if row[4])
+    print(f"{len(rows)} metrics compared, {regressions} regressed by more than {threshold:.0%}")
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every benchmark and compare the results with a baseline")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run the suite and save the results as JSON")
+    run.add_argument('--output', default='benchmark_results.json')
+    run.add_argument('--only', nargs='+', choices=[name for name, _, _, _ in BENCHMARKS])
+    run.add_argument('--full', action='store_true', help="include the million-row and million-file cases")
+    run.add_argument('--baseline', help="compare with this results file afterwards")
+    run.add_argument('--threshold', type=float, default=0.15, help="relative change that counts as a regression")
+
+    check = commands.add_parser('compare', help="compare two results files")
+    check.add_argument('baseline')
+    check.add_argument('current')
+    check.add_argument('--threshold', type=float, default=0.15, help="relative change that counts as a regression")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        current = run_suite(args.only, args.full)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        for name, entry in current['benchmarks'].items():
+            if 'results' not in entry:
+                print(f"{name}: {entry.get('skipped') or entry.get('failed')}", file=sys.stderr)
+        print(f"Results saved to {args.output}", file=sys.stderr)
+        if not args.baseline:
+            return
+        baseline = load(args.baseline)
+    else:
+        baseline = load(args.baseline)
+        current = load(args.current)
+
+    rows = compare(baseline, current, args.threshold)
+    print_comparison(rows, args.threshold)
+    if any(row[4] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
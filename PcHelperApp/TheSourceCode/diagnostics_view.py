@@ -0,0 +1,77 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+
+REFRESH_INTERVAL = 1000
+
+COLUMNS = (
+    ('count', "Count", 70),
+    ('mean', "Mean ms", 80),
+    ('p50', "p50 ms", 80),
+    ('p90', "p90 ms", 80),
+    ('p99', "p99 ms", 80),
+    ('max', "Max ms", 80),
+)
+
+
+def format_ms(seconds):
+    return "" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+class DiagnosticsWindow(tk.Toplevel):
+    # Table of every timed action and counter in a Metrics registry, redrawn once a second while open
+
+    def __init__(self, master, metrics, export=None):
+        super().__init__(master)
+        self.metrics = metrics
+        self.title("Diagnostics")
+        self.geometry("640x420")
+
+        self.status = tk.Label(self, anchor='w')
+        self.status.pack(fill='x', padx=10, pady=(10, 0))
+
+        self.table = ttk.Treeview(self, columns=[name for name, _, _ in COLUMNS])
+        self.table.heading('#0', text="Action")
+        self.table.column('#0', width=200)
+        for name, heading, width in COLUMNS:
+            self.table.heading(name, text=heading)
+            self.table.column(name, width=width, anchor='e')
+        self.table.pack(fill='both', expand=True, padx=10, pady=10)
+
+        buttons = tk.Frame(self)
+        buttons.pack(fill='x', padx=10, pady=(0, 10))
+        tk.Button(buttons, text="Reset", command=self.reset).pack(side='left')
+        if export is not None:
+            tk.Button(buttons, text="Export...", command=export).pack(side='left', padx=5)
+        tk.Button(buttons, text="Close", command=self.destroy).pack(side='right')
+
+        self._job = None
+        self.bind('<Destroy>', self._on_destroy)
+        self.refresh()
+
+    def refresh(self):
+        snapshot = self.metrics.snapshot()
+        since = time.strftime('%H:%M:%S', time.localtime(snapshot['started_at']))
+        state = "recording" if self.metrics.enabled else "off (Diagnostics > Record Timings)"
+        self.status.configure(text=f"Timings {state}, collected since {since}")
+
+        self.table.delete(*self.table.get_children())
+        for name, summary in snapshot['timings'].items():
+            self.table.insert('', 'end', text=name, values=[
+                summary['count'], format_ms(summary['mean']), format_ms(summary['p50']),
+                format_ms(summary['p90']), format_ms(summary['p99']), format_ms(summary['max']),
+            ])
+        for name, value in snapshot['counters'].items():
+            self.table.insert('', 'end', text=name, values=[value])
+        self._job = self.after(REFRESH_INTERVAL, self.refresh)
+
+    def reset(self):
+        self.metrics.reset()
+        if self._job is not None:
+            self.after_cancel(self._job)
+        self.refresh()
+
+    def _on_destroy(self, event):
+        if event.widget is self and self._job is not None:
+            self.after_cancel(self._job)
+            self._job = None
@@ -0,0 +1,259 @@
+import base64
+import collections
+import queue
+import threading
+import tkinter as tk
+
+PAGE_SIZE = 100
+MAX_CACHED_PAGES = 20
+POLL_INTERVAL = 25
+THUMBNAIL_WIDTH = 48
+MAX_THUMBNAILS = 200
+
+
+class VirtualHistoryList(tk.Frame):
+    # Only the rows that fit in the window are drawn; rows are fetched page by page as they scroll into view
+
+    def __init__(self, master, fetch, count, format_entry, colors, font=("Arial", 11), row_height=26,
+                 yscrollcommand=None, query="", thumbnail=None):
+        super().__init__(master, bg=colors['bg'], bd=0, highlightthickness=0)
+        self.fetch = fetch
+        self.count = count
+        # thumbnail(entry) -> image bytes or None, called on the fetch thread for image rows as they show up
+        self.thumbnail = thumbnail
+        self.format_entry = format_entry
+        self.colors = colors
+        self.font = font
+        self.row_height = row_height
+        self.yscrollcommand = yscrollcommand
+
+        self.query = query
+        self.total = 0
+        self.first_row = 0.0
+        self.selected = None
+        self.generation = 0
+        self._pages = collections.OrderedDict()
+        self._labels = {}
+        self._requested = set()
+        self._thumbnails = collections.OrderedDict()
+        self._thumbnails_requested = set()
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._outstanding = 0
+        self._poll_job = None
+
+        self.canvas = tk.Canvas(self, bg=colors['bg'], highlightthickness=0, borderwidth=0, takefocus=1)
+        self.canvas.pack(fill='both', expand=True)
+        self.canvas.bind('<Configure>', lambda event: self._redraw())
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<Up>', lambda event: self._move_selection(-1))
+        self.canvas.bind('<Down>', lambda event: self._move_selection(1))
+        self.canvas.bind('<MouseWheel>', lambda event: self.yview('scroll', -int(event.delta / 120) * 3, 'units'))
+        self.canvas.bind('<Button-4>', lambda event: self.yview('scroll', -3, 'units'))
+        self.canvas.bind('<Button-5>', lambda event: self.yview('scroll', 3, 'units'))
+        self.bind('<Destroy>', self._on_destroy)
+
+        threading.Thread(target=self._fetch_worker, name="history-view-fetch", daemon=True).start()
+        self.refresh()
+
+    def set_query(self, query):
+        self.query = query
+        self.first_row = 0.0
+        self.selected = None
+        self.refresh()
+
+    def refresh(self):
+        # Bumping the generation drops every queued or in-flight fetch made for the old results
+        self.generation += 1
+        self._pages.clear()
+        self._labels.clear()
+        self._requested.clear()
+        self._enqueue('count', None)
+        self._redraw()
+
+    def selected_entry(self):
+        if self.selected is None:
+            return None
+        return self._entry_at(self.selected)
+
+    def yview(self, *args):
+        visible = self._visible_rows()
+        if args and args[0] == 'moveto':
+            self.first_row = float(args[1]) * self.total
+        elif args and args[0] == 'scroll':
+            amount = int(args[1])
+            self.first_row += amount * (max(1, visible - 1) if args[2] == 'pages' else 1)
+        self.first_row = max(0.0, min(self.first_row, max(0, self.total - visible)))
+        self._redraw()
+
+    def _visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.row_height)
+
+    def _entry_at(self, row):
+        page = self._pages.get(row // PAGE_SIZE)
+        if page is None or row % PAGE_SIZE >= len(page):
+            return None
+        return page[row % PAGE_SIZE]
+
+    def _label_at(self, row):
+        label = self._labels.get(row)
+        if label is None:
+            entry = self._entry_at(row)
+            if entry is None:
+                return "Loading..."
+            label = self._labels[row] = self.format_entry(row + 1, entry)
+        return label
+
+    def _request_page(self, page):
+        if page not in self._pages and page not in self._requested:
+            self._requested.add(page)
+            self._enqueue('page', page)
+
+    def _enqueue(self, kind, page):
+        self._outstanding += 1
+        self._requests.put((kind, self.generation, self.query, page))
+        if self._poll_job is None:
+            self._poll_job = self.after(POLL_INTERVAL, self._poll_results)
+
+    def _redraw(self):
+        canvas = self.canvas
+        canvas.delete('all')
+        width = canvas.winfo_width()
+        first = int(self.first_row)
+        offset = (self.first_row - first) * self.row_height
+        last = min(self.total, first + self._visible_rows() + 1)
+
+        for page in range(first // PAGE_SIZE, (last - 1) // PAGE_SIZE + 1):
+            if page in self._pages:
+                self._pages.move_to_end(page)
+            else:
+                self._request_page(page)
+
+        for row in range(first, last):
+            top = (row - first) * self.row_height - offset
+            if row == self.selected:
+                bg, fg = self.colors['select_bg'], self.colors['select_fg']
+            else:
+                bg = self.colors['zebra'] if row % 2 else self.colors['bg']
+                fg = self.colors['fg']
+            canvas.create_rectangle(0, top, width, top + self.row_height, fill=bg, width=0)
+            text_x = 8
+            entry = self._entry_at(row)
+            if self.thumbnail is not None and entry is not None and getattr(entry, 'kind', None) == 'image':
+                image = self._thumbnail_for(entry)
+                if image is not None:
+                    canvas.create_image(8, top + self.row_height / 2, image=image, anchor='w')
+                text_x += THUMBNAIL_WIDTH + 6
+            canvas.create_text(text_x, top + self.row_height / 2, text=self._label_at(row), anchor='w',
+                               fill=fg, font=self.font)
+
+        if self.yscrollcommand is not None:
+            if self.total:
+                self.yscrollcommand(first / self.total, min(1.0, (first + self._visible_rows()) / self.total))
+            else:
+                self.yscrollcommand(0.0, 1.0)
+
+    def _thumbnail_for(self, entry):
+        # Thumbnails are keyed by entry id and survive refreshes; an entry's content never changes
+        if entry.id in self._thumbnails:
+            self._thumbnails.move_to_end(entry.id)
+            return self._thumbnails[entry.id]
+        if entry.id not in self._thumbnails_requested:
+            self._thumbnails_requested.add(entry.id)
+            self._enqueue('thumbnail', entry)
+        return None
+
+    def _store_thumbnail(self, entry, data):
+        image = None
+        if data:
+            try:
+                image = tk.PhotoImage(master=self, data=base64.b64encode(data))
+                # Without Pillow the full image arrives and Tk shrinks it by a whole factor
+                factor = max(-(-image.width() // THUMBNAIL_WIDTH), -(-image.height() // (self.row_height - 2)))
+                if factor > 1:
+                    image = image.subsample(factor)
+            except tk.TclError:
+                image = None
+        self._thumbnails[entry.id] = image
+        while len(self._thumbnails) > MAX_THUMBNAILS:
+            self._thumbnails.popitem(last=False)
+        return image is not None
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        row = int(self.first_row + event.y / self.row_height)
+        if row < self.total:
+            self._select(row)
+
+    def _move_selection(self, step):
+        if self.total:
+            row = 0 if self.selected is None else self.selected + step
+            self._select(max(0, min(self.total - 1, row)))
+
+    def _select(self, row):
+        self.selected = row
+        visible = self._visible_rows()
+        if row < self.first_row:
+            self.first_row = float(row)
+        elif row >= self.first_row + visible:
+            self.first_row = float(row - visible + 1)
+        self._redraw()
+        self.event_generate('<<HistorySelect>>')
+
+    def _fetch_worker(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+            kind, generation, query, page = request
+            result = None
+            # Requests made for an older query are answered empty instead of hitting the database
+            if generation == self.generation:
+                try:
+                    if kind == 'count':
+                        result = self.count(query)
+                    elif kind == 'thumbnail':
+                        result = self.thumbnail(page)
+                    else:
+                        result = self.fetch(query, page * PAGE_SIZE, PAGE_SIZE)
+                except Exception as e:
+                    print(f"Clipboard history error: {e}")
+            self._results.put((kind, generation, page, result))
+
+    def _poll_results(self):
+        changed = False
+        while True:
+            try:
+                kind, generation, page, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._outstanding -= 1
+            if kind == 'thumbnail':
+                self._thumbnails_requested.discard(page.id)
+                # One from before a refresh is asked for again when its row is drawn
+                if generation == self.generation:
+                    changed = self._store_thumbnail(page, result) or changed
+                continue
+            if generation != self.generation or result is None:
+                continue
+            changed = True
+            if kind == 'count':
+                self.total = result
+            else:
+                self._pages[page] = result
+                self._requested.discard(page)
+                while len(self._pages) > MAX_CACHED_PAGES:
+                    evicted, rows = self._pages.popitem(last=False)
+                    for row in range(evicted * PAGE_SIZE, evicted * PAGE_SIZE + len(rows)):
+                        self._labels.pop(row, None)
+        if changed:
+            self._redraw()
+        self._poll_job = self.after(POLL_INTERVAL, self._poll_results) if self._outstanding else None
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.generation += 1
+            self._requests.put(None)
+            if self._poll_job is not None:
+                self.after_cancel(self._poll_job)
+                self._poll_job = None
@@ -0,0 +1,5 @@
+import sys
+
+from pchelper.cli import main
+
+sys.exit(main())
@@ -0,0 +1,117 @@
+import contextlib
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+
+# Blobs at least this large are read through a memory map instead of being copied into memory
+MMAP_THRESHOLD = 256 * 1024
+# Without Pillow, Tk scales PNG and GIF images itself; larger ones would stall the window
+RAW_THUMBNAIL_LIMIT = 1024 * 1024
+RAW_THUMBNAIL_TYPES = ('image/png', 'image/gif')
+THUMBNAIL_SIZE = (48, 24)
+THUMBNAIL_DIR = 'thumbs'
+
+
+def _pillow():
+    # Imported on first use; Pillow is optional and slow to import
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp)
+        raise
+
+
+class BlobStore:
+    # Files named by the SHA-256 of their content under root/ab/cdef..., so a payload copied twice is
+    # stored once. Writes go through a temporary file and a rename, so a reader never sees half a blob.
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def put(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+        return digest
+
+    @contextlib.contextmanager
+    def open(self, digest):
+        # Yields bytes, or for large blobs a read-only mmap that is only valid inside the with block
+        with open(self.path(digest), 'rb') as f:
+            if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+                yield f.read()
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                yield view
+
+    def read(self, digest):
+        with self.open(digest) as data:
+            return bytes(data)
+
+    def thumbnail(self, digest, mime, size=THUMBNAIL_SIZE):
+        # PNG bytes no larger than size, made once and kept next to the blobs; the original image when
+        # Pillow is missing and Tk can scale it; None when neither works
+        cached = os.path.join(self.root, THUMBNAIL_DIR, f"{digest}-{size[0]}x{size[1]}.png")
+        try:
+            with open(cached, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+
+        image_module = _pillow()
+        if image_module is None:
+            if mime in RAW_THUMBNAIL_TYPES and os.path.getsize(self.path(digest)) <= RAW_THUMBNAIL_LIMIT:
+                return self.read(digest)
+            return None
+        with image_module.open(self.path(digest)) as image:
+            image.thumbnail(size)
+            buffer = io.BytesIO()
+            image.save(buffer, 'PNG')
+        data = buffer.getvalue()
+        _write_atomic(cached, data)
+        return data
+
+    def sweep(self, keep):
+        # Removes every blob not in keep, their thumbnails and leftovers of interrupted writes
+        removed = 0
+        if not os.path.isdir(self.root):
+            return removed
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if prefix == THUMBNAIL_DIR or not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if prefix + name in keep:
+                    continue
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+            with contextlib.suppress(OSError):
+                os.rmdir(directory)
+        thumbnails = os.path.join(self.root, THUMBNAIL_DIR)
+        if os.path.isdir(thumbnails):
+            for name in os.listdir(thumbnails):
+                if name.split('-', 1)[0] not in keep:
+                    with contextlib.suppress(OSError):
+                        os.remove(os.path.join(thumbnails, name))
+        return removed
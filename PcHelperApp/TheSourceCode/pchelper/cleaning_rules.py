@@ -0,0 +1,169 @@
+import fnmatch
+import functools
+import json
+import os
+import re
+import sys
+import time
+
+
+def _compile_globs(patterns):
+    # One regex per list, so a pattern list costs a single match per path
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{fnmatch.translate(os.path.normcase(p))})' for p in patterns))
+
+
+def _linux_in_use(root):
+    # Files held open by any process we can inspect, and directories some process is working in
+    files, dirs = set(), set()
+    root = os.path.realpath(root)
+    prefix = root.rstrip(os.sep) + os.sep
+    try:
+        pids = [name for name in os.listdir('/proc') if name.isdigit()]
+    except OSError:
+        return files, dirs
+    for pid in pids:
+        try:
+            cwd = os.readlink(f'/proc/{pid}/cwd')
+            if cwd.startswith(prefix):
+                dirs.add(cwd)
+        except OSError:
+            pass
+        try:
+            with os.scandir(f'/proc/{pid}/fd') as fds:
+                for fd in fds:
+                    try:
+                        target = os.readlink(fd.path)
+                    except OSError:
+                        continue
+                    if target.startswith(prefix):
+                        files.add(target)
+        except OSError:
+            continue
+    # A process working deep inside a folder keeps every folder above it too
+    for path in list(dirs):
+        parent = os.path.dirname(path)
+        while parent.startswith(prefix) and parent not in dirs:
+            dirs.add(parent)
+            parent = os.path.dirname(parent)
+    return files, dirs
+
+
+@functools.lru_cache(maxsize=None)
+def _create_file():
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.CreateFileW.restype = wintypes.HANDLE
+    kernel32.CreateFileW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+                                     wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE]
+    return kernel32, wintypes.HANDLE(-1).value
+
+
+def _windows_locked(path):
+    import ctypes
+
+    GENERIC_READ = 0x80000000
+    OPEN_EXISTING = 3
+    ERROR_SHARING_VIOLATION = 32
+    kernel32, invalid_handle = _create_file()
+
+    # Asking for exclusive access fails only while another program has the file open
+    handle = kernel32.CreateFileW(path, GENERIC_READ, 0, None, OPEN_EXISTING, 0, None)
+    if handle == invalid_handle:
+        return ctypes.get_last_error() == ERROR_SHARING_VIOLATION
+    kernel32.CloseHandle(handle)
+    return False
+
+
+class CleaningRules:
+    FIELDS = ('min_age_hours', 'min_size', 'max_size', 'include', 'exclude', 'skip_in_use')
+
+    def __init__(self, min_age_hours=24, min_size=0, max_size=None, include=('*',), exclude=(), skip_in_use=True):
+        self.min_age_hours = min_age_hours
+        self.min_size = min_size
+        self.max_size = max_size
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.skip_in_use = skip_in_use
+
+    @classmethod
+    def from_dict(cls, data):
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown cleaning rules: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def matcher(self, root, now=None, in_use=None):
+        return RuleMatcher(self, root, now, in_use)
+
+
+class RuleMatcher:
+    # The rules bound to one cleaning run: the clock and the set of in-use paths are captured once up front.
+    # Globs without a slash match the name; globs with one match the path relative to root, using '/'.
+
+    def __init__(self, rules, root, now=None, in_use=None):
+        self.rules = rules
+        self.root = root
+        self.cutoff = (time.time() if now is None else now) - rules.min_age_hours * 3600
+        self.include = _compile_globs(rules.include)
+        self.exclude = _compile_globs(rules.exclude)
+        self.path_globs = any('/' in p for p in rules.include + rules.exclude)
+        self.check_locks = rules.skip_in_use and os.name == 'nt'
+        # Nothing under root is followed through a symlink, so real paths only differ from root's own
+        self.real_root = os.path.realpath(root)
+        if in_use is not None:
+            self.open_files, self.busy_dirs = in_use
+        elif rules.skip_in_use and sys.platform.startswith('linux'):
+            self.open_files, self.busy_dirs = _linux_in_use(root)
+        else:
+            self.open_files, self.busy_dirs = set(), set()
+
+    def _keys(self, path, name):
+        name = os.path.normcase(name)
+        if not self.path_globs:
+            return (name,)
+        relative = os.path.normcase(os.path.relpath(path, self.root)).replace(os.sep, '/')
+        return name, relative
+
+    def _real_path(self, path):
+        return self.real_root + path[len(self.root):]
+
+    def _excluded(self, keys):
+        return self.exclude is not None and any(self.exclude.match(key) for key in keys)
+
+    def allows_dir(self, entry):
+        # Returning False prunes the whole subtree without looking inside it
+        if self._excluded(self._keys(entry.path, entry.name)):
+            return False
+        return not self.busy_dirs or self._real_path(entry.path) not in self.busy_dirs
+
+    def allows_file(self, entry, st):
+        keys = self._keys(entry.path, entry.name)
+        if self.include is None or not any(self.include.match(key) for key in keys):
+            return False
+        if self._excluded(keys):
+            return False
+        if st.st_mtime > self.cutoff:
+            return False
+        if st.st_size < self.rules.min_size:
+            return False
+        if self.rules.max_size is not None and st.st_size > self.rules.max_size:
+            return False
+        if self.open_files and self._real_path(entry.path) in self.open_files:
+            return False
+        if self.check_locks and _windows_locked(entry.path):
+            return False
+        return True
@@ -0,0 +1,218 @@
+import argparse
+import contextlib
+import json
+import sys
+
+# Same files the app uses, relative to the working directory
+CLIPBOARD_DB = 'clipboard_history.db'
+RETENTION_FILE = 'clipboard_retention.json'
+RULES_FILE = 'cleaning_rules.json'
+CONNECTIVITY_FILE = 'connectivity.json'
+DISK_INDEX_DB = 'disk_index.db'
+
+
+def progress_printer(args):
+    # Progress goes to stderr as JSON lines so stdout stays a single JSON document
+    if not args.progress:
+        return None
+    return lambda snapshot: print(json.dumps(snapshot), file=sys.stderr, flush=True)
+
+
+def cmd_clean(args):
+    from pchelper.cleaning_rules import CleaningRules
+    from pchelper.temp_cleaner import TempCleaner
+
+    index = None
+    if args.index:
+        from pchelper.disk_index import DiskUsageIndex
+
+        index = DiskUsageIndex(args.index, watch=False)
+    try:
+        report = TempCleaner(root=args.root, workers=args.workers, dry_run=args.dry_run,
+                             progress=progress_printer(args), rules=CleaningRules.load(args.rules),
+                             index=index).run()
+    finally:
+        if index is not None:
+            index.close()
+    snapshot = report.snapshot()
+    return snapshot, 1 if snapshot['errors'] else 0
+
+
+def cmd_trash(args):
+    from pchelper.trash import open_trash
+
+    # The Recycle Bin refuses --older-than with a ValueError, which exits with status 2 before anything is removed
+    report = open_trash(args.trash_dir).empty(older_than_days=args.older_than, workers=args.workers,
+                                              dry_run=args.dry_run, progress=progress_printer(args))
+    snapshot = report.snapshot()
+    return snapshot, 1 if snapshot['errors'] else 0
+
+
+def cmd_disk_usage(args):
+    from pchelper.disk_index import DiskUsageIndex, cleanable_locations
+
+    index = DiskUsageIndex(args.db, watch=False)
+    try:
+        result = {}
+        for name, path in cleanable_locations().items():
+            files, size = index.refresh(path)
+            result[name] = {'path': path, 'files': files, 'bytes': size}
+    finally:
+        index.close()
+    return result, 0
+
+
+def open_clipboard(args):
+    from pchelper.clipboard_history import ClipboardHistoryManager
+    from pchelper.retention import RetentionPolicy
+
+    return ClipboardHistoryManager(db_path=args.db, retention=RetentionPolicy.load(args.retention))
+
+
+def cmd_clip_list(args):
+    manager = open_clipboard(args)
+    try:
+        return [entry._asdict() for entry in manager.get_entries(args.limit, args.offset)], 0
+    finally:
+        manager.close()
+
+
+def cmd_clip_search(args):
+    from pchelper.history_search import HistorySearchSource, SearchQuery, MODE_LIVE, MODE_FUZZY, MODE_FULL_TEXT
+
+    mode = {'live': MODE_LIVE, 'fuzzy': MODE_FUZZY, 'full-text': MODE_FULL_TEXT}[args.mode]
+    manager = open_clipboard(args)
+    try:
+        source = HistorySearchSource(manager)
+        query = SearchQuery(args.query, mode)
+        entries = source.fetch(query, args.offset, args.limit)
+        return {'total': source.count(query), 'entries': [entry._asdict() for entry in entries]}, 0
+    finally:
+        manager.close()
+
+
+def cmd_clip_add(args):
+    content = sys.stdin.read() if args.text == '-' else args.text
+    manager = open_clipboard(args)
+    try:
+        manager.add_to_history(content)
+        manager.flush()
+        return {'added': len(content)}, 0
+    finally:
+        manager.close()
+
+
+def cmd_clip_clear(args):
+    manager = open_clipboard(args)
+    try:
+        result = manager.clear_history()
+    finally:
+        manager.close()
+    failed = result.startswith("Database error")
+    return {'cleared': not failed, 'message': result}, 1 if failed else 0
+
+
+def cmd_net_probe(args):
+    from pchelper.connectivity import ConnectivityChecker
+
+    checker = ConnectivityChecker.load(args.config)
+    if args.samples is not None:
+        checker.samples = args.samples
+    if args.timeout is not None:
+        checker.timeout = args.timeout
+    report = checker.check(wait_for_all=args.wait_all)
+    return {
+        'online': report.online,
+        'quorum': report.quorum,
+        'duration': round(report.duration, 3),
+        'results': [result._asdict() for result in report.results],
+    }, 0 if report.online else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='pchelper', description="PC Helper without the window; prints JSON")
+    parser.add_argument('--pretty', action='store_true', help="indent the JSON output")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="time the command and write the timings here (.prom for Prometheus text, else JSON)")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="sample the stacks of all threads and write them here as collapsed stacks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    clean = commands.add_parser('clean', help="remove temporary files")
+    clean.add_argument('--dry-run', action='store_true', help="only report what would be removed")
+    clean.add_argument('--root', help="folder to clean instead of the system temp folder")
+    clean.add_argument('--rules', default=RULES_FILE, help="cleaning rules file")
+    clean.add_argument('--index', metavar='DB', help="scan through this disk usage index")
+    clean.add_argument('--workers', type=int, default=4)
+    clean.add_argument('--progress', action='store_true', help="report progress on stderr")
+    clean.set_defaults(func=cmd_clean)
+
+    trash = commands.add_parser('trash', help="empty the trash")
+    trash.add_argument('--dry-run', action='store_true', help="only report what would be removed")
+    trash.add_argument('--older-than', type=float, metavar='DAYS',
+                       help="only items trashed before this (freedesktop Trash only, not the Windows Recycle Bin)")
+    trash.add_argument('--trash-dir', help="freedesktop Trash folder to empty")
+    trash.add_argument('--workers', type=int, default=4)
+    trash.add_argument('--progress', action='store_true', help="report progress on stderr")
+    trash.set_defaults(func=cmd_trash)
+
+    disk = commands.add_parser('disk', help="disk usage of the cleanable folders").add_subparsers(
+        dest='disk_command', required=True
+    )
+    usage = disk.add_parser('usage', help="files and bytes in temp and Trash")
+    usage.add_argument('--db', default=DISK_INDEX_DB)
+    usage.set_defaults(func=cmd_disk_usage)
+
+    clip = commands.add_parser('clip', help="clipboard history").add_subparsers(dest='clip_command', required=True)
+    for name, func, text in (('list', cmd_clip_list, "newest entries first"),
+                             ('search', cmd_clip_search, "search the history"),
+                             ('add', cmd_clip_add, "add an entry"),
+                             ('clear', cmd_clip_clear, "delete the whole history")):
+        command = clip.add_parser(name, help=text)
+        command.add_argument('--db', default=CLIPBOARD_DB)
+        command.add_argument('--retention', default=RETENTION_FILE)
+        command.set_defaults(func=func)
+        if name in ('list', 'search'):
+            command.add_argument('--limit', type=int, default=50)
+            command.add_argument('--offset', type=int, default=0)
+        if name == 'search':
+            command.add_argument('query')
+            command.add_argument('--mode', choices=('live', 'fuzzy', 'full-text'), default='full-text')
+        if name == 'add':
+            command.add_argument('text', help="text to add, or - to read stdin")
+
+    net = commands.add_parser('net', help="network checks").add_subparsers(dest='net_command', required=True)
+    probe = net.add_parser('probe', help="check the connection; exits 1 when offline")
+    probe.add_argument('--config', default=CONNECTIVITY_FILE)
+    probe.add_argument('--samples', type=int)
+    probe.add_argument('--timeout', type=float)
+    probe.add_argument('--wait-all', action='store_true', help="take every sample instead of stopping at quorum")
+    probe.set_defaults(func=cmd_net_probe)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.metrics:
+        from pchelper.metrics import METRICS
+
+        METRICS.enabled = True
+    if args.profile:
+        from pchelper.profiler import SamplingProfiler
+
+        profiler = SamplingProfiler().start()
+    try:
+        # The engines print their warnings; keep them off stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            result, status = args.func(args)
+    except (OSError, ValueError) as e:
+        result, status = {'error': str(e)}, 2
+    finally:
+        if args.profile:
+            profiler.stop()
+    print(json.dumps(result, indent=2 if args.pretty else None, default=str))
+    if args.metrics:
+        METRICS.export(args.metrics)
+    if args.profile:
+        profiler.write(args.profile)
+    return status
@@ -0,0 +1,328 @@
+import collections
+import ctypes
+import functools
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+
+KIND_TEXT = 'text'
+KIND_HTML = 'html'
+KIND_IMAGE = 'image'
+KIND_FILES = 'files'
+
+# A typed clipboard entry: `text` is what gets indexed and shown in the list, `data` the payload that
+# goes to the blob store (None for text and file lists, which are their text)
+ClipboardItem = collections.namedtuple('ClipboardItem', ['kind', 'text', 'data', 'mime'])
+
+# Preferred first when the clipboard offers several
+IMAGE_TYPES = ('image/png', 'image/bmp', 'image/gif', 'image/jpeg')
+# Plain text as X11 and Wayland name it
+TEXT_TYPES = ('UTF8_STRING', 'STRING', 'TEXT', 'text/plain', 'text/plain;charset=utf-8')
+
+CF_DIB = 8
+CF_UNICODETEXT = 13
+CF_HDROP = 15
+GMEM_MOVEABLE = 0x0002
+BI_BITFIELDS = 3
+COMMAND_TIMEOUT = 5
+
+
+def image_size(data, mime):
+    # Width and height from the file header, without decoding the image
+    try:
+        if mime == 'image/png':
+            return struct.unpack_from('>II', data, 16)
+        if mime == 'image/bmp':
+            width, height = struct.unpack_from('<ii', data, 18)
+            return width, abs(height)
+        if mime == 'image/gif':
+            return struct.unpack_from('<HH', data, 6)
+    except struct.error:
+        pass
+    return None
+
+
+def image_item(data, mime):
+    size = image_size(data, mime)
+    text = f"Image {size[0]}x{size[1]}" if size else "Image"
+    return ClipboardItem(KIND_IMAGE, text, data, mime)
+
+
+def html_item(html, text):
+    if not text:
+        text = re.sub(r'\s+', ' ', re.sub(r'<[^>]*>', ' ', html.decode('utf-8', 'replace'))).strip()
+    if not text:
+        return None
+    return ClipboardItem(KIND_HTML, text, html, 'text/html')
+
+
+def files_item(paths):
+    return ClipboardItem(KIND_FILES, '\n'.join(paths), None, 'text/uri-list') if paths else None
+
+
+def dib_to_bmp(dib):
+    # CF_DIB is a BMP file without its 14-byte file header; the header says where the pixels start
+    header_size, = struct.unpack_from('<I', dib, 0)
+    bit_count, compression = struct.unpack_from('<HI', dib, 14)
+    colors_used, = struct.unpack_from('<I', dib, 32)
+    masks = 12 if compression == BI_BITFIELDS and header_size == 40 else 0
+    palette = (colors_used or 1 << bit_count) * 4 if bit_count <= 8 else colors_used * 4
+    return b'BM' + struct.pack('<IHHI', 14 + len(dib), 0, 0, 14 + header_size + masks + palette) + dib
+
+
+def html_fragment(cf_html):
+    # "HTML Format" wraps the copied markup in a header of byte offsets
+    start = re.search(rb'StartFragment:(\d+)', cf_html)
+    end = re.search(rb'EndFragment:(\d+)', cf_html)
+    if start and end:
+        return cf_html[int(start.group(1)):int(end.group(1))]
+    start = re.search(rb'StartHTML:(\d+)', cf_html)
+    return cf_html[int(start.group(1)):] if start else cf_html
+
+
+def cf_html(fragment):
+    header = "Version:0.9\r\nStartHTML:{:010d}\r\nEndHTML:{:010d}\r\nStartFragment:{:010d}\r\nEndFragment:{:010d}\r\n"
+    prefix = b"<html><body><!--StartFragment-->"
+    suffix = b"<!--EndFragment--></body></html>"
+    start_html = len(header.format(0, 0, 0, 0))
+    start_fragment = start_html + len(prefix)
+    end_fragment = start_fragment + len(fragment)
+    end_html = end_fragment + len(suffix)
+    return (header.format(start_html, end_html, start_fragment, end_fragment).encode('ascii')
+            + prefix + fragment + suffix + b'\0')
+
+
+def parse_uri_list(data):
+    from urllib.parse import unquote, urlparse
+
+    paths = []
+    for line in data.decode('utf-8', 'replace').splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        uri = urlparse(line)
+        if uri.scheme != 'file':
+            return []
+        paths.append(unquote(uri.path))
+    return paths
+
+
+def uri_list(paths):
+    from urllib.parse import quote
+
+    return ''.join(f"file://{quote(path)}\r\n" for path in paths).encode('utf-8')
+
+
+@functools.lru_cache(maxsize=None)
+def _win32():
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    kernel32 = ctypes.windll.kernel32
+    shell32 = ctypes.windll.shell32
+    user32.OpenClipboard.argtypes = [wintypes.HWND]
+    user32.IsClipboardFormatAvailable.argtypes = [wintypes.UINT]
+    user32.GetClipboardData.argtypes = [wintypes.UINT]
+    user32.GetClipboardData.restype = wintypes.HANDLE
+    user32.SetClipboardData.argtypes = [wintypes.UINT, wintypes.HANDLE]
+    user32.SetClipboardData.restype = wintypes.HANDLE
+    user32.RegisterClipboardFormatW.argtypes = [wintypes.LPCWSTR]
+    user32.RegisterClipboardFormatW.restype = wintypes.UINT
+    kernel32.GlobalAlloc.argtypes = [wintypes.UINT, ctypes.c_size_t]
+    kernel32.GlobalAlloc.restype = wintypes.HGLOBAL
+    kernel32.GlobalFree.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalLock.restype = ctypes.c_void_p
+    kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalSize.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalSize.restype = ctypes.c_size_t
+    shell32.DragQueryFileW.argtypes = [wintypes.HANDLE, wintypes.UINT, wintypes.LPWSTR, wintypes.UINT]
+    shell32.DragQueryFileW.restype = wintypes.UINT
+    return user32, kernel32, shell32
+
+
+def _get_global(kernel32, handle):
+    if not handle:
+        return None
+    pointer = kernel32.GlobalLock(handle)
+    if not pointer:
+        return None
+    try:
+        return ctypes.string_at(pointer, kernel32.GlobalSize(handle))
+    finally:
+        kernel32.GlobalUnlock(handle)
+
+
+def _set_global(user32, kernel32, clipboard_format, data):
+    handle = kernel32.GlobalAlloc(GMEM_MOVEABLE, len(data))
+    if not handle:
+        raise OSError("GlobalAlloc failed")
+    pointer = kernel32.GlobalLock(handle)
+    ctypes.memmove(pointer, data, len(data))
+    kernel32.GlobalUnlock(handle)
+    # The clipboard owns the memory once SetClipboardData succeeds
+    if not user32.SetClipboardData(clipboard_format, handle):
+        kernel32.GlobalFree(handle)
+        raise OSError("SetClipboardData failed")
+
+
+def _read_windows():
+    user32, kernel32, shell32 = _win32()
+    html_format = user32.RegisterClipboardFormatW("HTML Format")
+    if not user32.OpenClipboard(None):
+        return None
+    try:
+        if user32.IsClipboardFormatAvailable(CF_HDROP):
+            handle = user32.GetClipboardData(CF_HDROP)
+            paths = []
+            for i in range(shell32.DragQueryFileW(handle, 0xFFFFFFFF, None, 0)):
+                length = shell32.DragQueryFileW(handle, i, None, 0)
+                buffer = ctypes.create_unicode_buffer(length + 1)
+                shell32.DragQueryFileW(handle, i, buffer, length + 1)
+                paths.append(buffer.value)
+            return files_item(paths)
+        if html_format and user32.IsClipboardFormatAvailable(html_format):
+            raw = _get_global(kernel32, user32.GetClipboardData(html_format))
+            if not raw:
+                return None
+            text = _get_global(kernel32, user32.GetClipboardData(CF_UNICODETEXT)) or b''
+            text = text.decode('utf-16-le', 'replace').split('\0', 1)[0]
+            return html_item(html_fragment(raw.split(b'\0', 1)[0]), text)
+        # Office and some browsers put a picture of copied text next to the text itself; the text is what
+        # was copied, so an image is only stored when no text is offered. None leaves it to paste_text().
+        if user32.IsClipboardFormatAvailable(CF_UNICODETEXT):
+            return None
+        if user32.IsClipboardFormatAvailable(CF_DIB):
+            dib = _get_global(kernel32, user32.GetClipboardData(CF_DIB))
+            return image_item(dib_to_bmp(dib), 'image/bmp') if dib else None
+    finally:
+        user32.CloseClipboard()
+    return None
+
+
+def _write_windows(entry, blobs):
+    user32, kernel32, _ = _win32()
+    if entry.kind == KIND_IMAGE:
+        data = blobs.read(entry.blob)
+        if entry.mime == 'image/bmp':
+            payloads = [(CF_DIB, data[14:])]
+        else:
+            payloads = [(user32.RegisterClipboardFormatW(entry.mime.split('/')[1].upper()), data)]
+    elif entry.kind == KIND_HTML:
+        payloads = [
+            (user32.RegisterClipboardFormatW("HTML Format"), cf_html(blobs.read(entry.blob))),
+            (CF_UNICODETEXT, (entry.content + '\0').encode('utf-16-le')),
+        ]
+    elif entry.kind == KIND_FILES:
+        # DROPFILES: offset of the file list, drop point, non-client flag, wide characters
+        names = ''.join(path + '\0' for path in entry.content.split('\n')) + '\0'
+        payloads = [(CF_HDROP, struct.pack('<IiiII', 20, 0, 0, 0, 1) + names.encode('utf-16-le'))]
+    else:
+        return False
+    if not user32.OpenClipboard(None):
+        return False
+    try:
+        user32.EmptyClipboard()
+        for clipboard_format, data in payloads:
+            _set_global(user32, kernel32, clipboard_format, data)
+    finally:
+        user32.CloseClipboard()
+    return True
+
+
+def _unix_tool():
+    # (list types, read type, write type) commands for the running display server, or None
+    if os.environ.get('WAYLAND_DISPLAY') and shutil.which('wl-paste') and shutil.which('wl-copy'):
+        return (['wl-paste', '--list-types'],
+                lambda mime: ['wl-paste', '--no-newline', '--type', mime],
+                lambda mime: ['wl-copy', '--type', mime])
+    if os.environ.get('DISPLAY') and shutil.which('xclip'):
+        return (['xclip', '-selection', 'clipboard', '-t', 'TARGETS', '-o'],
+                lambda mime: ['xclip', '-selection', 'clipboard', '-t', mime, '-o'],
+                lambda mime: ['xclip', '-selection', 'clipboard', '-t', mime, '-i'])
+    return None
+
+
+def _run(command):
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=COMMAND_TIMEOUT)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def _read_unix(paste_text):
+    tool = _unix_tool()
+    if tool is None:
+        return None
+    list_types, read_type, _ = tool
+    types = (_run(list_types) or b'').decode('utf-8', 'replace').split()
+    if 'text/uri-list' in types:
+        paths = parse_uri_list(_run(read_type('text/uri-list')) or b'')
+        if paths:
+            return files_item(paths)
+    if 'text/html' in types:
+        html = _run(read_type('text/html'))
+        if html:
+            return html_item(html, paste_text())
+    # As on Windows, a picture offered next to text is a rendering of it; None leaves it to paste_text()
+    if any(mime in types for mime in TEXT_TYPES):
+        return None
+    for mime in IMAGE_TYPES:
+        if mime in types:
+            data = _run(read_type(mime))
+            if data:
+                return image_item(data, mime)
+    return None
+
+
+def _write_unix(entry, blobs):
+    # xclip and wl-copy offer a single type, so HTML goes back as its plain text
+    tool = _unix_tool()
+    if tool is None:
+        return False
+    _, _, write_type = tool
+    if entry.kind == KIND_IMAGE:
+        command = write_type(entry.mime)
+        with blobs.open(entry.blob) as data:
+            # Both tools stay behind to serve the selection, so their output must not be a pipe we wait on
+            subprocess.run(command, input=data, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           timeout=COMMAND_TIMEOUT, check=True)
+        return True
+    if entry.kind == KIND_FILES:
+        subprocess.run(write_type('text/uri-list'), input=uri_list(entry.content.split('\n')),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=COMMAND_TIMEOUT, check=True)
+        return True
+    return False
+
+
+def read_clipboard(paste_text):
+    # Files, images and HTML where the platform offers them, otherwise the plain text paste_text() returns
+    try:
+        if os.name == 'nt':
+            item = _read_windows()
+        elif sys.platform != 'darwin':
+            item = _read_unix(paste_text)
+        else:
+            item = None
+    except Exception as e:
+        print(f"Clipboard format error: {str(e)}")
+        item = None
+    return item if item is not None else paste_text()
+
+
+def write_clipboard(entry, blobs):
+    # False when this kind cannot go back on this platform; the caller then copies the entry's text
+    if entry.kind == KIND_TEXT:
+        return False
+    try:
+        if os.name == 'nt':
+            return _write_windows(entry, blobs)
+        if sys.platform != 'darwin':
+            return _write_unix(entry, blobs)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"Clipboard format error: {str(e)}")
+    return False
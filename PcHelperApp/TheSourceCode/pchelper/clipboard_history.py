@@ -0,0 +1,642 @@
+import collections
+import contextlib
+import functools
+import hashlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+
+from pchelper.blob_store import THUMBNAIL_SIZE, BlobStore
+from pchelper.clipboard_formats import KIND_IMAGE
+from pchelper.metrics import METRICS, instrument
+from pchelper.retention import RetentionPolicy, compact, enable_incremental_vacuum
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Bodies at least this large are compressed before they are stored
+COMPRESS_THRESHOLD = 4096
+
+CODEC_TEXT = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+# Idle reader connections kept for reuse; readers beyond this open a connection for the one query
+READER_POOL_SIZE = 4
+
+# Rows carry only metadata; the payload of an image or HTML entry stays in the blob store until asked for
+HistoryEntry = collections.namedtuple(
+    'HistoryEntry', ['id', 'content', 'seen_count', 'last_seen', 'pinned', 'kind', 'blob', 'mime', 'size']
+)
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def item_hash(item, blob):
+    # The kind is part of the hash, so an image and a text that read the same stay separate entries
+    return hashlib.sha256(f"{item.kind}\0{blob or item.text}".encode('utf-8')).hexdigest()
+
+
+def encode_content(content):
+    raw = content.encode('utf-8')
+    if len(raw) >= COMPRESS_THRESHOLD:
+        if zstandard is not None:
+            body, codec = zstandard.ZstdCompressor(level=3).compress(raw), CODEC_ZSTD
+        else:
+            body, codec = zlib.compress(raw, 6), CODEC_ZLIB
+        if len(body) < len(raw):
+            return body, codec
+    return content, CODEC_TEXT
+
+
+def decode_content(body, codec):
+    if codec == CODEC_TEXT:
+        return body
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(body).decode('utf-8')
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise sqlite3.DataError("zstandard is required to read this clipboard entry")
+        return zstandard.ZstdDecompressor().decompress(body).decode('utf-8')
+    raise sqlite3.DataError(f"Unknown clipboard entry codec: {codec}")
+
+
+@functools.lru_cache(maxsize=None)
+def fts5_available():
+    try:
+        sqlite3.connect(':memory:').execute('CREATE VIRTUAL TABLE probe USING fts5(content)')
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def _create_search_index(conn):
+    # Older SQLite builds without FTS5 keep working and fall back to LIKE searches
+    if not fts5_available():
+        return
+    for statement in (
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+            content, content='history', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+            INSERT INTO history_fts (rowid, content) VALUES (new.id, new.content);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+            INSERT INTO history_fts (history_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS history_fts_update AFTER UPDATE ON history BEGIN
+            INSERT INTO history_fts (history_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            INSERT INTO history_fts (rowid, content) VALUES (new.id, new.content);
+        END
+        ''',
+        "INSERT INTO history_fts (history_fts) VALUES ('rebuild')",
+    ):
+        conn.execute(statement)
+
+
+def _create_entries_search_index(conn):
+    if not fts5_available():
+        return
+    for statement in (
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+            content, content='entries_text', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN
+            INSERT INTO entries_fts (rowid, content) VALUES (new.id, pch_text(new.body, new.codec));
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN
+            INSERT INTO entries_fts (entries_fts, rowid, content)
+            VALUES ('delete', old.id, pch_text(old.body, old.codec));
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS entries_fts_update AFTER UPDATE OF body, codec ON entries BEGIN
+            INSERT INTO entries_fts (entries_fts, rowid, content)
+            VALUES ('delete', old.id, pch_text(old.body, old.codec));
+            INSERT INTO entries_fts (rowid, content) VALUES (new.id, pch_text(new.body, new.codec));
+        END
+        ''',
+        "INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')",
+    ):
+        conn.execute(statement)
+
+
+def _deduplicate_entries(conn):
+    # Contents are stored once per hash in entries; every copy of them is a row in occurrences
+    for statement in (
+        '''
+        CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hash TEXT NOT NULL UNIQUE,
+            body BLOB NOT NULL,
+            codec INTEGER NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL,
+            seen_count INTEGER NOT NULL DEFAULT 0,
+            first_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_seen_id INTEGER
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS occurrences (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL REFERENCES entries (id) ON DELETE CASCADE,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_entries_last_seen ON entries (last_seen_id)',
+        'CREATE INDEX IF NOT EXISTS idx_occurrences_entry ON occurrences (entry_id)',
+        'CREATE INDEX IF NOT EXISTS idx_occurrences_timestamp ON occurrences (timestamp)',
+        'CREATE VIEW IF NOT EXISTS entries_text AS SELECT id, pch_text(body, codec) AS content FROM entries',
+    ):
+        conn.execute(statement)
+
+    for content, timestamp in conn.execute('SELECT content, timestamp FROM history ORDER BY id').fetchall():
+        if content:
+            store_content(conn, content, timestamp)
+
+    for statement in (
+        'DROP TRIGGER IF EXISTS history_fts_insert',
+        'DROP TRIGGER IF EXISTS history_fts_delete',
+        'DROP TRIGGER IF EXISTS history_fts_update',
+        'DROP TABLE IF EXISTS history_fts',
+        'DROP TABLE history',
+    ):
+        conn.execute(statement)
+    _create_entries_search_index(conn)
+
+
+# Each entry upgrades the schema by one version; PRAGMA user_version records how far a database has got.
+# An entry is either a list of statements or a callable taking the connection.
+MIGRATIONS = [
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ],
+    [
+        'CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp)',
+    ],
+    _create_search_index,
+    _deduplicate_entries,
+    [
+        'ALTER TABLE entries ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0',
+        'CREATE INDEX IF NOT EXISTS idx_entries_pinned ON entries (pinned, last_seen_id)',
+        'CREATE INDEX IF NOT EXISTS idx_entries_last_seen_time ON entries (last_seen)',
+    ],
+    [
+        "ALTER TABLE entries ADD COLUMN kind TEXT NOT NULL DEFAULT 'text'",
+        'ALTER TABLE entries ADD COLUMN blob TEXT',
+        'ALTER TABLE entries ADD COLUMN mime TEXT',
+    ],
+]
+
+SQL_FIND_ENTRY = 'SELECT id FROM entries WHERE hash = ?'
+SQL_INSERT_ENTRY = '''
+    INSERT INTO entries (hash, body, codec, size, first_seen)
+    VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+'''
+SQL_INSERT_TYPED_ENTRY = '''
+    INSERT INTO entries (hash, body, codec, size, kind, blob, mime, first_seen)
+    VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+'''
+SQL_INSERT_OCCURRENCE = 'INSERT INTO occurrences (entry_id, timestamp) VALUES (?, COALESCE(?, CURRENT_TIMESTAMP))'
+SQL_TOUCH_ENTRY = '''
+    UPDATE entries SET seen_count = seen_count + 1, last_seen_id = ?,
+        last_seen = (SELECT timestamp FROM occurrences WHERE id = ?)
+    WHERE id = ?
+'''
+SQL_PIN = 'UPDATE entries SET pinned = ? WHERE id = ?'
+SQL_SELECT_PAGE = '''
+    SELECT id, pch_text(body, codec), seen_count, last_seen, pinned, kind, blob, mime, size FROM entries
+    ORDER BY last_seen_id DESC LIMIT ? OFFSET ?
+'''
+SQL_SEARCH = '''
+    SELECT entries.id, pch_text(entries.body, entries.codec), entries.seen_count, entries.last_seen, entries.pinned,
+        entries.kind, entries.blob, entries.mime, entries.size
+    FROM entries_fts JOIN entries ON entries.id = entries_fts.rowid
+    WHERE entries_fts MATCH ?
+    ORDER BY entries_fts.rank, entries.last_seen_id DESC
+    LIMIT ? OFFSET ?
+'''
+SQL_SEARCH_LIKE = '''
+    SELECT id, pch_text(body, codec), seen_count, last_seen, pinned, kind, blob, mime, size FROM entries
+    WHERE pch_text(body, codec) LIKE ? ESCAPE '\\'
+    ORDER BY last_seen_id DESC LIMIT ? OFFSET ?
+'''
+SQL_COUNT_ENTRIES = 'SELECT COUNT(*) FROM entries'
+SQL_COUNT_MATCHES = 'SELECT COUNT(*) FROM entries_fts WHERE entries_fts MATCH ?'
+SQL_COUNT_LIKE = "SELECT COUNT(*) FROM entries WHERE pch_text(body, codec) LIKE ? ESCAPE '\\'"
+SQL_HAS_SEARCH_INDEX = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entries_fts'"
+SQL_CLEAR = ('DELETE FROM occurrences', 'DELETE FROM entries')
+SQL_BLOBS = 'SELECT blob FROM entries WHERE blob IS NOT NULL'
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA foreign_keys=ON')
+    # Used by the entries_text view and the search triggers to index compressed bodies
+    conn.create_function('pch_text', 2, decode_content, deterministic=True)
+    return conn
+
+
+def store_content(conn, content, timestamp=None):
+    digest = content_hash(content)
+    row = conn.execute(SQL_FIND_ENTRY, (digest,)).fetchone()
+    if row is None:
+        body, codec = encode_content(content)
+        entry_id = conn.execute(SQL_INSERT_ENTRY, (digest, body, codec, len(content.encode('utf-8')), timestamp)).lastrowid
+    else:
+        entry_id = row[0]
+    _record_occurrence(conn, entry_id, timestamp)
+    return row is None
+
+
+def store_item(conn, item, blobs, timestamp=None):
+    # Plain strings are text entries; other kinds keep their payload in the blob store and only their
+    # text form and metadata in the row
+    if isinstance(item, str):
+        return store_content(conn, item, timestamp)
+    blob = blobs.put(item.data) if item.data is not None else None
+    digest = item_hash(item, blob)
+    row = conn.execute(SQL_FIND_ENTRY, (digest,)).fetchone()
+    if row is None:
+        body, codec = encode_content(item.text)
+        size = len(item.data) if item.data is not None else len(item.text.encode('utf-8'))
+        entry_id = conn.execute(SQL_INSERT_TYPED_ENTRY,
+                                (digest, body, codec, size, item.kind, blob, item.mime, timestamp)).lastrowid
+    else:
+        entry_id = row[0]
+    _record_occurrence(conn, entry_id, timestamp)
+    return row is None
+
+
+def _record_occurrence(conn, entry_id, timestamp):
+    occurrence_id = conn.execute(SQL_INSERT_OCCURRENCE, (entry_id, timestamp)).lastrowid
+    conn.execute(SQL_TOUCH_ENTRY, (occurrence_id, occurrence_id, entry_id))
+
+
+def migrate(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, statements in enumerate(MIGRATIONS[version:], version + 1):
+        conn.execute('BEGIN')
+        with conn:
+            if callable(statements):
+                statements(conn)
+            else:
+                for statement in statements:
+                    conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {number}')
+    return len(MIGRATIONS)
+
+
+def build_match_query(text):
+    # "quoted words" become phrase queries, every other word is matched as a prefix
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        if phrase.strip():
+            terms.append('"' + phrase.replace('"', '""') + '"')
+        elif word:
+            terms.append('"' + word.replace('"', '""') + '"*')
+    return ' AND '.join(terms)
+
+
+def like_pattern(text):
+    return '%' + re.sub(r'([%_\\])', r'\\\1', text) + '%'
+
+
+class ClipboardHistoryManager:
+    def __init__(self, max_entries=50, db_path='clipboard_history.db', batch_size=64, flush_interval=0.25,
+                 retention=None, blob_dir=None):
+        self.db_path = db_path
+        # Images and HTML live next to the database, e.g. clipboard_history_blobs/
+        self.blobs = BlobStore(blob_dir or os.path.splitext(db_path)[0] + '_blobs')
+        self.retention = retention or RetentionPolicy(max_entries=max_entries)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.action_queue = queue.Queue()
+        self.last_content = ""
+        self.compaction_stats = collections.deque(maxlen=20)
+        # Clipboard entries that could not be stored; each is also counted as clipboard.write_errors
+        self.write_errors = 0
+        self._unflushed = 0
+        self._unflushed_lock = threading.Lock()
+        # Goes up whenever the stored history may have changed, so cached views of it know to reload
+        self.generation = 0
+        self._readers_lock = threading.Lock()
+        self._idle_readers = []
+        self._readers_closed = False
+        self._schema_ready = threading.Event()
+        self.has_search_index = False
+        self.start_db_thread()
+        self._schema_ready.wait()
+
+    def start_db_thread(self):
+        self.db_thread = threading.Thread(target=self._db_worker, name="clipboard-db", daemon=True)
+        self.db_thread.start()
+
+    def _db_worker(self):
+        try:
+            conn = connect(self.db_path)
+            migrate(conn)
+            enable_incremental_vacuum(conn)
+            self.has_search_index = conn.execute(SQL_HAS_SEARCH_INDEX).fetchone() is not None
+        except Exception as e:
+            print(f"Database error: {str(e)}")
+            self._schema_ready.set()
+            self._fail_requests(e)
+            return
+        self._schema_ready.set()
+
+        pending = []
+        deadline = None
+        # Retention is enforced by a periodic compaction, never by the write path itself
+        needs_compaction = True
+        next_compaction = time.monotonic()
+        while True:
+            wake_times = []
+            if pending:
+                wake_times.append(deadline)
+            if needs_compaction:
+                wake_times.append(next_compaction)
+            timeout = max(0, min(wake_times) - time.monotonic()) if wake_times else None
+            try:
+                action, args, future = self.action_queue.get(timeout=timeout)
+            except queue.Empty:
+                pending = self._write_batch(conn, pending)
+                if needs_compaction and time.monotonic() >= next_compaction:
+                    self._compact(conn)
+                    needs_compaction = False
+                    next_compaction = time.monotonic() + self.retention.compaction_interval
+                continue
+
+            if action == 'add':
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.append(args[0])
+                needs_compaction = True
+                if len(pending) >= self.batch_size:
+                    pending = self._write_batch(conn, pending)
+                continue
+
+            # Anything other than an add must observe the writes queued before it
+            pending = self._write_batch(conn, pending)
+            if action == 'stop':
+                if needs_compaction:
+                    self._compact(conn)
+                conn.close()
+                future.set_result(True)
+                break
+
+            try:
+                if action == 'flush':
+                    future.set_result(True)
+
+                elif action == 'compact':
+                    future.set_result(self._compact(conn))
+                    needs_compaction = False
+                    next_compaction = time.monotonic() + self.retention.compaction_interval
+
+                elif action == 'pin':
+                    entry_id, pinned = args
+                    with conn:
+                        conn.execute(SQL_PIN, (int(pinned), entry_id))
+                    self._changed()
+                    needs_compaction = True
+                    future.set_result(True)
+
+                elif action == 'clear':
+                    with conn:
+                        for statement in SQL_CLEAR:
+                            conn.execute(statement)
+                    self._changed()
+                    self._sweep_blobs(conn)
+                    future.set_result("Clipboard history cleared!")
+
+            # Whatever goes wrong is the caller's to see; the worker itself has to keep serving the queue
+            except Exception as e:
+                future.set_exception(e)
+
+    def _fail_requests(self, error):
+        # Without a database every request fails with the error that prevented opening it
+        while True:
+            action, args, future = self.action_queue.get()
+            if future is not None:
+                if action == 'stop':
+                    future.set_result(True)
+                    break
+                future.set_exception(error)
+
+    def _compact(self, conn):
+        try:
+            stats = compact(conn, self.retention)
+        except Exception as e:
+            print(f"Database error: {str(e)}")
+            return None
+        self.compaction_stats.append(stats)
+        if stats.entries_removed or stats.occurrences_removed:
+            self._changed()
+        if stats.entries_removed:
+            self._sweep_blobs(conn)
+        return stats
+
+    def _changed(self):
+        with self._unflushed_lock:
+            self.generation += 1
+
+    def _sweep_blobs(self, conn):
+        # Runs on the writer thread, the only one that adds blobs, so nothing is swept before its row exists
+        try:
+            self.blobs.sweep({row[0] for row in conn.execute(SQL_BLOBS)})
+        except OSError as e:
+            print(f"Blob store error: {str(e)}")
+
+    @instrument('clipboard.write_batch')
+    def _write_batch(self, conn, pending):
+        if not pending:
+            return pending
+        failed = 0
+        try:
+            with conn:
+                for content in pending:
+                    # One transaction for the batch, one savepoint per entry: a bad entry only loses itself
+                    conn.execute('SAVEPOINT store_item')
+                    try:
+                        store_item(conn, content, self.blobs)
+                    except OSError as e:
+                        print(f"Blob store error: {str(e)}")
+                        conn.execute('ROLLBACK TO store_item')
+                        failed += 1
+                    except Exception as e:
+                        print(f"Database error: {str(e)}")
+                        conn.execute('ROLLBACK TO store_item')
+                        failed += 1
+                    conn.execute('RELEASE store_item')
+        except Exception as e:
+            # The commit itself failed, so nothing in the batch was stored
+            print(f"Database error: {str(e)}")
+            failed = len(pending)
+        if failed:
+            self.write_errors += failed
+            METRICS.count('clipboard.write_errors', failed)
+        # No longer waiting to be written either way, so flush() does not wait on them
+        with self._unflushed_lock:
+            self._unflushed -= len(pending)
+        return []
+
+    def _submit(self, action, *args):
+        future = Future()
+        self.action_queue.put((action, args, future))
+        return future
+
+    @instrument('clipboard.add')
+    def add_to_history(self, content):
+        if content and content != self.last_content:
+            self.last_content = content
+            with self._unflushed_lock:
+                self._unflushed += 1
+                # Counted when queued: readers flush pending adds before they query
+                self.generation += 1
+            self.action_queue.put(('add', (content,), None))
+            return True
+        return False
+
+    def flush(self):
+        return self._submit('flush').result()
+
+    def compact(self):
+        return self._submit('compact').result()
+
+    def pin_entry(self, entry_id, pinned=True):
+        try:
+            return self._submit('pin', entry_id, pinned).result()
+        except sqlite3.Error as e:
+            print(f"Database error: {str(e)}")
+            return False
+
+    @contextlib.contextmanager
+    def _reader(self):
+        # WAL lets reads run on their own connection without queueing behind the writer. Connections are
+        # borrowed from a small pool, not kept per thread, so each history window's fetch thread leaves none open.
+        with self._readers_lock:
+            conn = self._idle_readers.pop() if self._idle_readers else None
+        if conn is None:
+            conn = connect(self.db_path)
+        try:
+            yield conn
+        finally:
+            with self._readers_lock:
+                if not self._readers_closed and len(self._idle_readers) < READER_POOL_SIZE:
+                    self._idle_readers.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    @instrument('clipboard.get_entries')
+    def get_entries(self, limit=None, offset=0):
+        try:
+            if self._unflushed:
+                self.flush()
+            with self._reader() as conn:
+                rows = conn.execute(SQL_SELECT_PAGE, (-1 if limit is None else limit, offset)).fetchall()
+            return [HistoryEntry(*row) for row in rows]
+        except sqlite3.Error as e:
+            print(f"Database error: {str(e)}")
+            return []
+
+    @instrument('clipboard.search')
+    def search_entries(self, query, limit=None, offset=0):
+        if not query.strip():
+            return self.get_entries(limit, offset)
+        limit = -1 if limit is None else limit
+        try:
+            if self._unflushed:
+                self.flush()
+            with self._reader() as conn:
+                if self.has_search_index:
+                    rows = conn.execute(SQL_SEARCH, (build_match_query(query), limit, offset)).fetchall()
+                else:
+                    rows = conn.execute(SQL_SEARCH_LIKE, (like_pattern(query), limit, offset)).fetchall()
+            return [HistoryEntry(*row) for row in rows]
+        except sqlite3.Error as e:
+            print(f"Database error: {str(e)}")
+            return []
+
+    @instrument('clipboard.count')
+    def count_entries(self, query=""):
+        try:
+            if self._unflushed:
+                self.flush()
+            with self._reader() as conn:
+                if not query.strip():
+                    return conn.execute(SQL_COUNT_ENTRIES).fetchone()[0]
+                if self.has_search_index:
+                    return conn.execute(SQL_COUNT_MATCHES, (build_match_query(query),)).fetchone()[0]
+                return conn.execute(SQL_COUNT_LIKE, (like_pattern(query),)).fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Database error: {str(e)}")
+            return 0
+
+    def thumbnail(self, entry, size=THUMBNAIL_SIZE):
+        # For the history view's fetch thread; decoding happens only for rows that scroll into view
+        if entry.kind != KIND_IMAGE or entry.blob is None:
+            return None
+        try:
+            return self.blobs.thumbnail(entry.blob, entry.mime, size)
+        except OSError as e:
+            print(f"Thumbnail error: {str(e)}")
+            return None
+
+    def get_history(self, limit=None, offset=0):
+        return [entry.content for entry in self.get_entries(limit, offset)]
+
+    def search(self, query, limit=None, offset=0):
+        return [entry.content for entry in self.search_entries(query, limit, offset)]
+
+    @instrument('clipboard.clear')
+    def clear_history(self):
+        try:
+            return self._submit('clear').result()
+        except sqlite3.Error as e:
+            return f"Database error: {str(e)}"
+
+    def close(self):
+        if self.db_thread.is_alive():
+            self._submit('stop')
+            self.db_thread.join()
+        with self._readers_lock:
+            self._readers_closed = True
+            idle, self._idle_readers = self._idle_readers, []
+        for conn in idle:
+            conn.close()
+
+    def __del__(self):
+        if hasattr(self, 'db_thread'):
+            self.close()
@@ -0,0 +1,467 @@
+import ctypes
+import ctypes.util
+import functools
+import os
+import queue
+import select
+import shutil
+import subprocess
+import sys
+import threading
+
+
+def _default_paste():
+    import pyperclip
+    return pyperclip.paste()
+
+
+def _default_change_counter():
+    # A cheap "has the clipboard changed?" probe lets the poller skip reading
+    # the clipboard (and forking xclip/xsel) on ticks where nothing happened.
+    if os.name == 'nt':
+        try:
+            return ctypes.windll.user32.GetClipboardSequenceNumber
+        except Exception:
+            return None
+    if sys.platform == 'darwin':
+        try:
+            from AppKit import NSPasteboard
+            pasteboard = NSPasteboard.generalPasteboard()
+            return pasteboard.changeCount
+        except Exception:
+            return None
+    if sys.platform.startswith('linux') and os.environ.get('DISPLAY'):
+        try:
+            return _x11_change_counter()
+        except Exception:
+            return None
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _xlib():
+    xlib = ctypes.CDLL(ctypes.util.find_library('X11'))
+    xlib.XOpenDisplay.restype = ctypes.c_void_p
+    xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+    xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+    xlib.XInternAtom.restype = ctypes.c_ulong
+    xlib.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+    xlib.XGetSelectionOwner.restype = ctypes.c_ulong
+    xlib.XGetSelectionOwner.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+    xlib.XConnectionNumber.argtypes = [ctypes.c_void_p]
+    xlib.XPending.argtypes = [ctypes.c_void_p]
+    xlib.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+    xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    return xlib
+
+
+@functools.lru_cache(maxsize=None)
+def _xfixes():
+    xfixes = ctypes.CDLL(ctypes.util.find_library('Xfixes'))
+    xfixes.XFixesQueryExtension.argtypes = [
+        ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)
+    ]
+    xfixes.XFixesSelectSelectionInput.argtypes = [
+        ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_ulong
+    ]
+    return xfixes
+
+
+def _x11_change_counter():
+    # X11 has no clipboard sequence number. Counting XFixes owner-change events on a spare connection makes
+    # one without a round trip per tick; without XFixes the owner's window id stands in, which misses a
+    # second copy inside the same window. Returns a counter with a close() for the connection, or None.
+    if not ctypes.util.find_library('X11'):
+        return None
+    xlib = _xlib()
+    display = xlib.XOpenDisplay(None)
+    if not display:
+        return None
+    clipboard_atom = xlib.XInternAtom(display, b"CLIPBOARD", 0)
+
+    def owner():
+        return xlib.XGetSelectionOwner(display, clipboard_atom)
+
+    counter = owner
+    if ctypes.util.find_library('Xfixes'):
+        xfixes = _xfixes()
+        event_base = ctypes.c_int()
+        error_base = ctypes.c_int()
+        if xfixes.XFixesQueryExtension(display, ctypes.byref(event_base), ctypes.byref(error_base)):
+            xfixes.XFixesSelectSelectionInput(
+                display, xlib.XDefaultRootWindow(display), clipboard_atom,
+                X11ClipboardWatcher.XFixesSetSelectionOwnerNotifyMask
+            )
+            # XEvent is a union padded to 24 longs
+            event = (ctypes.c_long * 24)()
+            event_type = ctypes.cast(event, ctypes.POINTER(ctypes.c_int))
+            changes = [0]
+
+            def counter():
+                while xlib.XPending(display):
+                    xlib.XNextEvent(display, event)
+                    if event_type[0] == event_base.value + X11ClipboardWatcher.XFixesSelectionNotify:
+                        changes[0] += 1
+                return changes[0]
+
+    counter.close = lambda: xlib.XCloseDisplay(display)
+    return counter
+
+
+class ClipboardWatcher:
+    name = 'base'
+
+    def __init__(self, on_change, paste=None):
+        self.on_change = on_change
+        self.paste = paste or _default_paste
+        self.last_content = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=f"clipboard-watcher-{self.name}", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2):
+        self._stop_event.set()
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _wake(self):
+        pass
+
+    def _run(self):
+        raise NotImplementedError
+
+    def _read(self):
+        try:
+            return self.paste()
+        except Exception as e:
+            print(f"Clipboard monitoring error: {e}")
+            return None
+
+    def _emit(self, content):
+        if not content or content == self.last_content:
+            return False
+        self.last_content = content
+        try:
+            self.on_change(content)
+        except Exception as e:
+            print(f"Clipboard monitoring error: {e}")
+        return True
+
+
+class PollingClipboardWatcher(ClipboardWatcher):
+    name = 'poll'
+
+    def __init__(self, on_change, paste=None, min_interval=0.1, max_interval=2.0,
+                 backoff=1.5, change_counter=None):
+        super().__init__(on_change, paste)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.change_counter = change_counter
+        self.interval = min_interval
+
+    def _run(self):
+        # The default counter is made per run: on X11 it holds a display connection, closed when the run ends
+        change_counter = self.change_counter if self.change_counter is not None else _default_change_counter()
+        close = getattr(change_counter, 'close', None)
+        last_count = None
+        try:
+            while not self._stop_event.is_set():
+                changed = False
+                count = None
+                if change_counter is not None:
+                    try:
+                        count = change_counter()
+                    except Exception:
+                        change_counter = None
+                if count is None or count != last_count:
+                    last_count = count
+                    changed = self._emit(self._read())
+
+                # Poll fast right after a change, then back off while the clipboard is idle
+                if changed:
+                    self.interval = self.min_interval
+                else:
+                    self.interval = min(self.max_interval, self.interval * self.backoff)
+                self._stop_event.wait(self.interval)
+        finally:
+            if close is not None:
+                close()
+
+
+class FakeClipboardWatcher(ClipboardWatcher):
+    name = 'fake'
+
+    def __init__(self, on_change, paste=None):
+        super().__init__(on_change, paste=lambda: self.content)
+        self.content = ""
+        self._changes = queue.Queue()
+
+    def copy(self, text):
+        self.content = text
+        self._changes.put(True)
+
+    def _wake(self):
+        self._changes.put(False)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            if self._changes.get():
+                self._emit(self._read())
+
+
+class WindowsClipboardWatcher(ClipboardWatcher):
+    name = 'win32'
+
+    WM_CLOSE = 0x0010
+    WM_DESTROY = 0x0002
+    WM_CLIPBOARDUPDATE = 0x031D
+    HWND_MESSAGE = -3
+
+    def __init__(self, on_change, paste=None):
+        super().__init__(on_change, paste)
+        self._hwnd = None
+
+    @classmethod
+    def is_available(cls):
+        if os.name != 'nt':
+            return False
+        try:
+            return hasattr(ctypes.windll.user32, 'AddClipboardFormatListener')
+        except Exception:
+            return False
+
+    def _wake(self):
+        if self._hwnd:
+            ctypes.windll.user32.PostMessageW(self._hwnd, self.WM_CLOSE, 0, 0)
+
+    def _run(self):
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        LRESULT = ctypes.c_ssize_t
+        WNDPROC = ctypes.WINFUNCTYPE(LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+
+        class WNDCLASSW(ctypes.Structure):
+            _fields_ = [
+                ('style', wintypes.UINT),
+                ('lpfnWndProc', WNDPROC),
+                ('cbClsExtra', ctypes.c_int),
+                ('cbWndExtra', ctypes.c_int),
+                ('hInstance', wintypes.HINSTANCE),
+                ('hIcon', wintypes.HICON),
+                ('hCursor', wintypes.HANDLE),
+                ('hbrBackground', wintypes.HBRUSH),
+                ('lpszMenuName', wintypes.LPCWSTR),
+                ('lpszClassName', wintypes.LPCWSTR),
+            ]
+
+        user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+        user32.DefWindowProcW.restype = LRESULT
+        user32.CreateWindowExW.argtypes = [
+            wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD,
+            ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+            wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID
+        ]
+        user32.CreateWindowExW.restype = wintypes.HWND
+        user32.PostMessageW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+        kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+
+        def wnd_proc(hwnd, msg, wparam, lparam):
+            if msg == self.WM_CLIPBOARDUPDATE:
+                self._emit(self._read())
+                return 0
+            if msg == self.WM_CLOSE:
+                user32.RemoveClipboardFormatListener(hwnd)
+                user32.DestroyWindow(hwnd)
+                return 0
+            if msg == self.WM_DESTROY:
+                user32.PostQuitMessage(0)
+                return 0
+            return user32.DefWindowProcW(hwnd, msg, wparam, lparam)
+
+        proc = WNDPROC(wnd_proc)
+        hinstance = kernel32.GetModuleHandleW(None)
+        window_class = WNDCLASSW()
+        window_class.lpfnWndProc = proc
+        window_class.hInstance = hinstance
+        window_class.lpszClassName = "PcHelperClipboardWatcher"
+        user32.RegisterClassW(ctypes.byref(window_class))
+
+        hwnd = user32.CreateWindowExW(
+            0, window_class.lpszClassName, "PcHelper", 0, 0, 0, 0, 0,
+            wintypes.HWND(self.HWND_MESSAGE), None, hinstance, None
+        )
+        if not hwnd or not user32.AddClipboardFormatListener(hwnd):
+            print("Clipboard monitoring error: could not register clipboard listener")
+            user32.UnregisterClassW(window_class.lpszClassName, hinstance)
+            return
+        self._hwnd = hwnd
+        if self._stop_event.is_set():
+            self._wake()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        self._hwnd = None
+        # The class holds a pointer to this run's window procedure, so drop it before a restart
+        user32.UnregisterClassW(window_class.lpszClassName, hinstance)
+
+
+class X11ClipboardWatcher(ClipboardWatcher):
+    name = 'x11'
+
+    XFixesSelectionNotify = 0
+    XFixesSetSelectionOwnerNotifyMask = 1
+
+    def __init__(self, on_change, paste=None):
+        super().__init__(on_change, paste)
+        self._wake_r = self._wake_w = None
+
+    @classmethod
+    def is_available(cls):
+        if not sys.platform.startswith('linux') or not os.environ.get('DISPLAY'):
+            return False
+        return bool(ctypes.util.find_library('X11') and ctypes.util.find_library('Xfixes'))
+
+    def start(self):
+        # The wake pipe lives from start() to stop(), so toggling monitoring does not leak descriptors
+        if self._wake_r is None:
+            self._wake_r, self._wake_w = os.pipe()
+        return super().start()
+
+    def stop(self, timeout=2):
+        thread = self._thread
+        super().stop(timeout)
+        # A run still stuck after the timeout may be selecting on the pipe; it is left open for it
+        if self._wake_r is None or (thread is not None and thread.is_alive()):
+            return
+        for fd in (self._wake_r, self._wake_w):
+            os.close(fd)
+        self._wake_r = self._wake_w = None
+
+    def _wake(self):
+        if self._wake_w is None:
+            return
+        try:
+            os.write(self._wake_w, b'x')
+        except OSError:
+            pass
+
+    def _run(self):
+        xlib = _xlib()
+        xfixes = _xfixes()
+
+        display = xlib.XOpenDisplay(None)
+        if not display:
+            print("Clipboard monitoring error: could not open X display")
+            return
+        try:
+            event_base = ctypes.c_int()
+            error_base = ctypes.c_int()
+            if not xfixes.XFixesQueryExtension(display, ctypes.byref(event_base), ctypes.byref(error_base)):
+                print("Clipboard monitoring error: XFixes extension is not available")
+                return
+            clipboard_atom = xlib.XInternAtom(display, b"CLIPBOARD", 0)
+            xfixes.XFixesSelectSelectionInput(
+                display, xlib.XDefaultRootWindow(display), clipboard_atom,
+                self.XFixesSetSelectionOwnerNotifyMask
+            )
+            # XEvent is a union padded to 24 longs
+            event = (ctypes.c_long * 24)()
+            event_type = ctypes.cast(event, ctypes.POINTER(ctypes.c_int))
+            x_fd = xlib.XConnectionNumber(display)
+
+            self._emit(self._read())
+            while not self._stop_event.is_set():
+                changed = False
+                while xlib.XPending(display):
+                    xlib.XNextEvent(display, event)
+                    if event_type[0] == event_base.value + self.XFixesSelectionNotify:
+                        changed = True
+                if changed:
+                    self._emit(self._read())
+                    continue
+                ready, _, _ = select.select([x_fd, self._wake_r], [], [])
+                if self._wake_r in ready:
+                    os.read(self._wake_r, 64)
+        finally:
+            xlib.XCloseDisplay(display)
+
+
+class WaylandClipboardWatcher(ClipboardWatcher):
+    name = 'wayland'
+
+    def __init__(self, on_change, paste=None):
+        super().__init__(on_change, paste)
+        self._process = None
+
+    @classmethod
+    def is_available(cls):
+        return bool(os.environ.get('WAYLAND_DISPLAY') and shutil.which('wl-paste'))
+
+    def _wake(self):
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+
+    def _run(self):
+        # wl-paste blocks on the compositor and runs the command once per change
+        self._process = subprocess.Popen(
+            ['wl-paste', '--watch', 'echo'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        try:
+            for _ in self._process.stdout:
+                if self._stop_event.is_set():
+                    break
+                self._emit(self._read())
+        finally:
+            self._wake()
+            self._process.wait()
+
+
+BACKENDS = {
+    'win32': WindowsClipboardWatcher,
+    'x11': X11ClipboardWatcher,
+    'wayland': WaylandClipboardWatcher,
+    'poll': PollingClipboardWatcher,
+    'fake': FakeClipboardWatcher,
+}
+
+NATIVE_BACKENDS = ('win32', 'wayland', 'x11')
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if backend.is_available()]
+
+
+def create_clipboard_watcher(on_change, backend='auto', paste=None, **options):
+    if backend == 'auto':
+        for name in NATIVE_BACKENDS:
+            if BACKENDS[name].is_available():
+                return BACKENDS[name](on_change, paste=paste)
+        backend = 'poll'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown clipboard backend: {backend}")
+    return BACKENDS[backend](on_change, paste=paste, **options)
@@ -0,0 +1,262 @@
+import asyncio
+import collections
+import json
+import math
+import os
+import random
+import ssl
+import statistics
+import struct
+import time
+from urllib.parse import urlsplit
+
+from pchelper.metrics import instrument
+
+ProbeResult = collections.namedtuple('ProbeResult', ['name', 'samples', 'latency', 'jitter', 'loss', 'error'])
+ConnectivityReport = collections.namedtuple('ConnectivityReport', ['online', 'quorum', 'results', 'duration'])
+
+
+class ProbeError(Exception):
+    pass
+
+
+class TcpProbe:
+    kind = 'tcp'
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.name = f"TCP {host}:{port}"
+
+    async def run(self):
+        _, writer = await asyncio.open_connection(self.host, self.port)
+        writer.close()
+
+
+class _DnsProtocol(asyncio.DatagramProtocol):
+    def __init__(self, query_id, answered):
+        self.query_id = query_id
+        self.answered = answered
+
+    def datagram_received(self, data, addr):
+        # Any reply to our query counts, NXDOMAIN included: the resolver was reached
+        if len(data) >= 4 and struct.unpack_from('!H', data)[0] == self.query_id and data[2] & 0x80:
+            if not self.answered.done():
+                self.answered.set_result(data)
+
+    def error_received(self, exc):
+        if not self.answered.done():
+            self.answered.set_exception(exc)
+
+
+def encode_label(part):
+    label = part.encode('idna')
+    # The length prefix is six bits; idna rejects long labels too, but not every ASCII one
+    if not 0 < len(label) < 64:
+        raise ValueError(f"label {part!r} is empty or longer than 63 bytes")
+    return bytes([len(label)]) + label
+
+
+class DnsProbe:
+    # Sends one A query straight to the resolver over UDP, so it needs neither a thread nor the system resolver
+    kind = 'dns'
+
+    def __init__(self, hostname, server, port=53):
+        self.hostname = hostname
+        self.server = server
+        self.port = port
+        self.name = f"DNS {hostname} @{server}" if port == 53 else f"DNS {hostname} @{server}:{port}"
+
+    def _query(self, query_id):
+        try:
+            labels = b''.join(encode_label(part) for part in self.hostname.rstrip('.').split('.'))
+        except (UnicodeError, ValueError) as e:
+            raise ProbeError(f"invalid hostname {self.hostname!r}: {str(e)}")
+        # Recursion desired, one question of type A, class IN
+        return struct.pack('!HHHHHH', query_id, 0x0100, 1, 0, 0, 0) + labels + b'\x00' + struct.pack('!HH', 1, 1)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        query_id = random.randrange(1 << 16)
+        answered = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DnsProtocol(query_id, answered), remote_addr=(self.server, self.port)
+        )
+        try:
+            transport.sendto(self._query(query_id))
+            await answered
+        finally:
+            transport.close()
+
+
+class HttpHeadProbe:
+    kind = 'http'
+
+    def __init__(self, url, expect_status=None):
+        self.url = url
+        self.expect_status = expect_status
+        self.name = f"HTTP {url}"
+
+    async def run(self):
+        parts = urlsplit(self.url)
+        secure = parts.scheme == 'https'
+        port = parts.port or (443 if secure else 80)
+        reader, writer = await asyncio.open_connection(
+            parts.hostname, port, ssl=ssl.create_default_context() if secure else None
+        )
+        try:
+            path = parts.path or '/'
+            if parts.query:
+                path += '?' + parts.query
+            writer.write(
+                f"HEAD {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nUser-Agent: PcHelperApp\r\n"
+                f"Connection: close\r\n\r\n".encode('ascii')
+            )
+            await writer.drain()
+            status_line = await reader.readline()
+        finally:
+            writer.close()
+        fields = status_line.split()
+        if len(fields) < 2 or not fields[0].startswith(b'HTTP/') or not fields[1].isdigit():
+            raise ProbeError(f"unexpected reply from {self.url}")
+        status = int(fields[1])
+        # A captive portal answers too, but with a redirect or a login page instead of the expected status
+        if self.expect_status is not None and status != self.expect_status:
+            raise ProbeError(f"{self.url} answered {status}, expected {self.expect_status}")
+
+
+PROBE_TYPES = {probe.kind: probe for probe in (TcpProbe, DnsProbe, HttpHeadProbe)}
+
+
+def default_probes():
+    return [
+        TcpProbe("8.8.8.8", 53),
+        TcpProbe("1.1.1.1", 443),
+        DnsProbe("example.com", "1.1.1.1"),
+        HttpHeadProbe("http://connectivitycheck.gstatic.com/generate_204", expect_status=204),
+    ]
+
+
+def probe_from_dict(data):
+    data = dict(data)
+    kind = data.pop('type', None)
+    if kind not in PROBE_TYPES:
+        raise ValueError(f"Unknown probe type: {kind}")
+    return PROBE_TYPES[kind](**data)
+
+
+def summarize(name, samples, error=None):
+    # samples holds one latency in seconds per attempt, or None where the attempt failed.
+    # A probe cancelled before its first attempt finished has no samples and no loss figure.
+    latencies = [sample for sample in samples if sample is not None]
+    latency = statistics.median(latencies) if latencies else None
+    # Mean change between consecutive answers, as RTP receivers estimate interarrival jitter
+    jitter = statistics.mean(abs(b - a) for a, b in zip(latencies, latencies[1:])) if len(latencies) > 1 else 0.0
+    loss = 1 - len(latencies) / len(samples) if samples else None
+    return ProbeResult(name, list(samples), latency, jitter, loss, error)
+
+
+class ConnectivityChecker:
+    FIELDS = ('quorum', 'samples', 'timeout', 'interval', 'max_concurrent', 'probes')
+
+    def __init__(self, probes=None, quorum=2, samples=3, timeout=3.0, interval=0.2, max_concurrent=None):
+        self.probes = list(probes) if probes is not None else default_probes()
+        self.quorum = min(quorum, len(self.probes))
+        self.samples = samples
+        self.timeout = timeout
+        self.interval = interval
+        # Caps how many probe connections are open at the same time; None lets every probe run at once
+        self.max_concurrent = max_concurrent
+
+    @classmethod
+    def from_dict(cls, data):
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown connectivity settings: {', '.join(sorted(unknown))}")
+        data = dict(data)
+        if 'probes' in data:
+            data['probes'] = [probe_from_dict(probe) for probe in data['probes']]
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    async def sample(self, probe):
+        started = time.perf_counter()
+        await asyncio.wait_for(probe.run(), self.timeout)
+        return time.perf_counter() - started
+
+    def deadline(self):
+        # Longest a check can legitimately take: every sample timing out, in as many rounds as the
+        # concurrency limit forces, plus a second of slack
+        rounds = math.ceil(len(self.probes) / self.max_concurrent) if self.max_concurrent else 1
+        return rounds * self.samples * (self.timeout + self.interval) + 1.0
+
+    @instrument('net.check')
+    async def check_async(self, wait_for_all=False):
+        # Every probe takes its samples concurrently. The verdict is in as soon as `quorum` probes have
+        # answered once (online) or too many have failed outright (offline); unless wait_for_all is set,
+        # the remaining samples are then cancelled and the report covers what was measured so far.
+        started = time.perf_counter()
+        samples = [[] for _ in self.probes]
+        errors = {}
+        decided = asyncio.Event()
+        answered = set()
+        failed = set()
+        limit = asyncio.Semaphore(self.max_concurrent) if self.max_concurrent else None
+
+        def settle():
+            if len(answered) >= self.quorum or len(failed) > len(self.probes) - self.quorum:
+                decided.set()
+
+        async def run_probe(i, probe):
+            try:
+                for attempt in range(self.samples):
+                    if attempt:
+                        await asyncio.sleep(self.interval)
+                    try:
+                        if limit is None:
+                            samples[i].append(await self.sample(probe))
+                        else:
+                            async with limit:
+                                samples[i].append(await self.sample(probe))
+                        answered.add(i)
+                    # Anything a probe raises is a failed sample; letting it escape would leave the
+                    # quorum waiting on a probe that will never report
+                    except Exception as e:
+                        samples[i].append(None)
+                        errors[i] = str(e) or type(e).__name__
+                    settle()
+            finally:
+                if i not in answered:
+                    failed.add(i)
+                    settle()
+
+        tasks = [asyncio.create_task(run_probe(i, probe)) for i, probe in enumerate(self.probes)]
+        try:
+            # Once every probe has finished one side of the quorum has necessarily been reached; the
+            # deadline only guards against a probe that hangs despite its own timeout
+            await asyncio.wait_for(asyncio.gather(*tasks) if wait_for_all else decided.wait(), self.deadline())
+        except asyncio.TimeoutError:
+            for i in range(len(self.probes)):
+                if i not in answered:
+                    errors.setdefault(i, "no verdict before the check deadline")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = [summarize(probe.name, samples[i], errors.get(i)) for i, probe in enumerate(self.probes)]
+        return ConnectivityReport(
+            online=len(answered) >= self.quorum,
+            quorum=self.quorum,
+            results=results,
+            duration=time.perf_counter() - started,
+        )
+
+    def check(self, wait_for_all=False):
+        return asyncio.run(self.check_async(wait_for_all))
@@ -0,0 +1,311 @@
+import collections
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+
+from pchelper.metrics import instrument
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS dirs (
+        path TEXT PRIMARY KEY,
+        root TEXT NOT NULL,
+        parent TEXT,
+        mtime_ns INTEGER
+    )''',
+    '''CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY,
+        root TEXT NOT NULL,
+        dir TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs(parent)',
+    'CREATE INDEX IF NOT EXISTS idx_files_dir ON files(dir)',
+    'CREATE INDEX IF NOT EXISTS idx_files_root ON files(root)',
+)
+
+
+class IndexedEntry(collections.namedtuple('IndexedEntry', ['path', 'name'])):
+    # Stands in for an os.DirEntry when the cleaner walks the index. The index only says which files exist:
+    # an in-place write leaves the folder's mtime alone, so the recorded size and age can be stale and
+    # stat() always asks the file system.
+
+    def stat(self, follow_symlinks=False):
+        return os.lstat(self.path)
+
+
+def trash_dir():
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(data_home, 'Trash')
+
+
+def cleanable_locations():
+    locations = {'temp': tempfile.gettempdir()}
+    # The Windows Recycle Bin is not a plain folder, so it is only indexed where the freedesktop Trash exists
+    if os.name != 'nt' and os.path.isdir(trash_dir()):
+        locations['trash'] = trash_dir()
+    return locations
+
+
+def _subtree_bounds(path):
+    # Every path strictly below `path` sorts between these two strings, so subtree deletes can use the indexes
+    return path + os.sep, path + chr(ord(os.sep) + 1)
+
+
+class InotifyWatcher:
+    # Marks directories dirty as the kernel reports changes in them; refresh() then rescans only those.
+    # Anything that could make the picture incomplete (queue overflow, watch limit, moved folders) clears
+    # `reliable`, and the index falls back to a full mtime walk.
+
+    IN_MODIFY = 0x2
+    IN_ATTRIB = 0x4
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ONLYDIR = 0x1000000
+    IN_DONT_FOLLOW = 0x2000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+                  IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wake_r, self._wake_w = os.pipe()
+        self._lock = threading.Lock()
+        self._paths = {}
+        self._watched = set()
+        self._dirty = set()
+        self._stop_event = threading.Event()
+        self.reliable = True
+        self._thread = threading.Thread(target=self._run, name="disk-index-inotify", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def is_available(cls):
+        return sys.platform.startswith('linux') and bool(ctypes.util.find_library('c'))
+
+    def watch(self, path):
+        if path in self._watched:
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            if ctypes.get_errno() == errno.ENOSPC:
+                # Out of watches (fs.inotify.max_user_watches); this location has to be walked
+                self.reliable = False
+            return
+        with self._lock:
+            self._paths[wd] = path
+            self._watched.add(path)
+
+    def begin_full_scan(self, root):
+        # Called before a full walk, which covers everything that happened so far
+        with self._lock:
+            self.reliable = True
+            self._dirty = {path for path in self._dirty if not self._under(path, root)}
+
+    def take_dirty(self, root):
+        with self._lock:
+            taken = {path for path in self._dirty if self._under(path, root)}
+            self._dirty -= taken
+        return taken
+
+    @staticmethod
+    def _under(path, root):
+        return path == root or path.startswith(root + os.sep)
+
+    def close(self):
+        self._stop_event.set()
+        try:
+            os.write(self._wake_w, b'x')
+        except OSError:
+            pass
+        self._thread.join(2)
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            ready, _, _ = select.select([self._fd, self._wake_r], [], [])
+            if self._wake_r in ready:
+                os.read(self._wake_r, 64)
+            if self._fd in ready:
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self._handle(data)
+
+    def _handle(self, data):
+        header = self.EVENT_HEADER
+        offset = 0
+        with self._lock:
+            while offset < len(data):
+                wd, mask, _, length = header.unpack_from(data, offset)
+                offset += header.size + length
+                if mask & self.IN_Q_OVERFLOW:
+                    self.reliable = False
+                    continue
+                path = self._paths.get(wd)
+                if path is None:
+                    continue
+                if mask & self.IN_MOVE_SELF:
+                    self.reliable = False
+                if mask & self.IN_IGNORED:
+                    del self._paths[wd]
+                    self._watched.discard(path)
+                    continue
+                self._dirty.add(path)
+
+
+class DiskUsageIndex:
+    # Persistent record of every file under the cleanable locations. A refresh restats directories only:
+    # a folder whose mtime has not moved keeps its file list, and with inotify only reported folders are read.
+
+    def __init__(self, db_path='disk_index.db', watch=True):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+        self._lock = threading.RLock()
+        self._scanned = set()
+        self.watcher = None
+        if watch and InotifyWatcher.is_available():
+            try:
+                self.watcher = InotifyWatcher()
+            except OSError as e:
+                print(f"Disk index error: {str(e)}")
+
+    @instrument('disk_index.refresh')
+    def refresh(self, root):
+        with self._lock, self.conn:
+            watcher = self.watcher
+            if watcher is not None and watcher.reliable and root in self._scanned:
+                new_dirs = []
+                for path in watcher.take_dirty(root):
+                    if os.path.isdir(path):
+                        new_dirs.extend(self._rescan(root, path)[1])
+                    else:
+                        self._forget_dir(path)
+                self._walk(root, new_dirs)
+            else:
+                if watcher is not None:
+                    watcher.begin_full_scan(root)
+                self._walk(root, [root])
+                self._scanned.add(root)
+        return self.usage(root)
+
+    def usage(self, root):
+        with self._lock:
+            files, size = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files WHERE root = ?', (root,)
+            ).fetchone()
+        return files, size
+
+    def children(self, path):
+        with self._lock:
+            dirs = [
+                IndexedEntry(row[0], os.path.basename(row[0]))
+                for row in self.conn.execute('SELECT path FROM dirs WHERE parent = ?', (path,))
+            ]
+            files = [
+                IndexedEntry(row[0], os.path.basename(row[0]))
+                for row in self.conn.execute('SELECT path FROM files WHERE dir = ?', (path,))
+            ]
+        return dirs, files
+
+    def close(self):
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
+        self.conn.close()
+
+    def _walk(self, root, start):
+        stack = list(start)
+        while stack:
+            path = stack.pop()
+            if self.watcher is not None:
+                # Watch before reading, so nothing that changes during the scan is missed
+                self.watcher.watch(path)
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                self._forget_dir(path)
+                continue
+            row = self.conn.execute('SELECT mtime_ns FROM dirs WHERE path = ?', (path,)).fetchone()
+            if row is not None and row[0] == mtime_ns:
+                # Nothing was added, removed or renamed here since the last scan
+                stack.extend(r[0] for r in self.conn.execute('SELECT path FROM dirs WHERE parent = ?', (path,)))
+                continue
+            stack.extend(self._rescan(root, path, mtime_ns)[0])
+
+    def _rescan(self, root, path, mtime_ns=None):
+        # Reads one directory and brings its rows up to date; returns its subdirectories and the ones not seen before
+        if mtime_ns is None:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                self._forget_dir(path)
+                return [], []
+        found_files = {}
+        found_dirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            found_dirs.append(entry.path)
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    found_files[entry.path] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            self._forget_dir(path)
+            return [], []
+
+        conn = self.conn
+        indexed = {row[0]: (row[1], row[2]) for row in
+                   conn.execute('SELECT path, size, mtime_ns FROM files WHERE dir = ?', (path,))}
+        conn.executemany(
+            'INSERT OR REPLACE INTO files (path, root, dir, size, mtime_ns) VALUES (?, ?, ?, ?, ?)',
+            [(p, root, path, size, mtime) for p, (size, mtime) in found_files.items() if indexed.get(p) != (size, mtime)]
+        )
+        conn.executemany('DELETE FROM files WHERE path = ?', [(p,) for p in indexed if p not in found_files])
+
+        known_dirs = {row[0] for row in conn.execute('SELECT path FROM dirs WHERE parent = ?', (path,))}
+        for gone in known_dirs.difference(found_dirs):
+            self._forget_dir(gone)
+        new_dirs = [d for d in found_dirs if d not in known_dirs]
+        conn.executemany('INSERT INTO dirs (path, root, parent, mtime_ns) VALUES (?, ?, ?, NULL)',
+                         [(d, root, path) for d in new_dirs])
+        parent = None if path == root else os.path.dirname(path)
+        conn.execute('INSERT OR REPLACE INTO dirs (path, root, parent, mtime_ns) VALUES (?, ?, ?, ?)',
+                     (path, root, parent, mtime_ns))
+        return found_dirs, new_dirs
+
+    def _forget_dir(self, path):
+        low, high = _subtree_bounds(path)
+        self.conn.execute('DELETE FROM files WHERE dir = ? OR (dir >= ? AND dir < ?)', (path, low, high))
+        self.conn.execute('DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)', (path, low, high))
@@ -0,0 +1,122 @@
+import collections
+import unicodedata
+
+from pchelper.metrics import instrument
+
+# Live filtering works on an in-memory copy of the newest entries; full-text search covers the rest
+LIVE_INDEX_LIMIT = 20000
+# Only the start of very large entries is kept in the in-memory index
+MAX_KEY_LENGTH = 4000
+
+SearchQuery = collections.namedtuple('SearchQuery', ['text', 'mode'])
+
+MODE_LIVE = 'live'
+MODE_FUZZY = 'fuzzy'
+MODE_FULL_TEXT = 'fts'
+
+
+def normalize(text):
+    text = text[:MAX_KEY_LENGTH].casefold()
+    if text.isascii():
+        return text
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def subsequence_span(query, key):
+    # Length of the stretch of key that holds query's characters in order, or None if they are not all there
+    start = key.find(query[0])
+    if start < 0:
+        return None
+    position = start
+    for char in query[1:]:
+        position = key.find(char, position + 1)
+        if position < 0:
+            return None
+    return position - start + 1
+
+
+class HistorySearchIndex:
+    def __init__(self, entries):
+        self.entries = entries
+        self.keys = [normalize(entry.content) for entry in entries]
+
+    @classmethod
+    def from_store(cls, store, limit=LIVE_INDEX_LIMIT):
+        return cls(store.get_entries(limit))
+
+    def match(self, key, fuzzy=False, candidates=None):
+        positions = range(len(self.keys)) if candidates is None else candidates
+        keys = self.keys
+        if not key:
+            return list(positions)
+        if not fuzzy:
+            return [i for i in positions if key in keys[i]]
+
+        scored = []
+        for i in positions:
+            if key in keys[i]:
+                scored.append((0, i))
+            else:
+                span = subsequence_span(key, keys[i])
+                if span is not None:
+                    scored.append((span, i))
+        # Plain substring hits first, then the tightest subsequence matches; recency breaks ties
+        scored.sort()
+        return [i for _, i in scored]
+
+
+class IncrementalSearch:
+    def __init__(self, index):
+        self.index = index
+        self.last_key = None
+        self.last_fuzzy = None
+        self.last_positions = None
+
+    def search(self, query, fuzzy=False):
+        key = normalize(query)
+        if key == self.last_key and fuzzy == self.last_fuzzy:
+            return self.last_positions
+
+        # A longer query can only match a subset of what the shorter one matched
+        candidates = None
+        if self.last_key is not None and fuzzy == self.last_fuzzy and key.startswith(self.last_key):
+            candidates = self.last_positions
+
+        self.last_positions = self.index.match(key, fuzzy, candidates)
+        self.last_key = key
+        self.last_fuzzy = fuzzy
+        return self.last_positions
+
+
+class HistorySearchSource:
+    # fetch/count pair for VirtualHistoryList; call it from one worker thread only. The live index is
+    # rebuilt once the store's generation moves on, so entries copied, pinned, cleared or removed by
+    # retention while the window is open show up in the next query.
+
+    def __init__(self, store):
+        self.store = store
+        self.incremental = None
+        self.generation = None
+
+    def _live_match(self, query):
+        generation = getattr(self.store, 'generation', None)
+        if generation != self.generation:
+            self.incremental = None
+        incremental = self.incremental
+        if incremental is None:
+            # Read before building, so a change made during the build still triggers the next rebuild
+            self.generation = generation
+            incremental = self.incremental = IncrementalSearch(HistorySearchIndex.from_store(self.store))
+        return incremental.index.entries, incremental.search(query.text, fuzzy=query.mode == MODE_FUZZY)
+
+    @instrument('history_search.fetch')
+    def fetch(self, query, offset, limit):
+        if query.mode == MODE_FULL_TEXT or not query.text.strip():
+            return self.store.search_entries(query.text, limit, offset)
+        entries, positions = self._live_match(query)
+        return [entries[i] for i in positions[offset:offset + limit]]
+
+    def count(self, query):
+        if query.mode == MODE_FULL_TEXT or not query.text.strip():
+            return self.store.count_entries(query.text)
+        return len(self._live_match(query)[1])
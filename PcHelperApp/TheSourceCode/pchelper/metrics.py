@@ -0,0 +1,185 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+# Upper bounds in seconds, Prometheus style; the last bucket catches everything slower
+BUCKETS = (
+    0.00001, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, float('inf'),
+)
+
+# inspect.CO_COROUTINE; this module loads at startup and inspect is slow to import
+CO_COROUTINE = 0x80
+
+
+class Histogram:
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, fraction):
+        # Interpolates inside the bucket the quantile falls in; the open last bucket ends at the slowest sample
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.bounds[i - 1] if i else 0.0
+                high = min(self.bounds[i], self.max)
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'max': self.max if self.count else None,
+        }
+
+
+class _Timing:
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+        if exc_type is not None:
+            self.metrics.count(f"{self.name}.errors")
+        return False
+
+
+class _NoTiming:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_TIMING = _NoTiming()
+
+
+class Metrics:
+    # Latency histograms and counters per action name. While disabled, timed() hands out a shared
+    # do-nothing context manager and instrumented functions only pay for one attribute check.
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def timed(self, name):
+        if not self.enabled:
+            return _NO_TIMING
+        return _Timing(self, name)
+
+    def instrument(self, name):
+        def decorate(func):
+            if func.__code__.co_flags & CO_COROUTINE:
+                @functools.wraps(func)
+                async def timed_coroutine(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    with _Timing(self, name):
+                        return await func(*args, **kwargs)
+                return timed_coroutine
+
+            @functools.wraps(func)
+            def timed_call(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Timing(self, name):
+                    return func(*args, **kwargs)
+            return timed_call
+        return decorate
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'timings': {name: histogram.summary() for name, histogram in sorted(self._histograms.items())},
+                'counters': dict(sorted(self._counters.items())),
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        lines = ['# TYPE pchelper_action_seconds histogram']
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            for name, histogram in histograms:
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'pchelper_action_seconds_bucket{{action="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'pchelper_action_seconds_sum{{action="{name}"}} {histogram.sum!r}')
+                lines.append(f'pchelper_action_seconds_count{{action="{name}"}} {histogram.count}')
+        lines.append('# TYPE pchelper_events_total counter')
+        lines.extend(f'pchelper_events_total{{event="{name}"}} {value}' for name, value in counters)
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        # .prom and .txt files get the Prometheus text format, anything else JSON
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+# One registry for the whole process; PCHELPER_METRICS=1 turns recording on from the start
+METRICS = Metrics(enabled=os.environ.get('PCHELPER_METRICS') == '1')
+timed = METRICS.timed
+instrument = METRICS.instrument
+count = METRICS.count
@@ -0,0 +1,213 @@
+import array
+import asyncio
+import collections
+import math
+import sqlite3
+import threading
+import time
+
+from pchelper.connectivity import ConnectivityChecker
+
+RETENTION_DAYS = 30
+
+MonitorSnapshot = collections.namedtuple('MonitorSnapshot', ['online', 'last_latency', 'checked_at', 'recent', 'p50', 'p90'])
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def downsample(values, buckets):
+    # Keeps the worst sample of each bucket, so a short spike still shows up in a narrow sparkline.
+    # NaN stands for a lost sample and wins over any latency.
+    if len(values) <= buckets:
+        return list(values)
+    result = []
+    step = len(values) / buckets
+    for i in range(buckets):
+        chunk = values[int(i * step):int((i + 1) * step)] or values[int(i * step):int(i * step) + 1]
+        result.append(math.nan if any(math.isnan(v) for v in chunk) else max(chunk))
+    return result
+
+
+class LatencyRing:
+    # Fixed-size circular buffer of (timestamp, latency) pairs in two flat double arrays;
+    # a lost sample is stored as NaN
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array.array('d', bytes(8 * capacity))
+        self.latencies = array.array('d', bytes(8 * capacity))
+        self.start = 0
+        self.count = 0
+
+    def append(self, timestamp, latency):
+        end = (self.start + self.count) % self.capacity
+        self.times[end] = timestamp
+        self.latencies[end] = math.nan if latency is None else latency
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def __len__(self):
+        return self.count
+
+    def _ordered(self, data):
+        end = self.start + self.count
+        if end <= self.capacity:
+            return data[self.start:end]
+        return data[self.start:] + data[:end - self.capacity]
+
+    def values(self):
+        return self._ordered(self.latencies)
+
+    def between(self, start, end):
+        return [latency for t, latency in zip(self._ordered(self.times), self.values()) if start <= t < end]
+
+
+class NetworkHealthStore:
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS latency_rollups (
+                    period_start INTEGER PRIMARY KEY,
+                    samples INTEGER NOT NULL,
+                    lost INTEGER NOT NULL,
+                    p50 REAL,
+                    p90 REAL,
+                    p99 REAL,
+                    max REAL
+                )
+            ''')
+        self._lock = threading.Lock()
+
+    def add_rollup(self, period_start, latencies):
+        answered = sorted(v for v in latencies if not math.isnan(v))
+        row = (
+            int(period_start), len(latencies), len(latencies) - len(answered),
+            percentile(answered, 0.5), percentile(answered, 0.9), percentile(answered, 0.99),
+            answered[-1] if answered else None,
+        )
+        with self._lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO latency_rollups VALUES (?, ?, ?, ?, ?, ?, ?)', row)
+            self.conn.execute('DELETE FROM latency_rollups WHERE period_start < ?',
+                              (int(time.time()) - RETENTION_DAYS * 86400,))
+
+    def history(self, since):
+        with self._lock:
+            return self.conn.execute(
+                'SELECT period_start, samples, lost, p50, p90, p99, max FROM latency_rollups '
+                'WHERE period_start >= ? ORDER BY period_start', (int(since),)
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class NetworkMonitor:
+    # One thread runs one asyncio loop; each tick is a single quorum check with one sample per probe,
+    # so at most `max_sockets` connections are ever open at once. Raw samples live in a ring buffer
+    # and are rolled up into percentiles per `rollup_seconds` in network_health.db.
+
+    def __init__(self, checker=None, interval=10, db_path='network_health.db', capacity=360, rollup_seconds=60,
+                 max_sockets=4):
+        checker = checker or ConnectivityChecker()
+        self.checker = ConnectivityChecker(checker.probes, quorum=checker.quorum, samples=1,
+                                           timeout=checker.timeout, max_concurrent=max_sockets)
+        self.interval = interval
+        self.rollup_seconds = rollup_seconds
+        self.ring = LatencyRing(capacity)
+        self.store = NetworkHealthStore(db_path)
+        self.online = None
+        self.checked_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loop = None
+        self._task = None
+
+    def start(self):
+        if self._thread is None:
+            self._loop = asyncio.new_event_loop()
+            self._task = self._loop.create_task(self._monitor())
+            self._thread = threading.Thread(target=self._run, name="network-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        if self._thread is not None:
+            # Cancelling interrupts a check in progress too, so stopping never waits for a probe timeout
+            self._loop.call_soon_threadsafe(self._task.cancel)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self.store.close()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def snapshot(self, points=60):
+        with self._lock:
+            values = self.ring.values()
+            online, checked_at = self.online, self.checked_at
+        answered = sorted(v for v in values if not math.isnan(v))
+        return MonitorSnapshot(
+            online=online,
+            last_latency=None if not values or math.isnan(values[-1]) else values[-1],
+            checked_at=checked_at,
+            recent=downsample(values, points),
+            p50=percentile(answered, 0.5),
+            p90=percentile(answered, 0.9),
+        )
+
+    def history(self, hours=24):
+        return self.store.history(time.time() - hours * 3600)
+
+    def record(self, timestamp, online, latency):
+        with self._lock:
+            self.ring.append(timestamp, latency if online else None)
+            self.online = online
+            self.checked_at = timestamp
+
+    def _run(self):
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _monitor(self):
+        period_start = time.time() // self.rollup_seconds * self.rollup_seconds
+        while True:
+            tick = time.monotonic()
+            try:
+                report = await self.checker.check_async()
+                latencies = [result.latency for result in report.results if result.latency is not None]
+                self.record(time.time(), report.online, min(latencies) if latencies else None)
+            except Exception as e:
+                print(f"Network monitor error: {str(e)}")
+
+            now = time.time()
+            if now >= period_start + self.rollup_seconds:
+                with self._lock:
+                    window = self.ring.between(period_start, period_start + self.rollup_seconds)
+                if window:
+                    try:
+                        self.store.add_rollup(period_start, window)
+                    except sqlite3.Error as e:
+                        print(f"Database error: {str(e)}")
+                period_start = now // self.rollup_seconds * self.rollup_seconds
+
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - tick)))
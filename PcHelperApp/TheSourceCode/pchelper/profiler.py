@@ -0,0 +1,106 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+DEFAULT_INTERVAL = 0.01
+
+
+def frame_label(code):
+    # One entry per function rather than per line, so a loop does not split into many frames
+    name = getattr(code, 'co_qualname', code.co_name)
+    label = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    # ';' separates frames in the collapsed format
+    return label.replace(';', ':')
+
+
+class SamplingProfiler:
+    # Samples the stack of every thread from a background thread and counts identical stacks. The
+    # result is the collapsed format flamegraph.pl and speedscope read: one "thread;outer;...;inner count"
+    # line per stack. Nothing runs until start(), and stop() ends the thread, so an idle profiler
+    # costs nothing.
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._lock = threading.Lock()
+        self._stacks = collections.Counter()
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        # Starting again begins a new profile
+        if self.running:
+            return self
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.stopped_at = time.time()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(skip=own)
+
+    def sample(self, skip=None):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        stacks = []
+        for ident, frame in frames.items():
+            if ident == skip:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = self._labels.get(code)
+                if label is None:
+                    label = self._labels[code] = frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}").replace(';', ':'))
+            stacks.append(';'.join(reversed(stack)))
+        # Drop the frame references before the next sleep so no thread's locals are kept alive
+        frames = frame = None
+        with self._lock:
+            self._stacks.update(stacks)
+            self.samples += 1
+
+    def stacks(self):
+        with self._lock:
+            return dict(self._stacks.most_common())
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.stacks().items()))
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+
+    def summary(self):
+        end = self.stopped_at or time.time()
+        return {
+            'samples': self.samples,
+            'seconds': round(end - self.started_at, 3) if self.started_at else 0.0,
+            'stacks': len(self._stacks),
+        }
@@ -0,0 +1,119 @@
+import collections
+import json
+import os
+import time
+
+# Bytes as stored: length() of a TEXT body counts characters, so it is measured as a BLOB. Images and
+# HTML add the size of their blob file.
+STORED_BYTES = 'length(CAST(body AS BLOB)) + (CASE WHEN blob IS NULL THEN 0 ELSE size END)'
+
+CompactionStats = collections.namedtuple(
+    'CompactionStats',
+    ['finished_at', 'duration', 'entries_removed', 'occurrences_removed',
+     'bytes_removed', 'bytes_reclaimed', 'pages_vacuumed']
+)
+
+
+class RetentionPolicy:
+    FIELDS = ('max_entries', 'max_bytes', 'max_age_days', 'keep_pinned', 'compaction_interval', 'vacuum_min_pages')
+
+    def __init__(self, max_entries=50, max_bytes=None, max_age_days=None, keep_pinned=True,
+                 compaction_interval=60, vacuum_min_pages=64):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.keep_pinned = keep_pinned
+        self.compaction_interval = compaction_interval
+        self.vacuum_min_pages = vacuum_min_pages
+
+    @classmethod
+    def from_dict(cls, data):
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown retention settings: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+def enable_incremental_vacuum(conn):
+    # auto_vacuum can only change on an existing database through a full VACUUM, which is done once
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+
+
+def _scalar(conn, sql, params=()):
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def _database_size(conn):
+    return _scalar(conn, 'PRAGMA page_count') * _scalar(conn, 'PRAGMA page_size')
+
+
+def compact(conn, policy):
+    started = time.perf_counter()
+    size_before = _database_size(conn)
+    entries_before = _scalar(conn, 'SELECT COUNT(*) FROM entries')
+    occurrences_before = _scalar(conn, 'SELECT COUNT(*) FROM occurrences')
+    bytes_before = _scalar(conn, f'SELECT COALESCE(SUM({STORED_BYTES}), 0) FROM entries')
+    removable = 'pinned = 0' if policy.keep_pinned else '1'
+
+    with conn:
+        if policy.max_age_days is not None:
+            cutoff = f'-{policy.max_age_days} days'
+            conn.execute(f"DELETE FROM entries WHERE {removable} AND last_seen < datetime('now', ?)", (cutoff,))
+            # Old copies of the entries that stay are dropped too, except those of kept pinned entries,
+            # and seen_count is brought back in line with the copies left
+            aged = f"timestamp < datetime('now', ?) AND entry_id IN (SELECT id FROM entries WHERE {removable})"
+            affected = conn.execute(f'SELECT DISTINCT entry_id FROM occurrences WHERE {aged}', (cutoff,)).fetchall()
+            conn.execute(f'DELETE FROM occurrences WHERE {aged}', (cutoff,))
+            conn.executemany('''
+                UPDATE entries SET seen_count = (SELECT COUNT(*) FROM occurrences WHERE entry_id = entries.id)
+                WHERE id = ?
+            ''', affected)
+
+        if policy.max_entries is not None:
+            excess = _scalar(conn, f'SELECT COUNT(*) FROM entries WHERE {removable}') - policy.max_entries
+            if excess > 0:
+                conn.execute(f'''
+                    DELETE FROM entries WHERE id IN (
+                        SELECT id FROM entries WHERE {removable} ORDER BY last_seen_id LIMIT ?
+                    )
+                ''', (excess,))
+
+        if policy.max_bytes is not None:
+            excess = _scalar(conn, f'SELECT COALESCE(SUM({STORED_BYTES}), 0) FROM entries WHERE {removable}') - policy.max_bytes
+            doomed = []
+            if excess > 0:
+                for entry_id, size in conn.execute(
+                        f'SELECT id, {STORED_BYTES} FROM entries WHERE {removable} ORDER BY last_seen_id'):
+                    doomed.append((entry_id,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+            conn.executemany('DELETE FROM entries WHERE id = ?', doomed)
+
+    pages_vacuumed = _scalar(conn, 'PRAGMA freelist_count')
+    if pages_vacuumed >= policy.vacuum_min_pages:
+        conn.execute(f'PRAGMA incremental_vacuum({pages_vacuumed})').fetchall()
+    else:
+        pages_vacuumed = 0
+
+    return CompactionStats(
+        finished_at=time.time(),
+        duration=time.perf_counter() - started,
+        entries_removed=entries_before - _scalar(conn, 'SELECT COUNT(*) FROM entries'),
+        occurrences_removed=occurrences_before - _scalar(conn, 'SELECT COUNT(*) FROM occurrences'),
+        bytes_removed=bytes_before - _scalar(conn, f'SELECT COALESCE(SUM({STORED_BYTES}), 0) FROM entries'),
+        bytes_reclaimed=max(0, size_before - _database_size(conn)),
+        pages_vacuumed=pages_vacuumed,
+    )
@@ -0,0 +1,145 @@
+import collections
+import concurrent.futures
+import itertools
+import threading
+import time
+
+TaskStatus = collections.namedtuple('TaskStatus', ['name', 'state', 'submitted_at', 'started_at', 'running_for'])
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class Task:
+    def __init__(self, name, token):
+        self.name = name
+        self.token = token
+        self.future = None
+        self.submitted_at = time.time()
+        self.started_at = None
+
+    def cancel(self):
+        self.token.cancel()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def done(self):
+        return self.future is not None and self.future.done()
+
+
+class TaskScheduler:
+    # Runs named background tasks on a bounded pool. A task whose name is already queued or running is
+    # not started twice. Callbacks go through `post` (the UI dispatcher in the app) so they run on the
+    # thread that owns the widgets. Long-lived workers that keep their own thread register as services
+    # so they show up in status() and are stopped by shutdown().
+
+    def __init__(self, max_workers=4, post=None):
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task")
+        self._post = post or (lambda callback, *args: callback(*args))
+        self._lock = threading.Lock()
+        self._tasks = {}
+        self._services = {}
+        self._closed = False
+        self._ids = itertools.count(1)
+
+    def submit(self, name, func, *args, on_done=None, on_error=None, with_token=False, dedupe=True):
+        # with_token passes the task's CancelToken to func as `token`; cancelling only sets it, so
+        # func decides where it is safe to stop
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Task scheduler is shut down")
+            existing = self._tasks.get(name)
+            if dedupe and existing is not None:
+                return existing
+            if existing is not None:
+                name = f"{name}#{next(self._ids)}"
+            task = self._tasks[name] = Task(name, CancelToken())
+            task.future = self._executor.submit(self._run, task, func, args, on_done, on_error, with_token)
+        # Also covers tasks cancelled before they ever started
+        task.future.add_done_callback(lambda future: self._forget(task))
+        return task
+
+    def _forget(self, task):
+        with self._lock:
+            if self._tasks.get(task.name) is task:
+                del self._tasks[task.name]
+
+    def is_active(self, name):
+        with self._lock:
+            return name in self._tasks
+
+    def cancel(self, name):
+        with self._lock:
+            task = self._tasks.get(name)
+        if task is not None:
+            task.cancel()
+        return task is not None
+
+    def add_service(self, name, stop, running=None):
+        with self._lock:
+            self._services[name] = (stop, running, time.time())
+
+    def remove_service(self, name):
+        with self._lock:
+            self._services.pop(name, None)
+
+    def status(self):
+        now = time.time()
+        with self._lock:
+            tasks = list(self._tasks.values())
+            services = list(self._services.items())
+        result = [
+            TaskStatus(task.name, 'running' if task.started_at else 'queued', task.submitted_at, task.started_at,
+                       now - task.started_at if task.started_at else 0.0)
+            for task in tasks
+        ]
+        result.extend(
+            TaskStatus(name, 'service', started_at, started_at, now - started_at)
+            for name, (stop, running, started_at) in services
+            if running is None or running()
+        )
+        return result
+
+    def shutdown(self, timeout=5.0):
+        # Queued tasks are dropped and running ones are asked to stop, then given `timeout` seconds to
+        # reach a safe stopping point before the app goes on closing
+        with self._lock:
+            self._closed = True
+            tasks = list(self._tasks.values())
+            services = list(self._services.values())
+            self._services.clear()
+        for task in tasks:
+            task.cancel()
+        for stop, running, started_at in services:
+            try:
+                stop()
+            except Exception as e:
+                print(f"Service stop error: {str(e)}")
+        pending = [task.future for task in tasks if task.future is not None]
+        done, not_done = concurrent.futures.wait(pending, timeout=timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        return [task.name for task in tasks if task.future in not_done]
+
+    def _run(self, task, func, args, on_done, on_error, with_token):
+        task.started_at = time.time()
+        try:
+            result = func(*args, token=task.token) if with_token else func(*args)
+        except Exception as e:
+            print(f"Background task error ({task.name}): {str(e)}")
+            if on_error is not None:
+                self._post(on_error, e)
+            return
+        finally:
+            self._forget(task)
+        if on_done is not None:
+            self._post(on_done, result)
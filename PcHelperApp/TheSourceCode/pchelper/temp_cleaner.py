@@ -0,0 +1,207 @@
+import errno
+import os
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pchelper.metrics import instrument
+
+MAX_ERROR_SAMPLES = 100
+
+
+def format_size(num_bytes):
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class CleanReport:
+    def __init__(self, root, dry_run=False):
+        self.root = root
+        self.dry_run = dry_run
+        self.files = 0
+        self.dirs = 0
+        self.bytes = 0
+        self.errors = 0
+        self.skipped = 0
+        self.skipped_bytes = 0
+        self.error_samples = []
+        self.duration = 0.0
+        self.finished = False
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def add_file(self, size):
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+
+    def add_dir(self):
+        with self._lock:
+            self.dirs += 1
+
+    def add_skipped(self, size=0):
+        with self._lock:
+            self.skipped += 1
+            self.skipped_bytes += size
+
+    def add_error(self, path, error):
+        with self._lock:
+            self.errors += 1
+            if len(self.error_samples) < MAX_ERROR_SAMPLES:
+                self.error_samples.append((path, error.strerror or str(error)))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'root': self.root,
+                'dry_run': self.dry_run,
+                'files': self.files,
+                'dirs': self.dirs,
+                'bytes': self.bytes,
+                'errors': self.errors,
+                'skipped': self.skipped,
+                'skipped_bytes': self.skipped_bytes,
+                'error_samples': list(self.error_samples),
+                'duration': round(self.duration, 3),
+                'finished': self.finished,
+                'cancelled': self.cancelled,
+            }
+
+
+class TempCleaner:
+    def __init__(self, root=None, workers=4, dry_run=False, progress=None, progress_interval=0.1, rules=None,
+                 index=None, cancel=None):
+        self.root = root or tempfile.gettempdir()
+        self.rules = rules
+        # With a DiskUsageIndex the tree is read from the index after an incremental refresh, not walked
+        self.index = index
+        # Anything with a `cancelled` attribute; the run stops between files once it turns true
+        self.cancel = cancel
+        self.workers = workers
+        self.dry_run = dry_run
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.report = CleanReport(self.root, dry_run)
+        # Keeps the deletion queue bounded however many files the scan turns up
+        self._slots = threading.BoundedSemaphore(workers * 32)
+        self._last_progress = 0.0
+
+    @instrument('clean.run')
+    def run(self):
+        started = time.perf_counter()
+        directories = []
+        # Folders left holding something the rules kept; they and their parents are not removed
+        kept = set()
+        matcher = self.rules.matcher(self.root) if self.rules is not None else None
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="temp-cleaner") as executor:
+            for path, entry in self._scan(directories, kept, matcher):
+                if self.cancel is not None and self.cancel.cancelled:
+                    self.report.cancelled = True
+                    break
+                try:
+                    # DirEntry caches this stat on Windows, and it replaces the separate isfile/isdir calls;
+                    # an index entry stats the file itself, as its recorded size and age may be stale
+                    st = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    self.report.add_error(path, e)
+                    continue
+                if matcher is not None and not matcher.allows_file(entry, st):
+                    self.report.add_skipped(st.st_size)
+                    kept.add(os.path.dirname(path))
+                    continue
+                size = st.st_size
+                if self.dry_run:
+                    self.report.add_file(size)
+                else:
+                    self._slots.acquire()
+                    executor.submit(self._delete_file, path, size, st if matcher is not None else None)
+                self._report_progress()
+
+        # Deepest directories first, so each one is already empty when its turn comes
+        for path in reversed(directories if not self.report.cancelled else ()):
+            if path in kept:
+                kept.add(os.path.dirname(path))
+                continue
+            if self.dry_run:
+                self.report.add_dir()
+                continue
+            try:
+                os.rmdir(path)
+                self.report.add_dir()
+            except OSError as e:
+                kept.add(os.path.dirname(path))
+                # A file inside failed to delete and was already counted as an error
+                if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                    self.report.add_error(path, e)
+
+        self.report.duration = time.perf_counter() - started
+        self.report.finished = True
+        self._report_progress(force=True)
+        return self.report
+
+    def _scan(self, directories, kept, matcher):
+        if self.index is not None:
+            self.index.refresh(self.root)
+        stack = [self.root]
+        while stack:
+            current = stack.pop()
+            try:
+                for entry, is_dir in self._list_dir(current):
+                    if is_dir:
+                        if matcher is not None and not matcher.allows_dir(entry):
+                            self.report.add_skipped()
+                            kept.add(current)
+                            continue
+                        directories.append(entry.path)
+                        stack.append(entry.path)
+                    else:
+                        yield entry.path, entry
+            except OSError as e:
+                self.report.add_error(current, e)
+
+    def _list_dir(self, path):
+        if self.index is not None:
+            dirs, files = self.index.children(path)
+            return [(entry, True) for entry in dirs] + [(entry, False) for entry in files]
+        with os.scandir(path) as entries:
+            return [(entry, entry.is_dir(follow_symlinks=False)) for entry in entries]
+
+    def _delete_file(self, path, size, checked=None):
+        try:
+            if checked is not None:
+                # The rules passed on `checked`; a file written to since then is no longer the file they judged
+                current = os.lstat(path)
+                if (current.st_mtime_ns, current.st_size) != (checked.st_mtime_ns, checked.st_size):
+                    self.report.add_skipped(current.st_size)
+                    return
+            try:
+                os.unlink(path)
+            except PermissionError:
+                if os.name != 'nt':
+                    raise
+                # Windows refuses to delete read-only files
+                os.chmod(path, stat.S_IWRITE)
+                os.unlink(path)
+            self.report.add_file(size)
+        except FileNotFoundError:
+            # Already gone, for instance removed by its owner after the index last saw it
+            pass
+        except OSError as e:
+            self.report.add_error(path, e)
+        finally:
+            self._slots.release()
+
+    def _report_progress(self, force=False):
+        if self.progress is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            self.progress(self.report.snapshot())
@@ -0,0 +1,72 @@
+import colorsys
+import functools
+import json
+import os
+
+# Shades derived from every base colour of a palette, stored as '<colour>_<shade>'
+SHADES = {
+    'hover': -15,
+    'pressed': -30,
+}
+
+# Single colours derived from one base colour
+EXTRAS = {
+    'zebra': ('card_bg', -5),
+}
+
+MODES = ('light', 'dark')
+
+
+@functools.lru_cache(maxsize=4096)
+def adjust_color(color, amount):
+    # Moves the HSV value of a #rrggbb colour by `amount` percent; anything else comes back unchanged
+    try:
+        color = color.lstrip('#')
+        rgb = tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
+        h, s, v = colorsys.rgb_to_hsv(rgb[0]/255, rgb[1]/255, rgb[2]/255)
+        v = max(0, min(1, v + amount/100))
+        r, g, b = colorsys.hsv_to_rgb(h, s, v)
+        return f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
+    except Exception:
+        return color
+
+
+def adjust_colors(colors, amount):
+    return [adjust_color(color, amount) for color in colors]
+
+
+def compile_palette(base, mode='light'):
+    # Expands base colours into everything the UI looks up, so drawing never converts a colour
+    palette = dict(base)
+    for shade, amount in SHADES.items():
+        palette.update(zip((f"{name}_{shade}" for name in base), adjust_colors(base.values(), amount)))
+    for name, (source, amount) in EXTRAS.items():
+        palette[name] = adjust_color(base[source], amount)
+    palette['mode'] = mode
+    return palette
+
+
+def compile_themes(themes, builtin=None):
+    # themes maps a name to its base colours. A theme may set 'mode' ('light' or 'dark') and leave
+    # colours out; those come from the built-in theme of that mode.
+    builtin = builtin or {}
+    known = set().union(*(set(colors) for colors in builtin.values())) if builtin else None
+    palettes = {}
+    for name, colors in themes.items():
+        colors = dict(colors)
+        mode = colors.pop('mode', name if name in MODES else 'light')
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode for theme {name}: {mode}")
+        if known is not None and set(colors) - known:
+            raise ValueError(f"Unknown colours in theme {name}: {', '.join(sorted(set(colors) - known))}")
+        palettes[name] = compile_palette(dict(builtin.get(mode, {}), **colors), mode)
+    return palettes
+
+
+def load_themes(path, builtin):
+    # The built-in themes plus any defined or overridden in the JSON file at path
+    themes = dict(builtin)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            themes.update(json.load(f))
+    return compile_themes(themes, builtin)
@@ -0,0 +1,288 @@
+import collections
+import datetime
+import os
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+from pchelper.metrics import instrument
+from pchelper.temp_cleaner import CleanReport
+
+TrashEntry = collections.namedtuple('TrashEntry', ['name', 'path', 'info_path', 'original_path', 'deletion_date'])
+
+
+def home_trash_dir():
+    if sys.platform == 'darwin':
+        return os.path.join(os.path.expanduser('~'), '.Trash')
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(data_home, 'Trash')
+
+
+def parse_trashinfo(path):
+    original_path = None
+    deletion_date = None
+    with open(path, encoding='utf-8', errors='replace') as f:
+        in_section = False
+        for line in f:
+            line = line.strip()
+            if line.startswith('['):
+                in_section = line == '[Trash Info]'
+            elif in_section and '=' in line:
+                key, value = line.split('=', 1)
+                if key == 'Path':
+                    original_path = unquote(value)
+                elif key == 'DeletionDate':
+                    try:
+                        deletion_date = datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%S')
+                    except ValueError:
+                        pass
+    return original_path, deletion_date
+
+
+def _remove(path, report, tick):
+    # Deletes one file or a whole tree, adding every file and folder to the report as it goes
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISDIR(st.st_mode):
+        _unlink(path, st.st_size, report)
+        return
+
+    directories = [path]
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.append(entry.path)
+                            stack.append(entry.path)
+                        else:
+                            _unlink(entry.path, entry.stat(follow_symlinks=False).st_size, report)
+                            tick()
+                    except OSError as e:
+                        report.add_error(entry.path, e)
+        except OSError as e:
+            report.add_error(current, e)
+    for directory in reversed(directories):
+        try:
+            if os.name == 'nt':
+                os.chmod(directory, stat.S_IWRITE)
+            os.rmdir(directory)
+            report.add_dir()
+        except OSError as e:
+            report.add_error(directory, e)
+
+
+def _unlink(path, size, report):
+    try:
+        try:
+            os.unlink(path)
+        except PermissionError:
+            if os.name != 'nt':
+                raise
+            # Windows refuses to delete read-only files
+            os.chmod(path, stat.S_IWRITE)
+            os.unlink(path)
+        report.add_file(size)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        report.add_error(path, e)
+
+
+class FreedesktopTrash:
+    # The home trash from the freedesktop.org Trash specification: each trashed item lives in files/
+    # and has a matching info/<name>.trashinfo recording where it came from and when it was deleted.
+    # Trashes on other mounted volumes ($topdir/.Trash-$uid) are not handled.
+
+    def __init__(self, trash_dir=None):
+        self.trash_dir = trash_dir or home_trash_dir()
+        self.files_dir = os.path.join(self.trash_dir, 'files')
+        self.info_dir = os.path.join(self.trash_dir, 'info')
+
+    def entries(self):
+        entries = []
+        seen = set()
+        try:
+            with os.scandir(self.info_dir) as infos:
+                for info in infos:
+                    if not info.name.endswith('.trashinfo'):
+                        continue
+                    name = info.name[:-len('.trashinfo')]
+                    try:
+                        original_path, deletion_date = parse_trashinfo(info.path)
+                    except OSError:
+                        original_path, deletion_date = None, None
+                    entries.append(TrashEntry(name, os.path.join(self.files_dir, name), info.path,
+                                              original_path, deletion_date))
+                    seen.add(name)
+        except FileNotFoundError:
+            pass
+        # Items without an info file (macOS ~/.Trash has none at all) have no known deletion date
+        if os.path.isdir(self.files_dir):
+            items_dir, reserved = self.files_dir, ()
+        else:
+            items_dir, reserved = self.trash_dir, ('files', 'info', 'directorysizes', 'expunged')
+        try:
+            with os.scandir(items_dir) as items:
+                for item in items:
+                    if item.name not in seen and item.name not in reserved:
+                        entries.append(TrashEntry(item.name, item.path, None, None, None))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def select(self, older_than_days=None, now=None):
+        entries = self.entries()
+        if older_than_days is None:
+            return entries
+        cutoff = (now or datetime.datetime.now()) - datetime.timedelta(days=older_than_days)
+        return [entry for entry in entries if entry.deletion_date is not None and entry.deletion_date < cutoff]
+
+    @instrument('trash.empty')
+    def empty(self, older_than_days=None, workers=4, dry_run=False, progress=None, progress_interval=0.1,
+              token=None):
+        started = time.perf_counter()
+        report = CleanReport(self.trash_dir, dry_run)
+        entries = self.select(older_than_days)
+        last_progress = [0.0]
+        progress_lock = threading.Lock()
+
+        def report_progress(force=False):
+            if progress is None:
+                return
+            with progress_lock:
+                now = time.monotonic()
+                if not force and now - last_progress[0] < progress_interval:
+                    return
+                last_progress[0] = now
+            progress(report.snapshot())
+
+        def remove_entry(entry):
+            # Cancelling stops between trashed items, never halfway through one
+            if token is not None and token.cancelled:
+                report.cancelled = True
+                return False
+            if dry_run:
+                _measure(entry.path, report)
+            else:
+                _remove(entry.path, report, report_progress)
+                # The info file goes last, so an interrupted run never leaves a file nobody can restore
+                if entry.info_path is not None and not os.path.lexists(entry.path):
+                    try:
+                        os.unlink(entry.info_path)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        report.add_error(entry.info_path, e)
+            report_progress()
+            return True
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trash-emptier") as executor:
+            removed = [entry.name for entry, done in zip(entries, executor.map(remove_entry, entries)) if done]
+
+        if not dry_run:
+            self._update_directory_sizes(set(removed))
+        report.duration = time.perf_counter() - started
+        report.finished = True
+        report_progress(force=True)
+        return report
+
+    def _update_directory_sizes(self, removed):
+        # directorysizes caches the size of trashed folders by name; drop the lines for the ones just removed
+        path = os.path.join(self.trash_dir, 'directorysizes')
+        try:
+            with open(path, encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        kept = [line for line in lines if unquote(line.rstrip('\n').split(' ', 2)[-1]) not in removed]
+        if len(kept) != len(lines):
+            try:
+                with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                    f.writelines(kept)
+                os.replace(path + '.tmp', path)
+            except OSError as e:
+                print(f"Trash error: {str(e)}")
+
+
+def _measure(path, report):
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return
+    if not stat.S_ISDIR(st.st_mode):
+        report.add_file(st.st_size)
+        return
+    report.add_dir()
+    for current, dirs, files in os.walk(path):
+        for name in dirs:
+            report.add_dir()
+        for name in files:
+            try:
+                report.add_file(os.lstat(os.path.join(current, name)).st_size)
+            except OSError as e:
+                report.add_error(os.path.join(current, name), e)
+
+
+class WindowsRecycleBin:
+    # The Recycle Bin is emptied by the shell itself; SHQueryRecycleBinW supplies the totals beforehand.
+    # It keeps no per-item deletion date that the shell exposes cheaply, so partial emptying is not offered.
+
+    SHERB_NOCONFIRMATION = 0x1
+    SHERB_NOPROGRESSUI = 0x2
+    SHERB_NOSOUND = 0x4
+
+    def __init__(self):
+        self.trash_dir = 'Recycle Bin'
+
+    def query(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class SHQUERYRBINFO(ctypes.Structure):
+            _fields_ = [('cbSize', wintypes.DWORD), ('i64Size', ctypes.c_longlong), ('i64NumItems', ctypes.c_longlong)]
+
+        info = SHQUERYRBINFO()
+        info.cbSize = ctypes.sizeof(info)
+        result = ctypes.windll.shell32.SHQueryRecycleBinW(None, ctypes.byref(info))
+        if result != 0:
+            raise OSError(f"SHQueryRecycleBinW failed with 0x{result & 0xffffffff:08x}")
+        return info.i64NumItems, info.i64Size
+
+    @instrument('trash.empty')
+    def empty(self, older_than_days=None, workers=4, dry_run=False, progress=None, progress_interval=0.1,
+              token=None):
+        import ctypes
+
+        # SHEmptyRecycleBinW empties everything; treating an age limit as "all" would delete recent items
+        if older_than_days is not None:
+            raise ValueError("The Recycle Bin can only be emptied as a whole")
+        started = time.perf_counter()
+        report = CleanReport(self.trash_dir, dry_run)
+        items, size = self.query()
+        if not dry_run and items:
+            flags = self.SHERB_NOCONFIRMATION | self.SHERB_NOPROGRESSUI | self.SHERB_NOSOUND
+            result = ctypes.windll.shell32.SHEmptyRecycleBinW(None, None, flags)
+            if result != 0:
+                raise OSError(f"SHEmptyRecycleBinW failed with 0x{result & 0xffffffff:08x}")
+        report.files = items
+        report.bytes = size
+        report.duration = time.perf_counter() - started
+        report.finished = True
+        if progress is not None:
+            progress(report.snapshot())
+        return report
+
+
+def open_trash(trash_dir=None):
+    if os.name == 'nt' and trash_dir is None:
+        return WindowsRecycleBin()
+    return FreedesktopTrash(trash_dir)
@@ -0,0 +1,183 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+from pchelper.metrics import METRICS
+
+Stall = collections.namedtuple('Stall', ['at', 'duration', 'stack'])
+
+DEFAULT_INTERVAL = 0.1
+DEFAULT_THRESHOLD = 0.2
+# Heartbeats kept for the rolling percentiles; a minute at the default interval
+DEFAULT_WINDOW = 600
+MAX_STALLS = 50
+LOG_NAME = 'ui_stalls.log'
+# Past this size the log moves to ui_stalls.log.1, replacing the previous one, so at most twice this is kept
+MAX_LOG_BYTES = 1024 * 1024
+
+
+def log_dir():
+    # Per user rather than the working directory the app happens to be started from
+    if os.name == 'nt':
+        local = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+        return os.path.join(local, 'PcHelperApp')
+    if sys.platform == 'darwin':
+        return os.path.join(os.path.expanduser('~'), 'Library', 'Logs', 'PcHelperApp')
+    state_home = os.environ.get('XDG_STATE_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'state')
+    return os.path.join(state_home, 'pchelperapp')
+
+
+def default_log_path():
+    return os.path.join(log_dir(), LOG_NAME)
+
+
+class StallWatchdog:
+    # Measures how responsive an event loop is. A heartbeat is scheduled on the loop every `interval`
+    # seconds with `schedule(ms, callback)` (root.after in the app) and its lateness is the loop's
+    # latency. A monitor thread watches for an overdue heartbeat and, while the loop is still stuck,
+    # captures the stack of the loop's thread, so each stall is reported with the code that caused it.
+
+    def __init__(self, schedule, cancel=None, interval=DEFAULT_INTERVAL, threshold=DEFAULT_THRESHOLD,
+                 window=DEFAULT_WINDOW, log_path=None, max_log_bytes=MAX_LOG_BYTES):
+        self.schedule = schedule
+        self.cancel = cancel
+        self.interval = interval
+        self.threshold = threshold
+        self.log_path = log_path
+        self.max_log_bytes = max_log_bytes
+        # The loop's thread is the one that creates the watchdog
+        self.thread_ident = threading.get_ident()
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=window)
+        self._stalls = collections.deque(maxlen=MAX_STALLS)
+        self._stall_count = 0
+        self._expected = None
+        self._stack = None
+        self._job = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        self._schedule_beat()
+        self._thread = threading.Thread(target=self._monitor, name="ui-watchdog", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._job is not None and self.cancel is not None:
+            try:
+                self.cancel(self._job)
+            except Exception:
+                pass
+        self._job = None
+
+    def _schedule_beat(self):
+        with self._lock:
+            self._expected = time.perf_counter() + self.interval
+            self._stack = None
+        self._job = self.schedule(int(self.interval * 1000), self._beat)
+
+    def _beat(self):
+        now = time.perf_counter()
+        with self._lock:
+            lateness = max(0.0, now - self._expected)
+            stack = self._stack
+            self._latencies.append(lateness)
+        METRICS.observe('ui.heartbeat_lateness', lateness)
+        if lateness >= self.threshold:
+            self._record_stall(lateness, stack or [])
+        if not self._stop.is_set():
+            self._schedule_beat()
+
+    def _monitor(self):
+        # Checks twice per threshold so a stall is caught while it is still going on
+        while not self._stop.wait(self.threshold / 2):
+            with self._lock:
+                overdue = time.perf_counter() - self._expected
+                if overdue < self.threshold or self._stack is not None:
+                    continue
+            frame = sys._current_frames().get(self.thread_ident)
+            if frame is None:
+                continue
+            import traceback
+
+            stack = traceback.format_stack(frame)
+            frame = None
+            with self._lock:
+                if self._stack is None:
+                    self._stack = stack
+
+    def _record_stall(self, duration, stack):
+        stall = Stall(time.time(), duration, stack)
+        with self._lock:
+            self._stalls.append(stall)
+            self._stall_count += 1
+        METRICS.count('ui.stalls')
+        if self.log_path:
+            self._write_log(stall)
+
+    def _write_log(self, stall):
+        try:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            try:
+                if os.path.getsize(self.log_path) >= self.max_log_bytes:
+                    os.replace(self.log_path, self.log_path + '.1')
+            except FileNotFoundError:
+                pass
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(format_stall(stall))
+        except OSError as e:
+            print(f"Stall log error: {str(e)}")
+            # Reported once; the stalls are still kept in memory for Show Responsiveness
+            self.log_path = None
+
+    def stalls(self):
+        with self._lock:
+            return list(self._stalls)
+
+    def summary(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stalls = self._stall_count
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+        return {
+            'heartbeats': len(latencies),
+            'p50': percentile(0.5),
+            'p90': percentile(0.9),
+            'p99': percentile(0.99),
+            'max': latencies[-1] if latencies else None,
+            'stalls': stalls,
+        }
+
+
+def stall_location(stall):
+    # The innermost frame of the captured stack, e.g. 'File "PcHelperApp.py", line 812, in empty_trash'
+    if not stall.stack:
+        return "unknown code (the stall ended before its stack was captured)"
+    return stall.stack[-1].strip().splitlines()[0]
+
+
+def format_stall(stall):
+    at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stall.at))
+    return f"{at} UI stall of {stall.duration * 1000:.0f} ms\n{''.join(stall.stack)}\n"
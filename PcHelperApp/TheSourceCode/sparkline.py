@@ -0,0 +1,51 @@
+import math
+import tkinter as tk
+
+
+class Sparkline(tk.Canvas):
+    # Draws a row of latency samples as one line; NaN marks a lost sample and is drawn as a red tick
+
+    def __init__(self, master, width=160, height=36, line_color="#ffffff", loss_color="#ff5252", bg="#000000",
+                 font=("Arial", 9)):
+        super().__init__(master, width=width, height=height, bg=bg, highlightthickness=0, borderwidth=0)
+        self.line_color = line_color
+        self.loss_color = loss_color
+        self.font = font
+        self._shown = ([], "")
+
+    def set_colors(self, bg=None, line_color=None):
+        if bg is not None:
+            self.configure(bg=bg)
+        if line_color is not None:
+            self.line_color = line_color
+        self.show(*self._shown)
+
+    def show(self, values, caption=""):
+        self._shown = (values, caption)
+        self.delete('all')
+        width = int(self['width'])
+        height = int(self['height'])
+        chart_bottom = height - 12
+        answered = [v for v in values if not math.isnan(v)]
+        if caption:
+            self.create_text(width - 2, height - 1, text=caption, anchor='se', fill=self.line_color, font=self.font)
+        if not values:
+            return
+
+        top = max(answered) if answered else 1.0
+        step = width / max(1, len(values) - 1)
+        points = []
+        for i, value in enumerate(values):
+            x = i * step
+            if math.isnan(value):
+                self.create_line(x, 2, x, chart_bottom, fill=self.loss_color, width=2)
+                if len(points) >= 4:
+                    self.create_line(*points, fill=self.line_color, width=1.5)
+                points = []
+                continue
+            points.extend((x, chart_bottom - (value / top) * (chart_bottom - 4)))
+        if len(points) >= 4:
+            self.create_line(*points, fill=self.line_color, width=1.5)
+        elif len(points) == 2:
+            x, y = points
+            self.create_oval(x - 1.5, y - 1.5, x + 1.5, y + 1.5, fill=self.line_color, outline="")
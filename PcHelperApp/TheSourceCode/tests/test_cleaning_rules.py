@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+
+import pytest
+
+from pchelper.cleaning_rules import CleaningRules
+from pchelper.temp_cleaner import TempCleaner
+
+HOUR = 3600
+
+
+def make_file(root, relative, size=10, age_hours=48):
+    path = os.path.join(root, *relative.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    stamp = time.time() - age_hours * HOUR
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def clean(root, dry_run=True, **rules):
+    rules.setdefault('skip_in_use', False)
+    return TempCleaner(root=str(root), workers=2, dry_run=dry_run, rules=CleaningRules(**rules)).run()
+
+
+def test_include_and_exclude_globs(tmp_path):
+    make_file(tmp_path, 'a.tmp')
+    make_file(tmp_path, 'b.log')
+    make_file(tmp_path, 'keep.tmp')
+    make_file(tmp_path, 'cache/c.tmp')
+    make_file(tmp_path, 'cache/sub/d.tmp')
+
+    report = clean(tmp_path, dry_run=False, include=['*.tmp'], exclude=['keep.*', 'cache/sub/*'])
+
+    assert report.files == 2
+    assert sorted(os.listdir(tmp_path)) == ['b.log', 'cache', 'keep.tmp']
+    assert os.listdir(tmp_path / 'cache') == ['sub']
+    assert os.path.exists(tmp_path / 'cache' / 'sub' / 'd.tmp')
+
+
+def test_excluded_directory_is_not_entered(tmp_path):
+    make_file(tmp_path, 'skip-me/a.tmp')
+    make_file(tmp_path, 'b.tmp')
+
+    report = clean(tmp_path, dry_run=False, exclude=['skip-me'])
+
+    assert report.files == 1
+    assert os.path.exists(tmp_path / 'skip-me' / 'a.tmp')
+
+
+def test_min_age_hours(tmp_path):
+    make_file(tmp_path, 'old.tmp', age_hours=30)
+    make_file(tmp_path, 'new.tmp', age_hours=1)
+
+    report = clean(tmp_path, dry_run=False, min_age_hours=24)
+
+    assert report.files == 1
+    assert report.skipped == 1
+    assert os.listdir(tmp_path) == ['new.tmp']
+
+
+def test_size_limits(tmp_path):
+    make_file(tmp_path, 'small', size=5)
+    make_file(tmp_path, 'medium', size=500)
+    make_file(tmp_path, 'large', size=5000)
+
+    report = clean(tmp_path, min_size=100, max_size=1000)
+
+    assert (report.files, report.bytes) == (1, 500)
+    assert (report.skipped, report.skipped_bytes) == (2, 5005)
+
+
+def test_in_use_paths_are_protected(tmp_path):
+    make_file(tmp_path, 'open.tmp')
+    make_file(tmp_path, 'busy/inside.tmp')
+    make_file(tmp_path, 'free.tmp')
+    matcher = CleaningRules().matcher(
+        str(tmp_path), in_use=({str(tmp_path / 'open.tmp')}, {str(tmp_path / 'busy')})
+    )
+
+    entries = {entry.name: entry for entry in os.scandir(tmp_path)}
+
+    assert not matcher.allows_file(entries['open.tmp'], entries['open.tmp'].stat())
+    assert matcher.allows_file(entries['free.tmp'], entries['free.tmp'].stat())
+    assert not matcher.allows_dir(entries['busy'])
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="open files are found through /proc")
+def test_open_file_is_kept_by_the_cleaner(tmp_path):
+    path = make_file(tmp_path, 'held.tmp')
+    make_file(tmp_path, 'loose.tmp')
+
+    with open(path, 'rb'):
+        report = clean(tmp_path, dry_run=False, skip_in_use=True)
+
+    assert report.files == 1
+    assert os.listdir(tmp_path) == ['held.tmp']
+
+
+def test_dry_run_totals_match_a_real_run(tmp_path):
+    for i in range(30):
+        make_file(tmp_path, f'd{i % 3}/f{i}.tmp', size=i + 1)
+    make_file(tmp_path, 'd0/recent.tmp', size=7, age_hours=0)
+
+    preview = clean(tmp_path, dry_run=True)
+    assert preview.dry_run
+    assert (preview.files, preview.bytes) == (30, sum(range(1, 31)))
+    assert (preview.skipped, preview.skipped_bytes) == (1, 7)
+    # Only the folders that end up empty are counted
+    assert preview.dirs == 2
+    assert len(os.listdir(tmp_path)) == 3
+
+    report = clean(tmp_path, dry_run=False)
+    assert (report.files, report.bytes, report.dirs) == (preview.files, preview.bytes, preview.dirs)
+    assert os.listdir(tmp_path) == ['d0']
+
+
+def test_unknown_rule_is_rejected():
+    with pytest.raises(ValueError):
+        CleaningRules.from_dict({'min_age_hours': 1, 'max_age': 2})
@@ -0,0 +1,152 @@
+import ctypes
+import struct
+import threading
+
+import pytest
+
+from pchelper import clipboard_formats
+from pchelper import clipboard_watcher
+from pchelper.clipboard_formats import CF_DIB, CF_UNICODETEXT, KIND_HTML, KIND_IMAGE, read_clipboard
+from pchelper.clipboard_watcher import PollingClipboardWatcher
+
+HTML_FORMAT = 49000
+PNG = b'\x89PNG\r\n\x1a\n' + struct.pack('>I4sII', 13, b'IHDR', 3, 2) + b'\0' * 8
+DIB = struct.pack('<IiiHHIIiiII', 40, 2, 1, 1, 24, 0, 8, 0, 0, 0, 0) + b'\0' * 8
+
+
+class FakeWin32:
+    # user32, kernel32 and shell32 for _read_windows over a dict of format -> bytes
+    def __init__(self, formats):
+        self.buffers = {handle: ctypes.create_string_buffer(data, len(data))
+                        for handle, data in formats.items()}
+
+    def RegisterClipboardFormatW(self, name):
+        return HTML_FORMAT
+
+    def OpenClipboard(self, owner):
+        return True
+
+    def CloseClipboard(self):
+        return True
+
+    def IsClipboardFormatAvailable(self, clipboard_format):
+        return clipboard_format in self.buffers
+
+    def GetClipboardData(self, clipboard_format):
+        return clipboard_format if clipboard_format in self.buffers else None
+
+    def GlobalLock(self, handle):
+        return ctypes.addressof(self.buffers[handle])
+
+    def GlobalUnlock(self, handle):
+        return True
+
+    def GlobalSize(self, handle):
+        return len(self.buffers[handle])
+
+
+def read_windows(monkeypatch, formats):
+    fake = FakeWin32(formats)
+    monkeypatch.setattr(clipboard_formats, '_win32', lambda: (fake, fake, fake))
+    monkeypatch.setattr(clipboard_formats.os, 'name', 'nt')
+    return read_clipboard(lambda: "plain text")
+
+
+def test_windows_text_wins_over_its_picture(monkeypatch):
+    formats = {CF_UNICODETEXT: "copied cells\0".encode('utf-16-le'), CF_DIB: DIB}
+    assert read_windows(monkeypatch, formats) == "plain text"
+
+
+def test_windows_html_wins_over_its_picture(monkeypatch):
+    formats = {
+        HTML_FORMAT: clipboard_formats.cf_html(b'<b>bold</b>'),
+        CF_UNICODETEXT: "bold\0".encode('utf-16-le'),
+        CF_DIB: DIB,
+    }
+    item = read_windows(monkeypatch, formats)
+    assert (item.kind, item.text, item.data) == (KIND_HTML, "bold", b'<b>bold</b>')
+
+
+def test_windows_image_without_text(monkeypatch):
+    item = read_windows(monkeypatch, {CF_DIB: DIB})
+    assert (item.kind, item.text, item.mime) == (KIND_IMAGE, "Image 2x1", 'image/bmp')
+
+
+@pytest.fixture
+def fake_xclip(monkeypatch):
+    # A clipboard owned by `owner` offering `types`; every command run is recorded
+    clipboard = {'owner': 1, 'text': "first", 'types': b'TARGETS\nUTF8_STRING\n', 'data': {}, 'commands': []}
+
+    def run(command):
+        clipboard['commands'].append(command[-2])
+        return clipboard['types'] if command[-2] == 'TARGETS' else clipboard['data'].get(command[-2])
+
+    monkeypatch.setattr(clipboard_formats.os, 'name', 'posix')
+    monkeypatch.setattr(clipboard_formats.sys, 'platform', 'linux')
+    monkeypatch.setattr(clipboard_formats, '_unix_tool', lambda: (
+        ['xclip', '-t', 'TARGETS', '-o'], lambda mime: ['xclip', '-t', mime, '-o'], None))
+    monkeypatch.setattr(clipboard_formats, '_run', run)
+    return clipboard
+
+
+def test_unix_text_wins_over_its_picture(fake_xclip):
+    fake_xclip.update(types=b'TARGETS\nimage/png\nUTF8_STRING\ntext/plain\n', data={'image/png': PNG})
+    assert read_clipboard(lambda: "copied cells") == "copied cells"
+    assert 'image/png' not in fake_xclip['commands']
+
+
+def test_unix_html_wins_over_its_picture(fake_xclip):
+    fake_xclip.update(types=b'TARGETS\nimage/png\ntext/html\nUTF8_STRING\n',
+                      data={'image/png': PNG, 'text/html': b'<b>bold</b>'})
+    item = read_clipboard(lambda: "bold")
+    assert (item.kind, item.text, item.data) == (KIND_HTML, "bold", b'<b>bold</b>')
+
+
+def test_unix_image_without_text(fake_xclip):
+    fake_xclip.update(types=b'TARGETS\nimage/png\n', data={'image/png': PNG})
+    item = read_clipboard(lambda: "")
+    assert (item.kind, item.text, item.mime) == (KIND_IMAGE, "Image 3x2", 'image/png')
+
+
+def test_polling_reads_only_after_the_owner_changes(fake_xclip, monkeypatch):
+    seen = []
+    texts_read = []
+    closed = threading.Event()
+    done = threading.Event()
+    ticks = iter([
+        lambda: None, lambda: None, lambda: None,
+        lambda: fake_xclip.update(text="second", owner=2),
+        lambda: None,
+        lambda: fake_xclip.update(owner=3, types=b'TARGETS\nimage/png\n', data={'image/png': PNG}),
+        lambda: None,
+    ])
+
+    def owner_counter():
+        # Stands in for the XFixes counter: advances the scripted clipboard, then reports its owner
+        step = next(ticks, None)
+        if step is None:
+            done.set()
+        else:
+            step()
+        return fake_xclip['owner']
+
+    owner_counter.close = closed.set
+    monkeypatch.setattr(clipboard_watcher.sys, 'platform', 'linux')
+    monkeypatch.setenv('DISPLAY', ':0')
+    monkeypatch.setattr(clipboard_watcher, '_x11_change_counter', lambda: owner_counter)
+
+    def paste_text():
+        texts_read.append(fake_xclip['text'])
+        return fake_xclip['text']
+
+    watcher = PollingClipboardWatcher(seen.append, paste=lambda: read_clipboard(paste_text),
+                                      min_interval=0.001, max_interval=0.001)
+    watcher.start()
+    assert done.wait(5)
+    watcher.stop()
+
+    # Text and types are read once at start and once per new owner, never on the idle ticks
+    assert fake_xclip['commands'].count('TARGETS') == 3
+    assert texts_read == ["first", "second"]
+    assert [getattr(item, 'kind', item) for item in seen] == ["first", "second", KIND_IMAGE]
+    assert closed.is_set()
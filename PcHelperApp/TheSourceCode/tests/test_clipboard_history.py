@@ -0,0 +1,84 @@
+import sqlite3
+import threading
+
+from pchelper import clipboard_history
+from pchelper.clipboard_formats import KIND_IMAGE, ClipboardItem
+from pchelper.clipboard_history import READER_POOL_SIZE, ClipboardHistoryManager
+
+
+class CountingConnections:
+    def __init__(self, monkeypatch):
+        self.connections = []
+        connect = clipboard_history.connect
+
+        def counting_connect(db_path):
+            conn = connect(db_path)
+            self.connections.append(conn)
+            return conn
+
+        monkeypatch.setattr(clipboard_history, 'connect', counting_connect)
+
+    @property
+    def opened(self):
+        return len(self.connections)
+
+    @property
+    def open(self):
+        still_open = []
+        for conn in self.connections:
+            try:
+                conn.execute('SELECT 1')
+            except sqlite3.ProgrammingError:
+                continue
+            still_open.append(conn)
+        return still_open
+
+
+def test_reader_threads_share_a_bounded_pool(tmp_path, monkeypatch):
+    connections = CountingConnections(monkeypatch)
+    manager = ClipboardHistoryManager(db_path=str(tmp_path / 'history.db'))
+    manager.add_to_history("hello")
+    manager.flush()
+
+    # One short-lived thread per opened history window, one after the other
+    for _ in range(10):
+        thread = threading.Thread(target=manager.get_entries)
+        thread.start()
+        thread.join()
+    # Writer plus one reader, reused by every thread
+    assert connections.opened == 2
+
+    barrier = threading.Barrier(READER_POOL_SIZE + 4)
+
+    def read_together():
+        barrier.wait()
+        manager.search_entries("hello")
+
+    threads = [threading.Thread(target=read_together) for _ in range(READER_POOL_SIZE + 4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(connections.open) <= 1 + READER_POOL_SIZE
+    assert [entry.content for entry in manager.get_entries()] == ["hello"]
+
+    manager.close()
+    assert not connections.open
+
+
+def test_one_bad_entry_does_not_lose_its_batch(tmp_path, monkeypatch):
+    manager = ClipboardHistoryManager(db_path=str(tmp_path / 'history.db'), flush_interval=60)
+
+    def disk_full(data):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(manager.blobs, 'put', disk_full)
+    manager.add_to_history("before")
+    manager.add_to_history(ClipboardItem(KIND_IMAGE, "Image 1x1", b'png', 'image/png'))
+    manager.add_to_history(42)
+    manager.add_to_history("after")
+    manager.flush()
+
+    assert sorted(entry.content for entry in manager.get_entries()) == ["after", "before"]
+    assert manager.write_errors == 2
+    manager.close()
@@ -0,0 +1,28 @@
+import os
+import select
+import sys
+
+import pytest
+
+from pchelper.clipboard_watcher import X11ClipboardWatcher
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="counts descriptors in /proc")
+def test_x11_watcher_closes_its_wake_pipe(monkeypatch):
+    def run(self):
+        # The real loop without a display: wait on the wake pipe until stopped
+        while not self._stop_event.is_set():
+            select.select([self._wake_r], [], [])
+            os.read(self._wake_r, 64)
+
+    monkeypatch.setattr(X11ClipboardWatcher, '_run', run)
+    before = len(os.listdir('/proc/self/fd'))
+
+    # The app makes a new watcher each time monitoring is turned on; a watcher can also be restarted
+    for watcher in [X11ClipboardWatcher(lambda content: None, paste=lambda: "") for _ in range(3)] * 2:
+        watcher.start()
+        assert watcher.running
+        watcher.stop()
+        assert not watcher.running
+
+    assert len(os.listdir('/proc/self/fd')) == before
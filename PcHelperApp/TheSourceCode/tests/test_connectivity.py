@@ -0,0 +1,122 @@
+import asyncio
+import contextlib
+import struct
+import time
+
+from pchelper.connectivity import ConnectivityChecker, DnsProbe, HttpHeadProbe, ProbeError, TcpProbe
+
+
+@contextlib.asynccontextmanager
+async def http_server(status_line):
+    async def answer(reader, writer):
+        await reader.readuntil(b'\r\n\r\n')
+        writer.write(status_line + b'\r\nContent-Length: 0\r\n\r\n')
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(answer, '127.0.0.1', 0)
+    async with server:
+        yield f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/generate_204"
+
+
+class _DnsStandIn(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        # Echoes the query id with the response bit set and NXDOMAIN, which still proves the resolver answered
+        self.transport.sendto(data[:2] + struct.pack('!H', 0x8183) + data[4:], addr)
+
+
+def check(checker, **kwargs):
+    return asyncio.run(checker.check_async(**kwargs))
+
+
+def test_http_probe_expected_status():
+    async def main():
+        async with http_server(b'HTTP/1.1 204 No Content') as url:
+            checker = ConnectivityChecker([HttpHeadProbe(url, expect_status=204)], quorum=1, samples=2, interval=0)
+            return await checker.check_async(wait_for_all=True)
+
+    report = asyncio.run(main())
+    assert report.online
+    assert report.results[0].loss == 0 and report.results[0].error is None
+
+
+def test_http_probe_captive_portal():
+    async def main():
+        async with http_server(b'HTTP/1.1 302 Found') as url:
+            await HttpHeadProbe(url, expect_status=204).run()
+
+    try:
+        asyncio.run(main())
+    except ProbeError as e:
+        assert 'answered 302, expected 204' in str(e)
+    else:
+        raise AssertionError("a redirect must not count as connected")
+
+
+def test_garbage_status_line_is_a_failed_sample():
+    async def main():
+        async with http_server(b'HTTP/1.1 OK-ish garbage') as url:
+            checker = ConnectivityChecker([HttpHeadProbe(url, expect_status=204)], quorum=1, samples=2, interval=0)
+            return await checker.check_async()
+
+    report = asyncio.run(main())
+    assert not report.online
+    assert report.results[0].samples == [None, None]
+    assert report.results[0].error.startswith('unexpected reply')
+
+
+def test_dns_probe_against_stand_in_resolver():
+    async def main():
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(_DnsStandIn, local_addr=('127.0.0.1', 0))
+        try:
+            port = transport.get_extra_info('sockname')[1]
+            checker = ConnectivityChecker([DnsProbe('example.com', '127.0.0.1', port)], quorum=1, samples=1)
+            return await checker.check_async()
+        finally:
+            transport.close()
+
+    assert asyncio.run(main()).online
+
+
+def test_invalid_hostname_is_a_failed_sample():
+    checker = ConnectivityChecker([DnsProbe('a' * 64 + '.example', '127.0.0.1'), DnsProbe('bad..name', '127.0.0.1')],
+                                  quorum=1, samples=1)
+
+    report = check(checker)
+
+    assert not report.online
+    assert all(result.error.startswith('invalid hostname') for result in report.results)
+
+
+def test_unexpected_exception_still_decides_offline():
+    class Broken:
+        name = 'broken'
+
+        async def run(self):
+            raise RuntimeError("bug in a probe")
+
+    report = check(ConnectivityChecker([Broken()], quorum=1, samples=2, interval=0))
+
+    assert not report.online
+    assert report.results[0].error == "bug in a probe"
+
+
+def test_deadline_ends_a_hung_check(monkeypatch):
+    async def hang(probe):
+        # Ignores the per-sample timeout, as a probe stuck in a blocking call would
+        await asyncio.Event().wait()
+
+    checker = ConnectivityChecker([TcpProbe('127.0.0.1', 9)], quorum=1, samples=1, timeout=0.05, interval=0)
+    monkeypatch.setattr(checker, 'sample', hang)
+    monkeypatch.setattr(checker, 'deadline', lambda: 0.2)
+
+    started = time.perf_counter()
+    report = check(checker)
+
+    assert time.perf_counter() - started < 2
+    assert not report.online
+    assert report.results[0].error == "no verdict before the check deadline"
@@ -0,0 +1,31 @@
+from pchelper.clipboard_history import ClipboardHistoryManager
+from pchelper.history_search import MODE_FUZZY, MODE_LIVE, HistorySearchSource, SearchQuery
+from pchelper.retention import RetentionPolicy
+
+
+def contents(source, query):
+    return [entry.content for entry in source.fetch(query, 0, 50)]
+
+
+def test_live_results_follow_the_store(tmp_path):
+    manager = ClipboardHistoryManager(db_path=str(tmp_path / 'history.db'),
+                                      retention=RetentionPolicy(max_entries=2, compaction_interval=3600))
+    source = HistorySearchSource(manager)
+    query = SearchQuery("fo", MODE_LIVE)
+    manager.add_to_history("food")
+    assert contents(source, query) == ["food"]
+
+    # Copied while the window is open
+    manager.add_to_history("fog")
+    assert contents(source, query) == ["fog", "food"]
+    assert source.count(SearchQuery("fg", MODE_FUZZY)) == 1
+
+    # Pushed out by retention
+    manager.add_to_history("fox")
+    manager.compact()
+    assert contents(source, query) == ["fox", "fog"]
+
+    manager.clear_history()
+    assert contents(source, query) == []
+    assert source.count(query) == 0
+    manager.close()
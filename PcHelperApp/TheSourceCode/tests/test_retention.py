@@ -0,0 +1,28 @@
+import datetime
+
+from pchelper.clipboard_history import SQL_PIN, connect, migrate, store_content
+from pchelper.retention import RetentionPolicy, compact
+
+
+def days_ago(days):
+    moment = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def test_max_age_keeps_seen_count_and_pinned_history(tmp_path):
+    conn = connect(str(tmp_path / 'history.db'))
+    migrate(conn)
+    with conn:
+        for content, ages in (("pinned", (90, 60, 1)), ("recent", (90, 1)), ("stale", (90,))):
+            for age in ages:
+                store_content(conn, content, days_ago(age))
+        pinned_id = conn.execute("SELECT id FROM entries WHERE seen_count = 3").fetchone()[0]
+        conn.execute(SQL_PIN, (1, pinned_id))
+
+    stats = compact(conn, RetentionPolicy(max_entries=None, max_age_days=30))
+
+    rows = dict(conn.execute('SELECT seen_count, (SELECT COUNT(*) FROM occurrences WHERE entry_id = entries.id) '
+                             'FROM entries'))
+    assert rows == {3: 3, 1: 1}
+    assert (stats.entries_removed, stats.occurrences_removed) == (1, 2)
+    conn.close()
@@ -0,0 +1,77 @@
+import os
+import time
+
+from pchelper.cleaning_rules import CleaningRules
+from pchelper.disk_index import DiskUsageIndex
+from pchelper.temp_cleaner import TempCleaner
+
+DAY = 24 * 3600
+
+
+def age(path, seconds):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_indexed_run_uses_current_size_and_age(tmp_path):
+    root = tmp_path / 'temp'
+    root.mkdir()
+    stale = root / 'rewritten.tmp'
+    stale.write_bytes(b'old!')
+    age(stale, 2 * DAY)
+    old = root / 'old.tmp'
+    old.write_bytes(b'x' * 10)
+    age(old, 2 * DAY)
+
+    index = DiskUsageIndex(str(tmp_path / 'index.db'), watch=False)
+    try:
+        index.refresh(str(root))
+        mtime = os.stat(root).st_mtime_ns
+        # An in-place write updates the file but not its folder's mtime, so the index keeps the old row
+        with open(stale, 'r+b') as f:
+            f.write(b'y' * 5004)
+        assert os.stat(root).st_mtime_ns == mtime
+
+        report = TempCleaner(root=str(root), workers=2, index=index,
+                             rules=CleaningRules(min_age_hours=24, skip_in_use=False)).run()
+    finally:
+        index.close()
+
+    assert stale.exists()
+    assert not old.exists()
+    assert (report.files, report.bytes) == (1, 10)
+    assert (report.skipped, report.skipped_bytes) == (1, 5004)
+
+
+def test_file_changed_after_the_rules_passed_is_not_deleted(tmp_path):
+    path = tmp_path / 'busy.tmp'
+    path.write_bytes(b'abc')
+    checked = os.lstat(path)
+    path.write_bytes(b'abcdef')
+
+    cleaner = TempCleaner(root=str(tmp_path), rules=CleaningRules(min_age_hours=0, skip_in_use=False))
+    cleaner._slots.acquire()
+    cleaner._delete_file(str(path), checked.st_size, checked)
+
+    assert path.exists()
+    assert (cleaner.report.files, cleaner.report.skipped) == (0, 1)
+
+
+def test_file_removed_from_under_the_index_is_not_an_error(tmp_path):
+    root = tmp_path / 'temp'
+    root.mkdir()
+    gone = root / 'gone.tmp'
+    gone.write_bytes(b'x')
+
+    index = DiskUsageIndex(str(tmp_path / 'index.db'), watch=False)
+    try:
+        index.refresh(str(root))
+        mtime = os.stat(root).st_mtime_ns
+        gone.unlink()
+        # Pretend the folder did not change, so the index still lists the file
+        os.utime(root, ns=(mtime, mtime))
+        report = TempCleaner(root=str(root), index=index, rules=CleaningRules(min_age_hours=0, skip_in_use=False)).run()
+    finally:
+        index.close()
+
+    assert (report.files, report.errors) == (0, 0)
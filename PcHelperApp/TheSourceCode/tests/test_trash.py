@@ -0,0 +1,110 @@
+import datetime
+import os
+
+import pytest
+
+from pchelper import trash
+from pchelper.trash import FreedesktopTrash, WindowsRecycleBin, parse_trashinfo
+
+NOW = datetime.datetime(2026, 10, 1, 12, 0, 0)
+
+
+def trash_item(trash_dir, name, deleted=None, original=None, size=10, folder=False):
+    files_dir = trash_dir / 'files'
+    info_dir = trash_dir / 'info'
+    files_dir.mkdir(parents=True, exist_ok=True)
+    info_dir.mkdir(parents=True, exist_ok=True)
+    if folder:
+        (files_dir / name / 'sub').mkdir(parents=True)
+        (files_dir / name / 'sub' / 'inner.txt').write_bytes(b'x' * size)
+    else:
+        (files_dir / name).write_bytes(b'x' * size)
+    lines = ['[Trash Info]', f"Path={original or '/home/user/' + name}"]
+    if deleted is not None:
+        lines.append(f"DeletionDate={deleted:%Y-%m-%dT%H:%M:%S}")
+    (info_dir / f"{name}.trashinfo").write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def test_parse_trashinfo(tmp_path):
+    info = tmp_path / 'a.trashinfo'
+    info.write_text('[Other]\nPath=/wrong\n[Trash Info]\nPath=/home/user/My%20File.txt\n'
+                    'DeletionDate=2026-09-30T08:15:00\n', encoding='utf-8')
+    assert parse_trashinfo(str(info)) == ('/home/user/My File.txt', datetime.datetime(2026, 9, 30, 8, 15))
+
+
+def test_parse_trashinfo_with_bad_date(tmp_path):
+    info = tmp_path / 'b.trashinfo'
+    info.write_text('[Trash Info]\nPath=/x\nDeletionDate=yesterday\n', encoding='utf-8')
+    assert parse_trashinfo(str(info)) == ('/x', None)
+
+
+def test_select_cutoff(tmp_path):
+    trash_item(tmp_path, 'old', NOW - datetime.timedelta(days=31))
+    trash_item(tmp_path, 'edge', NOW - datetime.timedelta(days=30))
+    trash_item(tmp_path, 'new', NOW - datetime.timedelta(days=1))
+    trash_item(tmp_path, 'undated')
+    bin_ = FreedesktopTrash(str(tmp_path))
+
+    assert sorted(entry.name for entry in bin_.select(now=NOW)) == ['edge', 'new', 'old', 'undated']
+    # Strictly older than the cutoff; items without a deletion date are never picked by age
+    assert [entry.name for entry in bin_.select(older_than_days=30, now=NOW)] == ['old']
+
+
+def test_empty_removes_items_and_info_files(tmp_path):
+    trash_item(tmp_path, 'file.txt', NOW, size=7)
+    trash_item(tmp_path, 'folder', NOW, size=5, folder=True)
+
+    report = FreedesktopTrash(str(tmp_path)).empty(workers=2)
+
+    assert os.listdir(tmp_path / 'files') == []
+    assert os.listdir(tmp_path / 'info') == []
+    assert (report.files, report.bytes, report.dirs, report.errors) == (2, 12, 2, 0)
+
+
+def test_info_file_is_removed_last(tmp_path, monkeypatch):
+    trash_item(tmp_path, 'kept', NOW)
+    trash_item(tmp_path, 'gone', NOW)
+    remove = trash._remove
+    info_present = {}
+
+    def remove_some(path, report, tick):
+        name = os.path.basename(path)
+        info_present[name] = os.path.exists(tmp_path / 'info' / f"{name}.trashinfo")
+        # Simulates a failure partway: 'kept' stays in files/
+        if name != 'kept':
+            remove(path, report, tick)
+
+    monkeypatch.setattr(trash, '_remove', remove_some)
+    FreedesktopTrash(str(tmp_path)).empty(workers=1)
+
+    assert info_present == {'kept': True, 'gone': True}
+    assert os.listdir(tmp_path / 'files') == ['kept']
+    assert os.listdir(tmp_path / 'info') == ['kept.trashinfo']
+
+
+def test_directorysizes_drops_removed_folders(tmp_path):
+    trash_item(tmp_path, 'old dir', NOW - datetime.timedelta(days=40), folder=True)
+    trash_item(tmp_path, 'new dir', NOW, folder=True)
+    (tmp_path / 'directorysizes').write_text(
+        '10 1700000000000 old%20dir\n10 1700000000000 new%20dir\n10 1700000000000 other\n', encoding='utf-8')
+
+    FreedesktopTrash(str(tmp_path)).empty(older_than_days=30)
+
+    assert (tmp_path / 'directorysizes').read_text(encoding='utf-8') == (
+        '10 1700000000000 new%20dir\n10 1700000000000 other\n')
+    assert os.listdir(tmp_path / 'files') == ['new dir']
+
+
+def test_dry_run_removes_nothing(tmp_path):
+    trash_item(tmp_path, 'a', NOW, size=3)
+
+    report = FreedesktopTrash(str(tmp_path)).empty(dry_run=True)
+
+    assert (report.files, report.bytes) == (1, 3)
+    assert os.listdir(tmp_path / 'files') == ['a']
+
+
+def test_recycle_bin_refuses_age_limit():
+    # Checked before the shell is called, so this runs on any platform
+    with pytest.raises(ValueError):
+        WindowsRecycleBin().empty(older_than_days=30)
@@ -0,0 +1,37 @@
+import os
+
+from pchelper.watchdog import StallWatchdog, default_log_path
+
+
+def test_stalls_are_logged_quietly_and_rotated(tmp_path, capsys):
+    log = tmp_path / 'logs' / 'ui_stalls.log'
+    watchdog = StallWatchdog(lambda ms, callback: None, log_path=str(log), max_log_bytes=200)
+    stack = ['  File "app.py", line 1, in slow\n    time.sleep(1)\n'] * 3
+
+    for _ in range(5):
+        watchdog._record_stall(0.5, stack)
+
+    assert capsys.readouterr().out == ''
+    assert watchdog.summary()['stalls'] == 5
+    assert sorted(os.listdir(log.parent)) == ['ui_stalls.log', 'ui_stalls.log.1']
+    # Each write lands in a file under the limit, so neither file grows much past it
+    assert os.path.getsize(log) < 400 and os.path.getsize(str(log) + '.1') < 400
+
+
+def test_unwritable_log_is_reported_once(tmp_path, capsys):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    watchdog = StallWatchdog(lambda ms, callback: None, log_path=str(blocker / 'ui_stalls.log'))
+
+    watchdog._record_stall(0.5, [])
+    watchdog._record_stall(0.5, [])
+
+    assert capsys.readouterr().out.count('Stall log error') == 1
+    assert watchdog.log_path is None and len(watchdog.stalls()) == 2
+
+
+def test_default_log_path_is_not_the_working_directory(monkeypatch, tmp_path):
+    monkeypatch.setenv('XDG_STATE_HOME', str(tmp_path))
+    monkeypatch.setenv('LOCALAPPDATA', str(tmp_path))
+    assert os.path.dirname(default_log_path()) != os.getcwd()
+    assert os.path.basename(default_log_path()) == 'ui_stalls.log'
@@ -0,0 +1,53 @@
+import tkinter as tk
+
+_UNSET = object()
+
+
+class WidgetBindings:
+    # The widget tree is built once. Every option that depends on the language or the theme is
+    # registered here as a function of (texts, colors); a switch re-evaluates them and hands Tk only
+    # the options whose value actually changed, so nothing is destroyed or rebuilt.
+
+    def __init__(self, texts, colors):
+        self.texts = texts
+        self.colors = colors
+        self._bindings = []
+        self.configure_calls = 0
+
+    def bind(self, widget, configure=None, **options):
+        # configure defaults to widget.configure; menu entries and window titles pass their own
+        binding = [widget, configure or widget.configure, options, {}]
+        self._bindings.append(binding)
+        self._apply(binding)
+        return widget
+
+    def apply(self, texts=None, colors=None):
+        if texts is not None:
+            self.texts = texts
+        if colors is not None:
+            self.colors = colors
+        live = []
+        for binding in self._bindings:
+            try:
+                if binding[0].winfo_exists():
+                    self._apply(binding)
+                    live.append(binding)
+            except tk.TclError:
+                pass
+        # Widgets destroyed since the last switch (closed windows, a removed sparkline) drop out here
+        self._bindings = live
+        return self.configure_calls
+
+    def _apply(self, binding):
+        widget, configure, options, applied = binding
+        changed = {}
+        for name, value in options.items():
+            value = value(self.texts, self.colors)
+            if applied.get(name, _UNSET) != value:
+                changed[name] = applied[name] = value
+        if changed:
+            configure(**changed)
+            self.configure_calls += 1
+
+    def __len__(self):
+        return len(self._bindings)
@@ -0,0 +1,54 @@
+import collections
+import threading
+
+DRAIN_INTERVAL = 25
+MAX_BATCH = 200
+
+
+class UiDispatcher:
+    # Worker threads post callbacks here; the Tk main loop runs them in batches from after().
+    # Posts that share a key replace each other while waiting, so a burst of progress ticks
+    # costs the UI one update instead of hundreds.
+
+    def __init__(self, widget, interval=DRAIN_INTERVAL, max_batch=MAX_BATCH):
+        self.widget = widget
+        self.interval = interval
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = collections.deque()
+        self._latest = {}
+        self._job = None
+
+    def start(self):
+        if self._job is None:
+            self._job = self.widget.after(self.interval, self._drain)
+        return self
+
+    def stop(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def post(self, callback, *args, key=None):
+        with self._lock:
+            if key is None:
+                self._pending.append((None, callback, args))
+            else:
+                if key not in self._latest:
+                    self._pending.append((key, None, None))
+                self._latest[key] = (callback, args)
+
+    def _drain(self):
+        with self._lock:
+            batch = []
+            while self._pending and len(batch) < self.max_batch:
+                key, callback, args = self._pending.popleft()
+                if key is not None:
+                    callback, args = self._latest.pop(key)
+                batch.append((callback, args))
+        for callback, args in batch:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"UI update error: {str(e)}")
+        self._job = self.widget.after(self.interval, self._drain)